@@ -0,0 +1,31 @@
+# core/http_cache.py
+"""Small helpers for conditional GET (ETag / If-None-Match) on cached payloads."""
+import hashlib
+
+from django.http import HttpResponseNotModified
+
+
+def make_etag(content: bytes) -> str:
+    return '"%s"' % hashlib.md5(content).hexdigest()
+
+
+def etag_matches(request, etag: str) -> bool:
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    candidates = set()
+    for tag in header.split(','):
+        tag = tag.strip()
+        candidates.add(tag[2:] if tag.startswith('W/') else tag)
+    return '*' in candidates or etag in candidates
+
+
+def set_cache_headers(response, etag: str, max_age: int, public=True):
+    response['ETag'] = etag
+    visibility = 'public' if public else 'private'
+    response['Cache-Control'] = f"{visibility}, max-age={max_age}, stale-while-revalidate={max_age}"
+    return response
+
+
+def not_modified(etag: str, max_age: int, public=True):
+    return set_cache_headers(HttpResponseNotModified(), etag, max_age, public)
@@ -0,0 +1,22 @@
+# core/pagination.py
+from rest_framework.pagination import PageNumberPagination
+
+
+class StandardResultsPagination(PageNumberPagination):
+    """?page=N&page_size=M, 20 per page by default, capped at 100."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class OptionalPageNumberPagination(StandardResultsPagination):
+    """
+    Pages only when ?page or ?page_size is given, so endpoints that always
+    returned a plain list keep doing so for existing clients.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.page_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,58 @@
+# core/shop_cache.py
+"""
+Cache for the public (anonymous) shop directory and per-slug shop pages.
+
+Directory pages are keyed by a version token, so publishing or hiding any
+shop drops every cached page with one cache write instead of a key scan.
+Each entry stores the response data together with its ETag.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.http_cache import make_etag
+
+DIRECTORY_VERSION_KEY = "shops:directory:version"
+
+
+def _directory_version():
+    return cache.get_or_set(DIRECTORY_VERSION_KEY, time.time_ns, None)
+
+
+def _page_key(slug):
+    return f"shops:page:{slug}"
+
+
+def _cached(key, build):
+    entry = cache.get(key)
+    if entry is None:
+        data = build()
+        entry = {'data': data, 'etag': make_etag(JSONRenderer().render(data))}
+        cache.set(key, entry, settings.SHOP_DIRECTORY_CACHE_TTL)
+    return entry
+
+
+def get_directory_page(page, page_size, build):
+    """Cached {'data', 'etag'} for one directory page; `build()` returns the data."""
+    key = f"shops:directory:{_directory_version()}:{page}:{page_size}"
+    return _cached(key, build)
+
+
+def get_shop_page(slug, build):
+    """Cached {'data', 'etag'} for a shop page; `build()` returns the data or None."""
+    return _cached(_page_key(slug), build)
+
+
+def invalidate_shop(shop):
+    """Drop the shop's page and every directory page once the write commits."""
+    slug = shop.slug
+
+    def _invalidate():
+        cache.set(DIRECTORY_VERSION_KEY, time.time_ns(), None)
+        if slug:
+            cache.delete(_page_key(slug))
+
+    transaction.on_commit(_invalidate)
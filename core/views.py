@@ -3,14 +3,19 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, viewsets, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import AllowAny
 from rest_framework.authtoken.models import Token
+from django.conf import settings
 from django.db import IntegrityError, transaction
 from core.core_models import User, Profile, Shop, OTPCode
 from .utils import generate_otp, send_otp_email
 from django.http import JsonResponse
 from django.core.management import call_command
 from .serializers import UserSerializer, ProfileSerializer, ShopSerializer, OTPRequestSerializer, OTPVerifySerializer
+from .http_cache import etag_matches, set_cache_headers
+from .pagination import StandardResultsPagination
+from .shop_cache import get_directory_page, get_shop_page, invalidate_shop
 
 logger = logging.getLogger(__name__)
 
@@ -106,7 +111,7 @@ class ShopViewSet(viewsets.ModelViewSet):
     serializer_class = ShopSerializer
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'by_slug']:
             return [AllowAny()]
         return [permissions.IsAuthenticated()]
 
@@ -116,15 +121,58 @@ class ShopViewSet(viewsets.ModelViewSet):
 
         if user.is_authenticated and user.is_staff:
             logger.debug("Admin/Staff - Returning ALL shops")
-            return Shop.objects.all().order_by('-created_at')
+            return Shop.objects.select_related('owner').order_by('-created_at')
 
         elif user.is_authenticated:
             logger.debug(f"Normal authenticated user (ID: {user.id}) - Returning ONLY their shop")
-            return Shop.objects.filter(owner=user)
+            return Shop.objects.filter(owner=user).select_related('owner')
 
         else:
             logger.debug("Unauthenticated - Returning only LIVE shops")
-            return Shop.objects.filter(is_live=True).order_by('-created_at')
+            return Shop.objects.filter(is_live=True).select_related('owner').order_by('-created_at')
+
+    def _cached_response(self, request, entry):
+        """Response for a cached {'data', 'etag'} entry, honouring If-None-Match."""
+        max_age = settings.SHOP_DIRECTORY_CACHE_MAX_AGE
+        if etag_matches(request, entry['etag']):
+            return set_cache_headers(Response(status=status.HTTP_304_NOT_MODIFIED), entry['etag'], max_age)
+        return set_cache_headers(Response(entry['data']), entry['etag'], max_age)
+
+    def list(self, request, *args, **kwargs):
+        """Anonymous visitors get the cached, paginated public directory."""
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+
+        paginator = StandardResultsPagination()
+        # Key on the page as a number, so "?page=01" or junk values can't
+        # mint new cache entries; pages past the end 404 in build(), uncached
+        page_number = request.query_params.get(paginator.page_query_param, '1')
+        if page_number not in paginator.last_page_strings:
+            try:
+                page_number = int(page_number)
+            except ValueError:
+                page_number = 0
+            if page_number < 1:
+                raise NotFound("Invalid page.")
+        page_size = paginator.get_page_size(request)
+
+        def build():
+            page = paginator.paginate_queryset(self.get_queryset(), request, view=self)
+            return paginator.get_paginated_response(self.get_serializer(page, many=True).data).data
+
+        return self._cached_response(request, get_directory_page(page_number, page_size, build))
+
+    @action(detail=False, methods=['get'], url_path=r'by-slug/(?P<slug>[-\w]+)')
+    def by_slug(self, request, slug=None):
+        """Public shop page payload: GET /api/core/shops/by-slug/<slug>/"""
+        def build():
+            shop = Shop.objects.filter(slug=slug, is_live=True).select_related('owner').first()
+            return self.get_serializer(shop).data if shop else None
+
+        entry = get_shop_page(slug, build)
+        if entry['data'] is None:
+            return Response({'error': 'Shop not found'}, status=status.HTTP_404_NOT_FOUND)
+        return self._cached_response(request, entry)
 
 
     def perform_create(self, serializer):
@@ -136,17 +184,25 @@ class ShopViewSet(viewsets.ModelViewSet):
             # Update existing shop
             updated = self.get_serializer(existing_shop, data=self.request.data, partial=True)
             updated.is_valid(raise_exception=True)
-            updated.save()
+            invalidate_shop(updated.save())
             logger.info(f"Existing shop updated for user: {user}")
         else:
             # Create new shop
-            serializer.save(owner=user)
+            invalidate_shop(serializer.save(owner=user))
             logger.info(f"New shop created for user: {user}")
 
     def perform_update(self, serializer):
-        serializer.save()
+        old_slug = serializer.instance.slug
+        shop = serializer.save()
+        invalidate_shop(shop)
+        if old_slug != shop.slug:
+            invalidate_shop(Shop(slug=old_slug))
         logger.info(f"Shop updated by user: {self.request.user}")
 
+    def perform_destroy(self, instance):
+        invalidate_shop(instance)
+        instance.delete()
+
     @action(detail=True, methods=['post'])
     def publish(self, request, pk=None):
         """Shop ko live kar do (public website pe dikhega)"""
@@ -157,6 +213,7 @@ class ShopViewSet(viewsets.ModelViewSet):
 
             shop.is_live = True
             shop.save()
+            invalidate_shop(shop)
             public_url = f'https://corestore.netlify.app/shop.html?slug={shop.slug}'
 
             logger.info(f"Shop published: {shop.name} - {public_url}")
@@ -179,6 +236,7 @@ class ShopViewSet(viewsets.ModelViewSet):
 
             shop.is_live = not shop.is_live
             shop.save()
+            invalidate_shop(shop)
             status_msg = "Shop is now LIVE" if shop.is_live else "Shop is now HIDDEN"
 
             logger.info(f"{status_msg} - {shop.name}")
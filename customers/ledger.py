@@ -0,0 +1,104 @@
+# customers/ledger.py
+"""
+Khata ledger posting.
+
+Every money movement with a party is an append-only Transaction row, and
+the running balances (Khata.total_due, Customer.due_amount) move in the same
+DB transaction with F-expressions, so they never need a read-modify-write
+and shop totals are a single aggregate over Customer.due_amount.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When, Window
+from django.utils import timezone
+
+from customers.models import Customer, Khata, Transaction
+
+
+def signed_amount(amount, is_credit):
+    """Balance delta of a transaction: credit raises the due, payment lowers it."""
+    return amount if is_credit else -amount
+
+
+def signed_amount_expr():
+    """SQL form of signed_amount() for annotations and aggregates."""
+    return Case(
+        When(is_credit=True, then=F('amount')),
+        default=-F('amount'),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def get_khata(customer):
+    khata = Khata.objects.filter(customer=customer).order_by('id').first()
+    return khata or Khata.objects.create(customer=customer)
+
+
+def post_transaction(customer, amount, is_credit, description=''):
+    """
+    Append one ledger row for `customer` and apply it to the balances.
+
+    is_credit=True  -> party owes more (credit sale, money given to them)
+    is_credit=False -> party owes less (payment received, return)
+    """
+    amount = Decimal(str(amount))
+    delta = signed_amount(amount, is_credit)
+
+    with transaction.atomic():
+        khata = get_khata(customer)
+        txn = Transaction.objects.create(
+            khata=khata,
+            amount=amount,
+            is_credit=is_credit,
+            description=description,
+        )
+        Khata.objects.filter(pk=khata.pk).update(
+            total_due=F('total_due') + delta,
+            updated_at=timezone.now(),
+        )
+        Customer.objects.filter(pk=customer.pk).update(due_amount=F('due_amount') + delta)
+    return txn
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def statement(customer, start_date=None, end_date=None):
+    """
+    Ledger statement for `customer` between two dates (inclusive).
+
+    Returns (opening_balance, closing_balance, queryset). The opening and
+    closing balances come from one conditional aggregate, and every row of
+    the queryset carries `running_balance`, computed by the database with
+    SUM() OVER (ORDER BY created_at, id) on top of the opening balance, so
+    the result can be paginated without walking the customer's history.
+    """
+    transactions = Transaction.objects.filter(khata__customer=customer)
+
+    in_range = Q()
+    totals = {}
+    if start_date:
+        in_range &= Q(created_at__gte=_day_start(start_date))
+        totals['opening'] = Sum(
+            signed_amount_expr(), filter=Q(created_at__lt=_day_start(start_date))
+        )
+    if end_date:
+        in_range &= Q(created_at__lt=_day_start(end_date + timedelta(days=1)))
+    totals['movement'] = Sum(signed_amount_expr(), filter=in_range)
+
+    totals = transactions.aggregate(**totals)
+    opening = totals.get('opening') or Decimal('0')
+    closing = opening + (totals['movement'] or Decimal('0'))
+
+    rows = (
+        transactions.filter(in_range)
+        .annotate(running_balance=Value(opening) + Window(
+            expression=Sum(signed_amount_expr()),
+            order_by=[F('created_at').asc(), F('id').asc()],
+        ))
+        .order_by('created_at', 'id')
+    )
+    return opening, closing, rows
@@ -0,0 +1,46 @@
+# Generated by Django 4.2 on 2026-10-18 23:45
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_due_amount(apps, schema_editor):
+    """Seed Customer.due_amount from the khata balances in one UPDATE."""
+    Customer = apps.get_model('customers', 'Customer')
+    Khata = apps.get_model('customers', 'Khata')
+    khata_total = (
+        Khata.objects.filter(customer=OuterRef('pk'))
+        .values('customer')
+        .annotate(total=Sum('total_due'))
+        .values('total')
+    )
+    Customer.objects.update(
+        due_amount=Coalesce(
+            Subquery(khata_total, output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+            Decimal('0'),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='due_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['khata', 'created_at'], name='customers_t_khata_i_4d0005_idx'),
+        ),
+        migrations.RunPython(backfill_due_amount, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_customer_due_amount'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='khata',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='customers.khata'),
+        ),
+    ]
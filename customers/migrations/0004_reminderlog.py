@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-18 23:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_otpcode_options_profile_email'),
+        ('customers', '0003_transaction_related_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(default='sms', max_length=20)),
+                ('recipient', models.CharField(max_length=100)),
+                ('message', models.TextField()),
+                ('due_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='QUEUED', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('provider_id', models.CharField(blank=True, max_length=100)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='customers.customer')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.shop')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='reminderlog',
+            index=models.Index(fields=['status', 'id'], name='customers_r_status_e45008_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminderlog',
+            index=models.Index(fields=['customer', 'created_at'], name='customers_r_custome_dd64e5_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2 on 2026-10-18 23:50
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(raw):
+    """Frozen copy of customers.phones.normalize_phone as of this migration."""
+    if not raw:
+        return ''
+    raw = str(raw).strip()
+    digits = NON_DIGITS.sub('', raw)
+    country = str(getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '91')).lstrip('+')
+
+    if raw.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif len(digits) == 10:
+        digits = country + digits
+    elif len(digits) == 11 and digits.startswith('0'):
+        digits = country + digits[1:]
+    elif not (digits.startswith(country) and len(digits) == len(country) + 10):
+        return ''
+
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return ''
+    return '+' + digits
+
+
+def backfill_normalized_phone(apps, schema_editor):
+    Customer = apps.get_model('customers', 'Customer')
+    customers = Customer.objects.exclude(phone_number='').only('id', 'phone_number')
+    batch = []
+    for customer in customers.iterator(chunk_size=BATCH_SIZE):
+        customer.normalized_phone = normalize_phone(customer.phone_number)
+        if customer.normalized_phone:
+            batch.append(customer)
+        if len(batch) >= BATCH_SIZE:
+            Customer.objects.bulk_update(batch, ['normalized_phone'])
+            batch = []
+    if batch:
+        Customer.objects.bulk_update(batch, ['normalized_phone'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0004_reminderlog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='normalized_phone',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['shop', 'normalized_phone'], name='customers_c_shop_id_50dd70_idx'),
+        ),
+        migrations.RunPython(backfill_normalized_phone, migrations.RunPython.noop),
+    ]
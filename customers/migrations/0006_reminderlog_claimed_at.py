@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0005_normalized_phone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminderlog',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
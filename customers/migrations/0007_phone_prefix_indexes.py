@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-19 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0006_reminderlog_claimed_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='customers_c_shop_id_50dd70_idx',
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['shop', 'normalized_phone'], name='customer_shop_phone_like_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+    ]
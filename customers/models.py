@@ -1,13 +1,43 @@
 from django.db import models
 from core.core_models import Shop
+from customers.phones import normalize_phone
 
 class Customer(models.Model):
     shop = models.ForeignKey(Shop, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
     phone_number = models.CharField(max_length=15, blank=True)
+    # E.164 copy of phone_number used for lookups ('' when not a valid number)
+    normalized_phone = models.CharField(max_length=16, blank=True, default='', editable=False)
     address = models.TextField(blank=True)
+    # Materialized khata balance (+ve: you will get, -ve: you will give).
+    # Only customers.ledger.post_transaction moves it.
+    due_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Typeahead is a prefix match (LIKE '+9198%'): pattern ops so
+            # Postgres can use the index whatever the database collation
+            models.Index(
+                fields=['shop', 'normalized_phone'], name='customer_shop_phone_like_idx',
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.normalized_phone = normalize_phone(self.phone_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding:
+            # A full save of a loaded row (profile edit) must not write back the
+            # due_amount it read: post_transaction may have moved it since
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'due_amount'
+            ]
+        elif update_fields is not None and 'phone_number' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'normalized_phone'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
@@ -21,11 +51,51 @@ class Khata(models.Model):
         return f"Khata for {self.customer.name}"
 
 class Transaction(models.Model):
-    khata = models.ForeignKey(Khata, on_delete=models.CASCADE)
+    """Append-only khata ledger row; balances are kept on Khata/Customer."""
+    khata = models.ForeignKey(Khata, on_delete=models.CASCADE, related_name='transactions')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     is_credit = models.BooleanField(default=True)  # True for credit, False for payment
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['khata', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.amount} - {'Credit' if self.is_credit else 'Payment'}"
+
+class ReminderLog(models.Model):
+    """One payment reminder and its delivery state (see customers/reminders.py)."""
+    QUEUED = 'QUEUED'
+    SENDING = 'SENDING'
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='reminders')
+    channel = models.CharField(max_length=20, default='sms')
+    recipient = models.CharField(max_length=100)
+    message = models.TextField()
+    due_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    provider_id = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)  # moved to SENDING by a dispatch run
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id']),
+            models.Index(fields=['customer', 'created_at']),
+        ]
+
     def __str__(self):
-        return f"{self.amount} - {'Credit' if self.is_credit else 'Payment'}"
\ No newline at end of file
+        return f"{self.recipient} ({self.status})"
@@ -0,0 +1,68 @@
+# customers/phones.py
+"""
+Phone number normalization.
+
+Numbers are stored in E.164 form ("+919876543210") next to whatever the user
+typed, so lookups are plain equality / prefix matches on an indexed column.
+Local numbers get PHONE_DEFAULT_COUNTRY_CODE (India by default).
+"""
+import re
+
+from django.conf import settings
+
+NON_DIGITS = re.compile(r'\D')
+
+
+def _country_code():
+    return str(getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '91')).lstrip('+')
+
+
+def normalize_phone(raw):
+    """
+    Return `raw` as E.164, or '' when it isn't a usable phone number.
+
+    "98765 43210", "098765-43210", "+91 98765 43210", "0091 9876543210" and
+    "919876543210" all become "+919876543210".
+    """
+    if not raw:
+        return ''
+    raw = str(raw).strip()
+    digits = NON_DIGITS.sub('', raw)
+    country = _country_code()
+
+    if raw.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif len(digits) == 10:
+        digits = country + digits
+    elif len(digits) == 11 and digits.startswith('0'):
+        digits = country + digits[1:]
+    elif not (digits.startswith(country) and len(digits) == len(country) + 10):
+        return ''
+
+    # E.164: up to 15 digits, no leading zero in the country code
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return ''
+    return '+' + digits
+
+
+def phone_search_prefix(query):
+    """
+    Prefix to match normalized numbers against for a partially typed number
+    ("98765" -> "+9198765"), or None when the query has too few digits.
+    """
+    digits = NON_DIGITS.sub('', query or '')
+    if len(digits) < 3:
+        return None
+    full = normalize_phone(query)
+    if full:
+        return full
+    query = query.strip()
+    if query.startswith('+'):
+        return '+' + digits
+    if digits.startswith('00'):
+        return '+' + digits[2:]
+    if digits.startswith('0'):
+        digits = digits[1:]  # trunk prefix
+    return '+' + _country_code() + digits
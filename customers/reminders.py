@@ -0,0 +1,260 @@
+# customers/reminders.py
+"""
+Payment reminder pipeline.
+
+1. queue_reminders() picks every customer over the due threshold in one
+   query, renders the messages and bulk_creates QUEUED ReminderLog rows.
+2. dispatch_queued() claims queued rows in batches, hands each batch to the
+   configured backend in a single call and bulk_updates the delivery state,
+   sleeping between batches to respect REMINDER_RATE_LIMIT. Rows a crashed
+   run left in SENDING for over REMINDER_CLAIM_TIMEOUT_MINUTES are queued
+   again (as a failed attempt) when the next run starts.
+
+Backends are plain classes selected by the REMINDER_BACKEND dotted path, the
+same way Django picks EMAIL_BACKEND:
+
+- ConsoleReminderBackend  logs the messages (default, like the old stub)
+- LocmemReminderBackend   keeps them in `outbox` (for tests)
+- WebhookReminderBackend  POSTs each batch to an SMS/WhatsApp gateway
+"""
+import logging
+import time
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from customers.models import Customer, ReminderLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATE = "Hello {name}, you have a pending due of ₹{due} for {shop}."
+
+ReminderMessage = namedtuple('ReminderMessage', 'id channel recipient body')
+DeliveryResult = namedtuple('DeliveryResult', 'ok provider_id error')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ----------------------------------------------------------
+# Backends
+# ----------------------------------------------------------
+class BaseReminderBackend:
+    """Send a batch of ReminderMessage, return one DeliveryResult per message."""
+
+    def send_messages(self, messages):
+        raise NotImplementedError
+
+
+class ConsoleReminderBackend(BaseReminderBackend):
+    def send_messages(self, messages):
+        for message in messages:
+            logger.info(f"Reminder sent to {message.recipient}: {message.body}")
+        return [DeliveryResult(True, '', '') for _ in messages]
+
+
+class LocmemReminderBackend(BaseReminderBackend):
+    outbox = []
+
+    def send_messages(self, messages):
+        LocmemReminderBackend.outbox.extend(messages)
+        return [DeliveryResult(True, f"locmem-{m.id}", '') for m in messages]
+
+
+class WebhookReminderBackend(BaseReminderBackend):
+    """
+    One POST per batch to REMINDER_WEBHOOK_URL:
+    {"messages": [{"id", "channel", "to", "text"}, ...]}
+    A 2xx response marks the whole batch as sent.
+    """
+
+    def __init__(self, url=None, token=None, timeout=10):
+        self.url = url or _setting('REMINDER_WEBHOOK_URL', None)
+        self.token = token or _setting('REMINDER_WEBHOOK_TOKEN', None)
+        self.timeout = timeout
+
+    def send_messages(self, messages):
+        payload = {"messages": [
+            {"id": m.id, "channel": m.channel, "to": m.recipient, "text": m.body}
+            for m in messages
+        ]}
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        try:
+            response = requests.post(self.url, json=payload, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.error(f"Reminder webhook failed for {len(messages)} messages: {e}")
+            return [DeliveryResult(False, '', str(e)) for _ in messages]
+        return [DeliveryResult(True, '', '') for _ in messages]
+
+
+def get_backend(path=None, **kwargs):
+    backend = path or _setting('REMINDER_BACKEND', 'customers.reminders.ConsoleReminderBackend')
+    return import_string(backend)(**kwargs)
+
+
+# ----------------------------------------------------------
+# Selection / rendering
+# ----------------------------------------------------------
+def render_reminder(name, due, shop_name):
+    template = _setting('REMINDER_TEMPLATE', DEFAULT_TEMPLATE)
+    return template.format(name=name, due=due, shop=shop_name)
+
+
+def due_customers(shop=None, min_due=None, cooldown=None):
+    """
+    Customers owing at least `min_due`, with a phone number, and not reminded
+    (successfully or pending) within `cooldown`. One query.
+    """
+    if min_due is None:
+        min_due = Decimal(str(_setting('REMINDER_MIN_DUE', '1')))
+    if cooldown is None:
+        cooldown = timedelta(hours=_setting('REMINDER_COOLDOWN_HOURS', 24))
+
+    recent = ReminderLog.objects.filter(
+        customer=OuterRef('pk'),
+        created_at__gte=timezone.now() - cooldown,
+    ).exclude(status=ReminderLog.FAILED)
+
+    customers = (
+        Customer.objects.filter(due_amount__gte=min_due)
+        .exclude(phone_number='')
+        .filter(~Exists(recent))
+    )
+    if shop is not None:
+        customers = customers.filter(shop=shop)
+    return customers
+
+
+def queue_reminders(customers, batch_size=None):
+    """Render and bulk-insert QUEUED reminders for `customers`; returns the logs."""
+    batch_size = batch_size or _setting('REMINDER_BATCH_SIZE', 100)
+    channel = _setting('REMINDER_CHANNEL', 'sms')
+    rows = customers.values_list('id', 'shop_id', 'shop__name', 'name', 'phone_number', 'due_amount')
+
+    logs = [
+        ReminderLog(
+            shop_id=shop_id,
+            customer_id=customer_id,
+            channel=channel,
+            recipient=phone,
+            message=render_reminder(name, due, shop_name),
+            due_amount=due,
+        )
+        for customer_id, shop_id, shop_name, name, phone, due in rows.iterator(chunk_size=2000)
+    ]
+    return ReminderLog.objects.bulk_create(logs, batch_size=batch_size)
+
+
+# ----------------------------------------------------------
+# Delivery
+# ----------------------------------------------------------
+def _claim(batch_size, after_id, ids=None):
+    """Move up to `batch_size` QUEUED rows past `after_id` to SENDING and return them."""
+    with transaction.atomic():
+        queued = ReminderLog.objects.filter(status=ReminderLog.QUEUED, id__gt=after_id)
+        if ids is not None:
+            queued = queued.filter(id__in=ids)
+        batch = list(
+            queued.select_for_update(skip_locked=True)
+            .order_by('id')[:batch_size]
+        )
+        if batch:
+            ReminderLog.objects.filter(id__in=[log.id for log in batch]).update(
+                status=ReminderLog.SENDING, claimed_at=timezone.now()
+            )
+    return batch
+
+
+def requeue_stale(timeout=None, max_attempts=None):
+    """
+    Put rows stuck in SENDING (their run died before recording the outcome)
+    back in the queue, counting an attempt; FAILED once attempts run out.
+    Returns the number of rows released.
+    """
+    if timeout is None:
+        timeout = timedelta(minutes=_setting('REMINDER_CLAIM_TIMEOUT_MINUTES', 15))
+    if max_attempts is None:
+        max_attempts = _setting('REMINDER_MAX_ATTEMPTS', 3)
+    stale = ReminderLog.objects.filter(status=ReminderLog.SENDING).filter(
+        Q(claimed_at__lt=timezone.now() - timeout) | Q(claimed_at__isnull=True)
+    )
+    error = 'Delivery not confirmed (dispatch interrupted)'
+    failed = stale.filter(attempts__gte=max_attempts - 1).update(
+        status=ReminderLog.FAILED, attempts=F('attempts') + 1, claimed_at=None, error=error,
+    )
+    queued = stale.update(
+        status=ReminderLog.QUEUED, attempts=F('attempts') + 1, claimed_at=None, error=error,
+    )
+    if failed or queued:
+        logger.warning(f"Reminders stuck in SENDING: {queued} re-queued, {failed} failed")
+    return failed + queued
+
+
+def dispatch_queued(backend=None, batch_size=None, rate_limit=None, ids=None):
+    """
+    Send queued reminders in batches through `backend`.
+
+    rate_limit is messages per second (0 disables throttling). Returns
+    {"sent": n, "failed": n}.
+    """
+    backend = backend or get_backend()
+    batch_size = batch_size or _setting('REMINDER_BATCH_SIZE', 100)
+    if rate_limit is None:
+        rate_limit = _setting('REMINDER_RATE_LIMIT', 10)
+    max_attempts = _setting('REMINDER_MAX_ATTEMPTS', 3)
+    requeue_stale(max_attempts=max_attempts)
+
+    sent = failed = 0
+    last_id = 0  # keyset cursor, so rows re-queued after a failure wait for the next run
+    while True:
+        started = time.monotonic()
+        batch = _claim(batch_size, last_id, ids)
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        messages = [ReminderMessage(log.id, log.channel, log.recipient, log.message) for log in batch]
+        try:
+            results = backend.send_messages(messages)
+        except Exception as e:
+            logger.error(f"Reminder backend error: {e}", exc_info=True)
+            results = [DeliveryResult(False, '', str(e))] * len(batch)
+
+        now = timezone.now()
+        for log, result in zip(batch, results):
+            log.attempts += 1
+            log.claimed_at = None
+            if result.ok:
+                log.status = ReminderLog.SENT
+                log.provider_id = result.provider_id or ''
+                log.error = ''
+                log.sent_at = now
+                sent += 1
+            else:
+                # Retried by the next dispatch run until attempts run out
+                log.status = ReminderLog.FAILED if log.attempts >= max_attempts else ReminderLog.QUEUED
+                log.error = result.error or 'Unknown error'
+                failed += 1
+        ReminderLog.objects.bulk_update(
+            batch, ['status', 'attempts', 'provider_id', 'error', 'sent_at', 'claimed_at']
+        )
+
+        if len(batch) < batch_size:
+            break
+        if rate_limit:
+            pause = len(batch) / rate_limit - (time.monotonic() - started)
+            if pause > 0:
+                time.sleep(pause)
+
+    if sent or failed:
+        logger.info(f"Reminders dispatched: {sent} sent, {failed} failed")
+    return {"sent": sent, "failed": failed}
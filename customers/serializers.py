@@ -1,19 +1,57 @@
 from rest_framework import serializers
-from .models import Customer, Khata, Transaction
+from core.core_models import Shop
+from .models import Customer, Khata, Transaction, ReminderLog
+from .phones import normalize_phone
 
 class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = ['id', 'amount', 'is_credit', 'description', 'created_at']
 
+class StatementEntrySerializer(TransactionSerializer):
+    running_balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta(TransactionSerializer.Meta):
+        fields = TransactionSerializer.Meta.fields + ['running_balance']
+
 class KhataSerializer(serializers.ModelSerializer):
     transactions = TransactionSerializer(many=True, read_only=True)
 
     class Meta:
         model = Khata
         fields = ['id', 'customer', 'total_due', 'transactions', 'created_at', 'updated_at']
+        read_only_fields = ['total_due']  # moves only through customers.ledger
 
 class CustomerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Customer
-        fields = ['id', 'name', 'phone_number', 'address', 'created_at']
\ No newline at end of file
+        fields = ['id', 'name', 'phone_number', 'normalized_phone', 'address', 'due_amount', 'created_at']
+        read_only_fields = ['normalized_phone', 'due_amount']
+
+    def validate_phone_number(self, value):
+        if not value:
+            return value
+        normalized = normalize_phone(value)
+        if not normalized:
+            raise serializers.ValidationError("Enter a valid phone number.")
+
+        # One party per number within a shop
+        request = self.context.get('request')
+        shop = getattr(self.instance, 'shop', None)
+        if shop is None and request is not None:
+            shop = Shop.objects.filter(owner=request.user).first()
+        if shop is not None:
+            duplicates = Customer.objects.filter(shop=shop, normalized_phone=normalized)
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError("A customer with this phone number already exists.")
+        return value
+
+class ReminderLogSerializer(serializers.ModelSerializer):
+    customer_name = serializers.CharField(source='customer.name', read_only=True)
+
+    class Meta:
+        model = ReminderLog
+        fields = ['id', 'customer', 'customer_name', 'channel', 'recipient', 'message',
+                  'due_amount', 'status', 'attempts', 'error', 'created_at', 'sent_at']
@@ -0,0 +1,21 @@
+import logging
+
+from celery import shared_task
+
+from customers.reminders import due_customers, queue_reminders, dispatch_queued
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def queue_payment_reminders(shop_id=None):
+    """Queue reminders for every customer over the due threshold (all shops by default)."""
+    logs = queue_reminders(due_customers(shop=shop_id))
+    logger.info(f"Queued {len(logs)} payment reminders")
+    return len(logs)
+
+
+@shared_task
+def dispatch_payment_reminders():
+    """Send whatever is queued, in rate-limited batches."""
+    return dispatch_queued()
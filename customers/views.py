@@ -1,15 +1,27 @@
 import logging
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.db.models import Sum, Q
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import APIException
 from rest_framework.permissions import IsAuthenticated
-from customers.models import Customer, Khata
-from customers.serializers import CustomerSerializer, KhataSerializer
+from customers.models import Customer, Khata, ReminderLog
+from customers.serializers import (
+    CustomerSerializer, KhataSerializer, StatementEntrySerializer, ReminderLogSerializer,
+)
+from customers.ledger import post_transaction, statement
+from customers.reminders import due_customers, queue_reminders, dispatch_queued
+from customers.phones import phone_search_prefix
+from customers.walk_ins import find_walk_ins
 from core.core_models import Shop
+from core.pagination import StandardResultsPagination
 
 logger = logging.getLogger(__name__)
 
+LOOKUP_LIMIT = 25
+
 
 # ===================== CUSTOMER VIEWSET =====================
 class CustomerViewSet(viewsets.ModelViewSet):
@@ -40,27 +52,70 @@ class CustomerViewSet(viewsets.ModelViewSet):
             logger.error(f"Error creating customer: {str(e)}", exc_info=True)
             raise APIException(detail=f"Failed to create customer: {str(e)}", code=500)
 
-    # ✅ Send Payment Reminder (SMS/WhatsApp placeholder)
+    # ✅ Send Payment Reminder (through the reminder pipeline)
     @action(detail=True, methods=['post'])
     def send_reminder(self, request, pk=None):
         customer = self.get_object()
-        message = f"Hello {customer.name}, you have a pending due of ₹{customer.due_amount} for {customer.shop.name}."
-        # 🔹 TODO: Integrate with MSG91 or Twilio API
-        logger.info(f"Reminder sent to {customer.phone_number}: {message}")
+        if not customer.phone_number:
+            return Response({"error": "Customer has no phone number"}, status=400)
+        if customer.due_amount <= 0:
+            return Response({"error": "Customer has no pending due"}, status=400)
+
+        logs = queue_reminders(Customer.objects.filter(pk=customer.pk))
+        dispatch_queued(ids=[log.id for log in logs])
+        log = ReminderLog.objects.get(pk=logs[0].pk)
+        if log.status != ReminderLog.SENT:
+            return Response({
+                "status": log.status.lower(),
+                "message": f"Reminder to {customer.name} could not be sent yet: {log.error}"
+            }, status=status.HTTP_202_ACCEPTED)
         return Response({
             "status": "success",
             "message": f"Reminder sent to {customer.name} ({customer.phone_number})"
         }, status=status.HTTP_200_OK)
 
+    # ✅ Queue reminders for every customer with a pending due
+    @action(detail=False, methods=['post'])
+    def remind_all(self, request):
+        shop = Shop.objects.filter(owner=self.request.user).first()
+        if not shop:
+            return Response({"error": "Shop not found"}, status=404)
+        logs = queue_reminders(due_customers(shop=shop))
+        return Response({
+            "status": "success",
+            "queued": len(logs),
+            "message": f"{len(logs)} reminders queued"
+        }, status=status.HTTP_202_ACCEPTED)
+
+    # ✅ Delivery log
+    @action(detail=False, methods=['get'])
+    def reminders(self, request):
+        shop = Shop.objects.filter(owner=self.request.user).first()
+        if not shop:
+            return Response({"error": "Shop not found"}, status=404)
+        logs = ReminderLog.objects.filter(shop=shop).select_related('customer').order_by('-id')
+        if request.query_params.get('status'):
+            logs = logs.filter(status=request.query_params['status'].upper())
+        paginator = StandardResultsPagination()
+        page = paginator.paginate_queryset(logs, request, view=self)
+        return paginator.get_paginated_response(ReminderLogSerializer(page, many=True).data)
+
+    def _parse_amount(self, request):
+        try:
+            amount = Decimal(str(request.data.get("amount", 0)))
+        except InvalidOperation:
+            return None
+        return amount if amount > 0 else None
+
     # ✅ Quick “Payment Received”
     @action(detail=True, methods=['post'])
     def payment_received(self, request, pk=None):
         customer = self.get_object()
-        amount = float(request.data.get("amount", 0))
-        if amount <= 0:
+        amount = self._parse_amount(request)
+        if amount is None:
             return Response({"error": "Amount must be greater than 0"}, status=400)
-        customer.due_amount = max(0, float(customer.due_amount) - amount)
-        customer.save()
+        post_transaction(customer, amount, is_credit=False, description="Payment received")
+        customer.refresh_from_db(fields=['due_amount'])
         logger.info(f"Payment received ₹{amount} from {customer.name}")
         return Response({
             "status": "success",
@@ -72,11 +127,11 @@ class CustomerViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def payment_given(self, request, pk=None):
         customer = self.get_object()
-        amount = float(request.data.get("amount", 0))
-        if amount <= 0:
+        amount = self._parse_amount(request)
+        if amount is None:
             return Response({"error": "Amount must be greater than 0"}, status=400)
-        customer.due_amount += amount
-        customer.save()
+        post_transaction(customer, amount, is_credit=True, description="Payment given")
+        customer.refresh_from_db(fields=['due_amount'])
         logger.info(f"Payment given ₹{amount} to {customer.name}")
         return Response({
             "status": "success",
@@ -84,18 +139,82 @@ class CustomerViewSet(viewsets.ModelViewSet):
             "total_due": customer.due_amount
         }, status=status.HTTP_200_OK)
 
+    # ✅ Party statement with opening / running / closing balance
+    @action(detail=True, methods=['get'])
+    def statement(self, request, pk=None):
+        customer = self.get_object()
+        dates = {}
+        for param in ('start_date', 'end_date'):
+            value = request.query_params.get(param)
+            if not value:
+                dates[param] = None
+                continue
+            try:
+                dates[param] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                return Response({"error": f"Invalid {param} format. Use YYYY-MM-DD."}, status=400)
+        if dates['start_date'] and dates['end_date'] and dates['start_date'] > dates['end_date']:
+            return Response({"error": "start_date cannot be after end_date."}, status=400)
+
+        opening, closing, rows = statement(customer, dates['start_date'], dates['end_date'])
+
+        paginator = StandardResultsPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        response = paginator.get_paginated_response(StatementEntrySerializer(page, many=True).data)
+        response.data.update({
+            "customer": {"id": customer.id, "name": customer.name},
+            "start_date": dates['start_date'],
+            "end_date": dates['end_date'],
+            "opening_balance": opening,
+            "closing_balance": closing,
+        })
+        return response
+
+    # ✅ Billing-screen lookup / typeahead by phone (or name)
+    @action(detail=False, methods=['get'])
+    def lookup(self, request):
+        shop = Shop.objects.filter(owner=self.request.user).first()
+        if not shop:
+            return Response({"error": "Shop not found"}, status=404)
+        query = (request.query_params.get('q') or request.query_params.get('phone') or '').strip()
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), LOOKUP_LIMIT)
+        except ValueError:
+            limit = 10
+        if not query:
+            return Response({"customers": [], "walk_ins": []})
+
+        prefix = phone_search_prefix(query)
+        customers = Customer.objects.filter(shop=shop)
+        if prefix:
+            customers = customers.filter(normalized_phone__startswith=prefix).order_by('normalized_phone')
+        else:
+            customers = customers.filter(name__icontains=query).order_by('name')
+        customers = list(customers[:limit])
+
+        walk_ins = []
+        if prefix:
+            known = {c.normalized_phone for c in customers}
+            walk_ins = [w for w in find_walk_ins(shop, prefix, limit + len(known)) if w['phone'] not in known][:limit]
+
+        return Response({
+            "customers": CustomerSerializer(customers, many=True).data,
+            "walk_ins": walk_ins,
+        })
+
     # ✅ Summary API (for Party Tab header: “You will give ₹X / You will get ₹Y”)
     @action(detail=False, methods=['get'])
     def summary(self, request):
         shop = Shop.objects.filter(owner=self.request.user).first()
         if not shop:
             return Response({"error": "Shop not found"}, status=404)
-        customers = Customer.objects.filter(shop=shop)
-        total_you_will_get = sum([c.due_amount for c in customers if c.due_amount > 0])
-        total_you_will_give = sum([-c.due_amount for c in customers if c.due_amount < 0])
+        totals = Customer.objects.filter(shop=shop).aggregate(
+            you_will_get=Sum('due_amount', filter=Q(due_amount__gt=0)),
+            you_will_give=Sum('due_amount', filter=Q(due_amount__lt=0)),
+        )
         return Response({
-            "you_will_get": total_you_will_get,
-            "you_will_give": total_you_will_give
+            "you_will_get": totals['you_will_get'] or Decimal('0'),
+            "you_will_give": -(totals['you_will_give'] or Decimal('0'))
         })
 
 
@@ -111,7 +230,7 @@ class KhataViewSet(viewsets.ModelViewSet):
             if not shop:
                 logger.warning(f"No Shop found for user: {self.request.user}")
                 return Khata.objects.none()
-            return Khata.objects.filter(customer__shop=shop)
+            return Khata.objects.filter(customer__shop=shop).prefetch_related('transactions')
         except Exception as e:
             logger.error(f"Error fetching Khata queryset: {e}", exc_info=True)
             return Khata.objects.none()
@@ -0,0 +1,51 @@
+# customers/walk_ins.py
+"""
+Repeat walk-in customers: people who never became a Customer row but left a
+phone number on an offline invoice or a website order. Phones on Invoice and
+OrderRecord are stored normalized, so each source is one grouped query.
+"""
+from django.db.models import Count, Max, Sum
+
+from shop.models import Invoice, OrderRecord
+
+
+def find_walk_ins(shop, phone_prefix, limit=10):
+    """
+    Walk-in phones in `shop` starting with `phone_prefix`, most recent first:
+    [{"phone", "name", "invoices", "orders", "total_amount", "last_seen"}]
+    """
+    sources = (
+        ('invoices', Invoice.objects.filter(shop=shop)),
+        ('orders', OrderRecord.objects.filter(shop=shop)),
+    )
+    walk_ins = {}
+    for label, queryset in sources:
+        rows = (
+            queryset.filter(customer_phone__startswith=phone_prefix)
+            .values('customer_phone')
+            .annotate(
+                name=Max('customer_name'),
+                visits=Count('id'),
+                total=Sum('total_amount'),
+                last_seen=Max('created_at'),
+            )
+            .order_by('-last_seen')[:limit]
+        )
+        for row in rows:
+            entry = walk_ins.setdefault(row['customer_phone'], {
+                "phone": row['customer_phone'],
+                "name": row['name'],
+                "invoices": 0,
+                "orders": 0,
+                "total_amount": 0,
+                "last_seen": row['last_seen'],
+            })
+            entry[label] = row['visits']
+            entry['name'] = entry['name'] or row['name']
+            entry['last_seen'] = max(entry['last_seen'], row['last_seen'])
+            if label == 'invoices' or not entry['invoices']:
+                # Orders are billed through an invoice; count the money once
+                entry['total_amount'] = row['total'] or 0
+
+    ranked = sorted(walk_ins.values(), key=lambda w: w['last_seen'], reverse=True)
+    return ranked[:limit]
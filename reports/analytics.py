@@ -0,0 +1,144 @@
+# reports/analytics.py
+"""
+Customer analytics: RFM scores, segments and a simple lifetime value.
+
+Everything is computed from two grouped queries per shop (sales grouped by
+customer, customers with their khata balance) and cached per shop. The
+Celery beat job in reports/tasks.py rebuilds the cache periodically, so the
+endpoint normally answers straight from the cache.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from customers.models import Customer
+from shop.models import Sale
+
+SEGMENTS = ['champions', 'loyal', 'new', 'potential', 'at_risk', 'hibernating', 'no_purchases']
+TWO_PLACES = Decimal('0.01')
+
+
+def _cache_key(shop_id):
+    return f"analytics:customers:{shop_id}"
+
+
+def _quintiles(values):
+    """Map each value to a 1-5 score by rank (ties share the lower score)."""
+    ordered = sorted(values)
+    n = len(ordered)
+    first_rank = {}
+    for index, value in enumerate(ordered):
+        first_rank.setdefault(value, index)
+    return {value: 1 + (5 * rank) // n for value, rank in first_rank.items()}
+
+
+def _segment(r, f, m, visits, days_since_first):
+    if r >= 4 and f >= 4 and m >= 4:
+        return 'champions'
+    if visits == 1 and days_since_first <= 30:
+        return 'new'
+    if r <= 2 and (f >= 3 or m >= 3):
+        return 'at_risk'
+    if r <= 2:
+        return 'hibernating'
+    if f >= 4:
+        return 'loyal'
+    return 'potential'
+
+
+def compute_customer_analytics(shop_id):
+    now = timezone.now()
+    today = timezone.localdate()
+    horizon = getattr(settings, 'CUSTOMER_CLV_HORIZON_MONTHS', 12)
+
+    sales = (
+        Sale.objects.filter(shop_id=shop_id, customer__isnull=False)
+        .values('customer_id')
+        .annotate(
+            first_purchase=Min('sale_date'),
+            last_purchase=Max('sale_date'),
+            visits=Count(TruncDate('sale_date'), distinct=True),
+            items=Sum('quantity'),
+            monetary=Sum('total_amount'),
+            credit_sales=Sum('total_amount', filter=Q(is_credit=True)),
+        )
+        .order_by()
+    )
+    stats = {row['customer_id']: row for row in sales}
+    customers = Customer.objects.filter(shop_id=shop_id).values_list(
+        'id', 'name', 'phone_number', 'due_amount'
+    )
+
+    recency_scores = _quintiles([-(now - s['last_purchase']).days for s in stats.values()])
+    frequency_scores = _quintiles([s['visits'] for s in stats.values()])
+    monetary_scores = _quintiles([s['monetary'] for s in stats.values()])
+
+    rows = []
+    for customer_id, name, phone, due in customers:
+        row = {
+            "customer_id": customer_id,
+            "name": name,
+            "phone_number": phone,
+            "credit_exposure": max(due, Decimal('0')),
+        }
+        s = stats.get(customer_id)
+        if s is None:
+            row.update({
+                "recency_days": None, "visits": 0, "items": 0,
+                "monetary": Decimal('0'), "credit_sales": Decimal('0'),
+                "average_basket": Decimal('0'), "clv": Decimal('0'),
+                "rfm": None, "segment": 'no_purchases',
+                "last_purchase": None,
+            })
+            rows.append(row)
+            continue
+
+        recency_days = (now - s['last_purchase']).days
+        active_months = max(Decimal((now - s['first_purchase']).days) / Decimal('30'), Decimal('1'))
+        average_basket = s['monetary'] / s['visits']
+        r = recency_scores[-recency_days]
+        f = frequency_scores[s['visits']]
+        m = monetary_scores[s['monetary']]
+        days_since_first = (today - timezone.localtime(s['first_purchase']).date()).days
+        row.update({
+            "recency_days": recency_days,
+            "visits": s['visits'],
+            "items": s['items'],
+            "monetary": s['monetary'],
+            "credit_sales": s['credit_sales'] or Decimal('0'),
+            "average_basket": average_basket.quantize(TWO_PLACES),
+            "clv": (average_basket * s['visits'] / active_months * horizon).quantize(TWO_PLACES),
+            "rfm": f"{r}{f}{m}",
+            "segment": _segment(r, f, m, s['visits'], days_since_first),
+            "last_purchase": s['last_purchase'],
+        })
+        rows.append(row)
+
+    rows.sort(key=lambda row: row['monetary'], reverse=True)
+    summary = {segment: 0 for segment in SEGMENTS}
+    for row in rows:
+        summary[row['segment']] += 1
+
+    return {
+        "computed_at": now,
+        "customer_count": len(rows),
+        "total_credit_exposure": sum((row['credit_exposure'] for row in rows), Decimal('0')),
+        "segments": summary,
+        "customers": rows,
+    }
+
+
+def refresh_customer_analytics(shop_id):
+    data = compute_customer_analytics(shop_id)
+    cache.set(_cache_key(shop_id), data, getattr(settings, 'CUSTOMER_ANALYTICS_TTL', 6 * 60 * 60))
+    return data
+
+
+def get_customer_analytics(shop_id, refresh=False):
+    """Cached analytics for a shop; computed inline on a cold cache."""
+    data = None if refresh else cache.get(_cache_key(shop_id))
+    return data if data is not None else refresh_customer_analytics(shop_id)
@@ -0,0 +1,23 @@
+import logging
+
+from celery import shared_task
+
+from customers.models import Customer
+from reports.analytics import refresh_customer_analytics
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_all_customer_analytics():
+    """Rebuild the cached RFM/CLV analytics for every shop with customers."""
+    shop_ids = Customer.objects.values_list('shop_id', flat=True).distinct().order_by()
+    count = 0
+    for shop_id in shop_ids.iterator():
+        try:
+            refresh_customer_analytics(shop_id)
+            count += 1
+        except Exception as e:
+            logger.error(f"Customer analytics refresh failed for shop {shop_id}: {e}", exc_info=True)
+    logger.info(f"Customer analytics refreshed for {count} shops")
+    return count
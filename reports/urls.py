@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import SalesReportView, StockReportView
+from .views import SalesReportView, StockReportView, CustomerAnalyticsView
 
 app_name = "reports"
 
 urlpatterns = [
     path('sales/', SalesReportView.as_view(), name='sales_report'),
     path('stock/', StockReportView.as_view(), name='stock_report'),
+    path('customers/', CustomerAnalyticsView.as_view(), name='customer_analytics'),
 ]
\ No newline at end of file
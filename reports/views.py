@@ -1,11 +1,14 @@
 # reports/views.py
 
 from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from shop.models import Sale, Product
 from django.db.models import Sum
-from datetime import timedelta
+from datetime import datetime, timedelta
 from django.utils import timezone
+from core.core_models import Shop
+from reports.analytics import SEGMENTS, get_customer_analytics
 
 
 class SalesReportView(APIView):
@@ -91,4 +94,54 @@ class StockReportView(APIView):
             'total_products': products.count(),
             'low_stock_products': low_stock_list,
             'low_stock_count': len(low_stock_list),
-        })
\ No newline at end of file
+        })
+
+class CustomerAnalyticsView(APIView):
+    """
+    RFM segments, average basket, CLV and credit exposure per customer.
+
+    ?segment=at_risk   only that segment (see reports.analytics.SEGMENTS)
+    ?ordering=-clv     monetary | clv | visits | recency_days | credit_exposure (prefix - for desc)
+    ?limit=50          rows to return
+    ?refresh=1         rebuild the cached numbers now
+    """
+    permission_classes = [IsAuthenticated]
+    ORDERING_FIELDS = {'monetary', 'clv', 'visits', 'recency_days', 'credit_exposure', 'average_basket'}
+
+    def get(self, request):
+        shop = Shop.objects.filter(owner=request.user).first()
+        if not shop:
+            return Response({"error": "Shop not found"}, status=404)
+
+        segment = request.query_params.get('segment')
+        if segment and segment not in SEGMENTS:
+            return Response({"error": f"Invalid segment. Use one of: {', '.join(SEGMENTS)}"}, status=400)
+        ordering = request.query_params.get('ordering', '-monetary')
+        if ordering.lstrip('-') not in self.ORDERING_FIELDS:
+            return Response({"error": "Invalid ordering."}, status=400)
+        try:
+            limit = max(int(request.query_params.get('limit', 50)), 1)
+        except ValueError:
+            return Response({"error": "Invalid limit."}, status=400)
+
+        data = get_customer_analytics(shop.id, refresh=request.query_params.get('refresh') == '1')
+
+        rows = data['customers']
+        if segment:
+            rows = [row for row in rows if row['segment'] == segment]
+        field = ordering.lstrip('-')
+        # Customers without purchases have no recency; keep them last either way
+        rows = sorted(
+            (row for row in rows if row[field] is not None),
+            key=lambda row: row[field],
+            reverse=ordering.startswith('-'),
+        ) + [row for row in rows if row[field] is None]
+
+        return Response({
+            "computed_at": data['computed_at'],
+            "customer_count": data['customer_count'],
+            "total_credit_exposure": data['total_credit_exposure'],
+            "segments": data['segments'],
+            "count": len(rows),
+            "customers": rows[:limit],
+        })
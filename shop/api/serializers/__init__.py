@@ -1,2 +1,2 @@
-from .serializers import ProductSerializer, CategorySerializer, InvoiceSerializer, InvoiceItemSerializer, CashbookEntrySerializer
+from .serializers import ProductSerializer, CategorySerializer, InvoiceSerializer, InvoiceItemSerializer, CashbookEntrySerializer, CashbookDaySerializer, ProductBulkUpdateItemSerializer, ReorderLevelSerializer, ProductUnitSerializer
 from .sale_serializer import SaleSerializer, PendingSaleSerializer
\ No newline at end of file
@@ -0,0 +1,26 @@
+from rest_framework import serializers
+from shop.models import DayClose, DayCloseCorrection
+from shop.day_close import TOTAL_FIELDS, effective_totals
+
+
+class DayCloseCorrectionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DayCloseCorrection
+        fields = ['id', 'reason', 'created_at', *TOTAL_FIELDS]
+
+
+class DayCloseSerializer(serializers.ModelSerializer):
+    corrections = DayCloseCorrectionSerializer(many=True, read_only=True)
+    effective = serializers.SerializerMethodField()
+    closed_by = serializers.StringRelatedField()
+
+    class Meta:
+        model = DayClose
+        fields = ['id', 'date', 'closed_at', 'closed_by', 'is_auto', 'note',
+                  *TOTAL_FIELDS, 'corrections', 'effective']
+
+    def get_effective(self, obj):
+        return {
+            field: value if field == 'sales_count' else str(value)
+            for field, value in effective_totals(obj).items()
+        }
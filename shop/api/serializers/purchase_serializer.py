@@ -2,9 +2,9 @@ from rest_framework import serializers
 from decimal import Decimal
 from django.utils import timezone
 
-from shop.models import Product, Invoice, InvoiceItem
-from shop.models.purchase_models import Purchase, PurchaseReturn, SaleReturn
-from customers.models import Customer
+from shop.models import Product, InvoiceItem
+from shop.models.purchase_models import Purchase, PurchaseReturn, SaleReturn, Supplier, SupplierPayment
+from shop.payables import change_purchase_supplier
 
 
 # ===================== PRODUCT BASIC SERIALIZER =====================
@@ -14,18 +14,49 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'price', 'stock_quantity']
 
 
-# ===================== SUPPLIER (CUSTOMER) SERIALIZER =====================
+# ===================== SUPPLIER SERIALIZERS =====================
 class SupplierSerializer(serializers.ModelSerializer):
     class Meta:
-        model = Customer
+        model = Supplier
         fields = ['id', 'name', 'phone_number']
 
 
+class SupplierAccountSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Supplier
+        fields = ['id', 'name', 'phone_number', 'address', 'payable_balance', 'created_at']
+        read_only_fields = ['id', 'payable_balance', 'created_at']
+
+
+class SupplierPaymentSerializer(serializers.ModelSerializer):
+    supplier_name = serializers.CharField(source='supplier.name', read_only=True)
+
+    class Meta:
+        model = SupplierPayment
+        fields = [
+            'id',
+            'supplier',
+            'supplier_name',
+            'amount',
+            'payment_type',
+            'unallocated',
+            'note',
+            'paid_on',
+            'created_at',
+        ]
+        read_only_fields = ['id', 'supplier', 'unallocated', 'created_at']
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than 0")
+        return value
+
+
 # ===================== PURCHASE SERIALIZER =====================
 class PurchaseSerializer(serializers.ModelSerializer):
     supplier = SupplierSerializer(read_only=True)
     supplier_id = serializers.PrimaryKeyRelatedField(
-        queryset=Customer.objects.all(),
+        queryset=Supplier.objects.all(),
         source='supplier',
         write_only=True,
         required=False
@@ -45,8 +76,98 @@ class PurchaseSerializer(serializers.ModelSerializer):
             'created_at',
             'received',
             'payment_type',
+            'paid_amount',
+            'balance_due',
+        ]
+        # Money moves only through the create path and shop.payables
+        read_only_fields = [
+            'id', 'shop', 'invoice_number', 'created_at', 'total_amount', 'paid_amount', 'balance_due',
+        ]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        suppliers = Supplier.objects.none()
+        if user is not None and user.is_authenticated:
+            suppliers = Supplier.objects.filter(shop__owner=user)
+        fields['supplier_id'].queryset = suppliers
+        return fields
+
+    def update(self, instance, validated_data):
+        if 'supplier' in validated_data:
+            change_purchase_supplier(instance, validated_data.pop('supplier'))
+        return super().update(instance, validated_data)
+
+
+# ===================== PURCHASE ITEM SERIALIZER =====================
+class PurchaseItemSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source="product.name", read_only=True)
+    product_id = serializers.IntegerField(source="product.id", read_only=True)
+
+    class Meta:
+        model = InvoiceItem
+        fields = [
+            "id",
+            "product_id",
+            "product_name",
+            "quantity",
+            "unit_price",
+        ]
+
+
+class IncludeItemsMixin:
+    """
+    Adds the bill lines as `items` when the view passes include_items in the
+    context. Reads the prefetched invoice__items, so a page of purchases costs
+    one extra query however many purchases it holds.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.context.get('include_items'):
+            fields.pop('items', None)
+        return fields
+
+    def get_items(self, obj):
+        if not obj.invoice_id:
+            return []
+        return PurchaseItemSerializer(obj.invoice.items.all(), many=True).data
+
+
+# ===================== PURCHASE LIST SERIALIZERS =====================
+class PurchaseListSerializer(IncludeItemsMixin, PurchaseSerializer):
+    items = serializers.SerializerMethodField()
+
+    class Meta(PurchaseSerializer.Meta):
+        fields = PurchaseSerializer.Meta.fields + ['items']
+
+
+class PurchaseSlimSerializer(IncludeItemsMixin, serializers.ModelSerializer):
+    """Just what the purchase history screen shows (?view=slim)."""
+    supplier_name = serializers.CharField(source='supplier.name', read_only=True, default=None)
+    item_count = serializers.SerializerMethodField()
+    items = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Purchase
+        fields = [
+            'id',
+            'invoice_number',
+            'supplier_name',
+            'total_amount',
+            'paid_amount',
+            'balance_due',
+            'payment_type',
+            'created_at',
+            'item_count',
+            'items',
         ]
-        read_only_fields = ['id', 'invoice_number', 'created_at']
+
+    def get_item_count(self, obj):
+        if self.context.get('include_items'):
+            return len(obj.invoice.items.all()) if obj.invoice_id else 0
+        return obj.item_count
 
 
 # ===================== PURCHASE RETURN SERIALIZER (for create/update/retrieve) =====================
@@ -63,6 +184,7 @@ class PurchaseReturnSerializer(serializers.ModelSerializer):
         source='purchase',
         write_only=True
     )
+    invoice_number = serializers.CharField(source='invoice.invoice_number', read_only=True, default=None)
 
     class Meta:
         model = PurchaseReturn
@@ -73,10 +195,12 @@ class PurchaseReturnSerializer(serializers.ModelSerializer):
             'product',
             'product_id',
             'quantity',
+            'unit_price',
+            'invoice_number',
             'reason',
             'created_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'unit_price', 'created_at']
 
 
 # ===================== PURCHASE RETURN LIST SERIALIZER (for list view - billing/history) =====================
@@ -136,28 +260,13 @@ class PurchaseReturnListSerializer(serializers.ModelSerializer):
         ]
 
     def get_return_invoice_number(self, obj):
-        invoice = Invoice.objects.filter(
-            note__startswith='Purchase Return',
-            total_amount__gt=0,
-            created_at__gte=obj.created_at - timezone.timedelta(minutes=10),
-            created_at__lte=obj.created_at + timezone.timedelta(minutes=10),
-        ).order_by('-created_at').first()
-        
-        return invoice.invoice_number if invoice else f"RET-{obj.id:06d}"
+        # Returns made before the invoice link existed have no invoice
+        return obj.invoice.invoice_number if obj.invoice_id else f"RET-{obj.id:06d}"
 
     def get_total_amount(self, obj):
-        # 1. Prefer the actual return invoice
-        invoice = Invoice.objects.filter(
-            note__startswith='Purchase Return',
-            total_amount__gt=0,
-            created_at__range=(
-                obj.created_at - timezone.timedelta(minutes=10),
-                obj.created_at + timezone.timedelta(minutes=10),
-            )
-        ).first()
-
-        if invoice:
-            return float(invoice.total_amount)
+        # 1. Refund price stored on the return line
+        if obj.unit_price is not None:
+            return float(obj.unit_price * obj.quantity)
 
         # 2. Fallback: original purchase price × returned quantity
         item = InvoiceItem.objects.filter(
@@ -189,6 +298,7 @@ class SaleReturnSerializer(serializers.ModelSerializer):
         source='product',
         write_only=True
     )
+    invoice_number = serializers.CharField(source='invoice.invoice_number', read_only=True, default=None)
 
     class Meta:
         model = SaleReturn
@@ -198,7 +308,9 @@ class SaleReturnSerializer(serializers.ModelSerializer):
             'product',
             'product_id',
             'quantity',
+            'unit_price',
+            'invoice_number',
             'reason',
             'created_at'
         ]
-        read_only_fields = ['id', 'created_at']
\ No newline at end of file
+        read_only_fields = ['id', 'unit_price', 'created_at']
\ No newline at end of file
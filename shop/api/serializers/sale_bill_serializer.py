@@ -99,7 +99,7 @@ class SaleBillSerializer(serializers.ModelSerializer):
 
         print("Created SaleBill - Customer ID:", sale_bill.customer_id if sale_bill.customer else "NULL")  # Debug
 
-        # Create items and deduct stock
+        # Create items (stock is deducted by SaleBillViewSet.create via the ledger)
         for item_data in items_data:
             product_id = item_data.pop('product_id')
             product = Product.objects.get(id=product_id)
@@ -114,10 +114,6 @@ class SaleBillSerializer(serializers.ModelSerializer):
                 **item_data
             )
 
-            # Deduct stock
-            product.stock_quantity -= quantity
-            product.save(update_fields=['stock_quantity'])
-
         return sale_bill
 
     def update(self, instance, validated_data):
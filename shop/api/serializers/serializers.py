@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from shop.models import Product, Invoice, InvoiceItem, Category, CashbookEntry
+from shop.models import Product, ProductUnit, Invoice, InvoiceItem, Category, CashbookEntry, CashbookDay, ReorderLevel
 from shop.models.expense_models import Expense
 
 
@@ -18,6 +18,12 @@ class ProductSerializer(serializers.ModelSerializer):
         allow_null=True,
         required=False
     )
+    parent_id = serializers.PrimaryKeyRelatedField(
+        queryset=Product.objects.all(),
+        source='parent',
+        allow_null=True,
+        required=False
+    )
 
     # image_url ab read + write dono me kaam karega
     image_url = serializers.URLField(
@@ -29,7 +35,7 @@ class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = [
-            'id', 'name', 'category', 'category_id', 'price',
+            'id', 'name', 'category', 'category_id', 'parent_id', 'variant_label', 'price',
             'stock_quantity', 'barcode', 'image_url', 'description',
             'show_on_website', 'created_at', 'updated_at'
         ]
@@ -38,8 +44,24 @@ class ProductSerializer(serializers.ModelSerializer):
     def validate_barcode(self, value):
         if not value:
           return None
+        if ProductUnit.objects.filter(barcode=value).exists():
+            raise serializers.ValidationError("This barcode is already used by a product unit.")
         return value
 
+    def validate_parent_id(self, parent):
+        if parent is None:
+            return parent
+        request = self.context.get('request')
+        if request and parent.shop.owner_id != request.user.id:
+            raise serializers.ValidationError("Parent product not found.")
+        if parent.parent_id:
+            raise serializers.ValidationError("A variant cannot have variants of its own.")
+        if self.instance and parent.pk == self.instance.pk:
+            raise serializers.ValidationError("A product cannot be its own variant.")
+        if self.instance and self.instance.variants.exists():
+            raise serializers.ValidationError("A product with variants cannot become a variant.")
+        return parent
+
 
     def to_representation(self, instance):
         """
@@ -82,6 +104,59 @@ class ProductSerializer(serializers.ModelSerializer):
         return instance
 
 
+class ProductBulkUpdateItemSerializer(serializers.Serializer):
+    """One entry of ProductViewSet.bulk_update, matched by id or barcode."""
+    id = serializers.IntegerField(required=False)
+    barcode = serializers.CharField(required=False, max_length=100)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    stock_delta = serializers.IntegerField(required=False)
+    category = serializers.IntegerField(required=False, allow_null=True)
+    show_on_website = serializers.BooleanField(required=False)
+
+    def validate(self, data):
+        if not data.get('id') and not data.get('barcode'):
+            raise serializers.ValidationError("id or barcode is required")
+        return data
+
+
+class ReorderLevelSerializer(serializers.ModelSerializer):
+    """Reorder numbers of a product; only the lead time and safety days are editable."""
+
+    class Meta:
+        model = ReorderLevel
+        fields = [
+            'product', 'lead_time_days', 'safety_days', 'avg_daily_sales',
+            'safety_stock', 'reorder_point', 'order_up_to', 'computed_at',
+        ]
+        read_only_fields = [
+            'product', 'avg_daily_sales', 'safety_stock', 'reorder_point', 'order_up_to', 'computed_at',
+        ]
+        extra_kwargs = {
+            'lead_time_days': {'min_value': 1, 'max_value': 365},
+            'safety_days': {'min_value': 0, 'max_value': 365},
+        }
+
+
+class ProductUnitSerializer(serializers.ModelSerializer):
+    """A pack a product is sold in; unit_price is the price of one pack."""
+    unit_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = ProductUnit
+        fields = ['id', 'name', 'factor', 'price', 'unit_price', 'barcode']
+        extra_kwargs = {
+            'factor': {'min_value': 1},
+            'price': {'min_value': 0},
+        }
+
+    def validate_barcode(self, value):
+        if not value:
+            return None
+        if Product.objects.filter(barcode=value).exists():
+            raise serializers.ValidationError("This barcode is already used by a product.")
+        return value
+
+
 class InvoiceItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     product_id = serializers.PrimaryKeyRelatedField(
@@ -113,10 +188,21 @@ class InvoiceSerializer(serializers.ModelSerializer):
 class ExpenseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Expense
-        fields = ['id', 'title', 'amount', 'category', 'date', 'note', 'created_at']
+        fields = ['id', 'title', 'amount', 'category', 'category_key', 'date', 'note', 'created_at']
 
 
 class CashbookEntrySerializer(serializers.ModelSerializer):
     class Meta:
         model = CashbookEntry
-        fields = ['id', 'entry_type', 'amount', 'note', 'is_online', 'created_at', 'date']
\ No newline at end of file
+        fields = ['id', 'entry_type', 'amount', 'note', 'is_online', 'source_type', 'source_id', 'created_at', 'date']
+        read_only_fields = ['source_type', 'source_id']
+
+
+class CashbookDaySerializer(serializers.ModelSerializer):
+    closing_cash = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    closing_online = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = CashbookDay
+        fields = ['date', 'opening_cash', 'cash_in', 'cash_out', 'closing_cash',
+                  'opening_online', 'online_in', 'online_out', 'closing_online']
\ No newline at end of file
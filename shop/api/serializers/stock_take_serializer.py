@@ -0,0 +1,21 @@
+from rest_framework import serializers
+from shop.models import Category, StockTake
+
+
+class StockTakeSerializer(serializers.ModelSerializer):
+    category = serializers.PrimaryKeyRelatedField(
+        queryset=Category.objects.all(), allow_null=True, required=False
+    )
+    posted_by = serializers.StringRelatedField()
+
+    class Meta:
+        model = StockTake
+        fields = ['id', 'name', 'category', 'status', 'note', 'created_at',
+                  'posted_at', 'posted_by', 'adjusted_products', 'net_delta']
+        read_only_fields = ['status', 'created_at', 'posted_at', 'adjusted_products', 'net_delta']
+
+    def validate_category(self, category):
+        request = self.context.get('request')
+        if category and request and category.shop.owner_id != request.user.id:
+            raise serializers.ValidationError("Category not found.")
+        return category
@@ -8,6 +8,7 @@ from shop.api.views.sale_bill_views import SaleBillViewSet
 # ==== Import Purchase-related Views ====
 from shop.api.views.purchase_views import PurchaseViewSet
 from shop.api.views.return_views import PurchaseReturnViewSet, SaleReturnViewSet
+from shop.api.views.supplier_views import SupplierViewSet
 
 # Create Default Router
 router = DefaultRouter()
@@ -19,6 +20,7 @@ router.register(r'sales/bills', SaleBillViewSet, basename='sale-bill')
 
 # ===================== PURCHASE ROUTES =====================
 router.register(r'purchases', PurchaseViewSet, basename='purchase')
+router.register(r'suppliers', SupplierViewSet, basename='supplier')
 
 # ===================== RETURN ROUTES =====================
 router.register(r'purchases/returns', PurchaseReturnViewSet, basename='purchase-return')
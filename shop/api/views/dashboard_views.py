@@ -10,7 +10,7 @@ from rest_framework import status, serializers
 # Models
 from core.core_models import Shop
 from shop.models.sale import Sale
-from shop.models.models import Product
+from shop.models import StockAlert
 from shop.models import purchase_models, expense_models
 
 
@@ -118,12 +118,12 @@ class DashboardSummaryView(APIView):
                 if Purchase else [0.0] * 30
             )
 
-            # Notifications (Low Stock)
-            low_stock_products = Product.objects.filter(
-                shop=shop, stock_quantity__lte=10
-            ).values('name', 'stock_quantity')[:10]
+            # Notifications (Low Stock): active alerts kept by the inventory write path
+            low_stock_products = StockAlert.objects.filter(
+                shop=shop, resolved_at__isnull=True
+            ).order_by('-created_at').values('product__name', 'product__stock_quantity')[:10]
             notifications = [
-                f"Low stock: {p['name']} ({p['stock_quantity']} left)"
+                f"Low stock: {p['product__name']} ({p['product__stock_quantity']} left)"
                 for p in low_stock_products
             ]
 
@@ -0,0 +1,75 @@
+import logging
+from datetime import datetime
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.utils import timezone
+
+from core.core_models import Shop
+from core.pagination import StandardResultsPagination
+from shop.models import DayClose
+from shop.api.serializers.day_close_serializer import DayCloseSerializer
+from shop.day_close import close_day, month_summary
+
+logger = logging.getLogger(__name__)
+
+
+# ===================== DAY CLOSE (Z-REPORT) VIEWSET =====================
+class DayCloseViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    GET  /api/day-closes/                 closed days, newest first
+    POST /api/day-closes/close/           {"date": "YYYY-MM-DD", "note": ""} (default today)
+    GET  /api/day-closes/month/?month=YYYY-MM
+    """
+    serializer_class = DayCloseSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = StandardResultsPagination
+
+    def get_queryset(self):
+        shop = Shop.objects.filter(owner=self.request.user).first()
+        if not shop:
+            return DayClose.objects.none()
+        return (
+            DayClose.objects.filter(shop=shop)
+            .select_related('closed_by')
+            .prefetch_related('corrections')
+            .order_by('-date')
+        )
+
+    @action(detail=False, methods=['post'])
+    def close(self, request):
+        shop = Shop.objects.filter(owner=request.user).first()
+        if not shop:
+            return Response({"error": "Shop not found"}, status=404)
+
+        today = timezone.localdate()
+        day = today
+        if request.data.get('date'):
+            try:
+                day = datetime.strptime(request.data['date'], '%Y-%m-%d').date()
+            except (TypeError, ValueError):
+                return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
+        if day > today:
+            return Response({"error": "Cannot close a future day."}, status=400)
+
+        day_close, created = close_day(shop, day, user=request.user, note=request.data.get('note', ''))
+        if created:
+            logger.info(f"Day {day} closed for shop {shop.id} by {request.user}")
+        return Response(
+            DayCloseSerializer(day_close).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=['get'])
+    def month(self, request):
+        shop = Shop.objects.filter(owner=request.user).first()
+        if not shop:
+            return Response({"error": "Shop not found"}, status=404)
+
+        value = request.query_params.get('month') or timezone.localdate().strftime('%Y-%m')
+        try:
+            month = datetime.strptime(value, '%Y-%m')
+        except ValueError:
+            return Response({"error": "Invalid month format. Use YYYY-MM."}, status=400)
+        return Response(month_summary(shop, month.year, month.month))
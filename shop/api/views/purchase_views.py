@@ -1,38 +1,33 @@
 import logging
 import random
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from django.db import transaction
+from django.db.models import Count, Prefetch
 from django.utils import timezone
-from rest_framework import viewsets, status, serializers
+from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 
-from shop.models.purchase_models import Purchase
+from shop.models.purchase_models import Purchase, Supplier
 from shop.models import Product, Invoice, InvoiceItem
 from core.core_models import Shop
-from customers.models import Customer
-from shop.api.serializers.purchase_serializer import PurchaseSerializer
+from core.pagination import OptionalPageNumberPagination
+from shop.api.serializers.purchase_serializer import (
+    PurchaseItemSerializer,
+    PurchaseListSerializer,
+    PurchaseSerializer,
+    PurchaseSlimSerializer,
+)
+from shop.cashbook import ONLINE_PAYMENT_TYPES, post_entries, purchase_entry
+from shop.inventory import apply_movements, movement
+from shop.lots import create_lots
+from shop.payables import paid_up_front, record_purchase
 
 logger = logging.getLogger(__name__)
 
 
-# ============================================================
-# INVOICE ITEM SERIALIZER
-# ============================================================
-class InvoiceItemSerializer(serializers.ModelSerializer):
-    product_name = serializers.CharField(source="product.name", read_only=True)
-    product_id = serializers.IntegerField(source="product.id", read_only=True)
-
-    class Meta:
-        model = InvoiceItem
-        fields = [
-            "id",
-            "product_id",
-            "product_name",
-            "quantity",
-            "unit_price",
-        ]
-
-
 # ============================================================
 # PURCHASE VIEWSET
 # ============================================================
@@ -42,11 +37,33 @@ class PurchaseViewSet(viewsets.ModelViewSet):
     ✅ Invoice creation
     ✅ Stock increase
     ✅ Invoice always linked BEFORE items
+
+    List options:
+      ?include=items  bill lines inline (prefetched: one query per page)
+      ?view=slim      only the fields the purchase history screen shows
+      ?page=N         paginate (the full list is returned without it)
     """
 
     serializer_class = PurchaseSerializer
+    pagination_class = OptionalPageNumberPagination
     queryset = Purchase.objects.none()
 
+    def _include_items(self):
+        return "items" in self.request.query_params.get("include", "").split(",")
+
+    def _slim(self):
+        return self.request.query_params.get("view") == "slim"
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return PurchaseSlimSerializer if self._slim() else PurchaseListSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["include_items"] = self.action == "list" and self._include_items()
+        return context
+
     # --------------------------------------------------------
     # GET PURCHASE LIST
     # --------------------------------------------------------
@@ -55,7 +72,18 @@ class PurchaseViewSet(viewsets.ModelViewSet):
         if not shop:
             return Purchase.objects.none()
 
-        return Purchase.objects.filter(shop=shop).order_by("-created_at")
+        purchases = Purchase.objects.filter(shop=shop).select_related("supplier").order_by("-created_at")
+        if self.action != "list":
+            return purchases
+
+        if self._include_items():
+            # Invoice joined in, its lines (with products) in one more query
+            purchases = purchases.select_related("invoice").prefetch_related(
+                Prefetch("invoice__items", queryset=InvoiceItem.objects.select_related("product").order_by("id"))
+            )
+        elif self._slim():
+            purchases = purchases.annotate(item_count=Count("invoice__items"))
+        return purchases
 
     # --------------------------------------------------------
     # CREATE PURCHASE (FIXED)
@@ -73,22 +101,31 @@ class PurchaseViewSet(viewsets.ModelViewSet):
             items = data.get("items", [])
             note = data.get("note", "")
             payment_type = data.get("payment_type", "CASH").upper()
-            paid_amount = float(data.get("paid_amount", 0))
+            try:
+                paid_amount = Decimal(str(data.get("paid_amount") or 0))
+            except InvalidOperation:
+                return Response({"error": "Invalid paid_amount"}, status=400)
 
             if not items:
                 return Response({"error": "Items list is required"}, status=400)
 
             supplier = None
             if supplier_id:
-                supplier = Customer.objects.filter(id=supplier_id, shop=shop).first()
+                supplier = Supplier.objects.filter(id=supplier_id, shop=shop).first()
                 if not supplier:
                     return Response({"error": "Invalid supplier"}, status=400)
 
             # ------------------------------------------------
-            # VALIDATE ITEMS
+            # VALIDATE ITEMS (all products in one query)
             # ------------------------------------------------
+            products = Product.objects.filter(
+                shop=shop,
+                id__in=[item.get("product_id") for item in items if str(item.get("product_id", "")).isdigit()],
+            ).in_bulk()
+
             validated_items = []
-            total_amount = 0
+            total_amount = Decimal("0")
+            stock_increments = defaultdict(int)
 
             for idx, item in enumerate(items, start=1):
                 product_id = item.get("product_id")
@@ -101,15 +138,21 @@ class PurchaseViewSet(viewsets.ModelViewSet):
                         status=400
                     )
 
-                product = Product.objects.filter(id=product_id, shop=shop).first()
+                try:
+                    product = products.get(int(product_id))
+                except (TypeError, ValueError):
+                    product = None
                 if not product:
                     return Response(
                         {"error": f"Product {product_id} not found"},
                         status=404
                     )
 
-                qty = int(quantity)
-                price = float(unit_price)
+                try:
+                    qty = int(quantity)
+                    price = Decimal(str(unit_price)).quantize(Decimal("0.01"))
+                except (TypeError, ValueError, InvalidOperation):
+                    qty, price = 0, Decimal("-1")
 
                 if qty <= 0 or price < 0:
                     return Response(
@@ -117,13 +160,26 @@ class PurchaseViewSet(viewsets.ModelViewSet):
                         status=400
                     )
 
-                subtotal = qty * price
-                total_amount += subtotal
+                # Optional batch details: the line becomes a StockLot
+                expiry_date = item.get("expiry_date")
+                if expiry_date:
+                    try:
+                        expiry_date = datetime.strptime(str(expiry_date), '%Y-%m-%d').date()
+                    except ValueError:
+                        return Response(
+                            {"error": f"Invalid expiry_date in item #{idx}. Use YYYY-MM-DD."},
+                            status=400
+                        )
+
+                total_amount += qty * price
+                stock_increments[product.id] += qty
 
                 validated_items.append({
                     "product": product,
                     "quantity": qty,
-                    "unit_price": price
+                    "unit_price": price,
+                    "expiry_date": expiry_date or None,
+                    "lot_number": str(item.get("lot_number") or "").strip()[:60],
                 })
 
             # ------------------------------------------------
@@ -135,7 +191,7 @@ class PurchaseViewSet(viewsets.ModelViewSet):
                 shop=shop,
                 invoice_number=invoice_number,
                 total_amount=total_amount,
-                is_online=payment_type in ["UPI", "ONLINE", "CARD", "NETBANKING"],
+                is_online=payment_type in ONLINE_PAYMENT_TYPES,
                 customer_name=getattr(supplier, "name", "Unknown Supplier"),
                 customer_phone=getattr(supplier, "phone_number", None),
                 note=f"Purchase | {note}".strip(),
@@ -145,7 +201,7 @@ class PurchaseViewSet(viewsets.ModelViewSet):
             # ------------------------------------------------
             # CREATE PURCHASE WITH INVOICE LINKED
             # ------------------------------------------------
-            purchase = Purchase.objects.create(
+            purchase = Purchase(
                 shop=shop,
                 supplier=supplier,
                 invoice=invoice,          # 🔥 NEVER NULL
@@ -156,20 +212,31 @@ class PurchaseViewSet(viewsets.ModelViewSet):
                 note=note,
                 received=True,
             )
+            purchase.paid_amount = purchase.paid_up_front = paid_up_front(purchase)
+            purchase.save()
 
             # ------------------------------------------------
-            # CREATE ITEMS + UPDATE STOCK
+            # CREATE ITEMS (one INSERT) + STOCK MOVEMENTS (one INSERT, one UPDATE)
             # ------------------------------------------------
-            for item in validated_items:
-                InvoiceItem.objects.create(
+            InvoiceItem.objects.bulk_create([
+                InvoiceItem(
                     invoice=invoice,
                     product=item["product"],
                     quantity=item["quantity"],
                     unit_price=item["unit_price"]
                 )
+                for item in validated_items
+            ], batch_size=500)
+
+            apply_movements([
+                movement(products[product_id], qty, "PURCHASE", purchase.id)
+                for product_id, qty in stock_increments.items()
+            ])
+            create_lots(purchase, validated_items)
 
-                item["product"].stock_quantity += item["quantity"]
-                item["product"].save(update_fields=["stock_quantity"])
+            post_entries([purchase_entry(purchase)])
+            # Unpaid part onto the supplier's payable (after the cashbook: advances settle it)
+            record_purchase(purchase)
 
             logger.info(f"Purchase {purchase.id} created successfully")
 
@@ -181,6 +248,8 @@ class PurchaseViewSet(viewsets.ModelViewSet):
                     "total_amount": float(total_amount),
                     "item_count": len(validated_items),
                     "payment_type": payment_type,
+                    "paid_amount": float(purchase.paid_amount),
+                    "balance_due": float(purchase.balance_due),
                 },
                 "message": "Purchase created successfully"
             }, status=201)
@@ -197,7 +266,7 @@ class PurchaseViewSet(viewsets.ModelViewSet):
         try:
             purchase = self.get_object()
 
-            if not purchase.invoice:
+            if not purchase.invoice_id:
                 return Response({
                     "items": [],
                     "purchase_id": purchase.id,
@@ -205,16 +274,17 @@ class PurchaseViewSet(viewsets.ModelViewSet):
                 }, status=200)
 
             invoice_items = InvoiceItem.objects.filter(
-                invoice=purchase.invoice
-            ).select_related("product")
+                invoice_id=purchase.invoice_id
+            ).select_related("product").order_by("id")
 
-            serializer = InvoiceItemSerializer(invoice_items, many=True)
+            # Evaluated once; the count comes from the loaded rows
+            items = PurchaseItemSerializer(invoice_items, many=True).data
 
             return Response({
-                "items": serializer.data,
+                "items": items,
                 "purchase_id": purchase.id,
                 "invoice_number": purchase.invoice_number,
-                "total_items": invoice_items.count(),
+                "total_items": len(items),
                 "message": "Items fetched successfully"
             })
 
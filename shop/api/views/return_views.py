@@ -1,5 +1,8 @@
-import logging, random
+import logging
+from collections import defaultdict
 from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Sum
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.response import Response
@@ -12,13 +15,41 @@ from shop.api.serializers.purchase_serializer import (
     SaleReturnSerializer, PurchaseReturnListSerializer,
 )
 from core.core_models import Shop
+from customers.ledger import post_transaction
+from shop.models.sale import Sale
+from shop.cashbook import post_entries, purchase_return_entry, sale_return_entry
+from shop.inventory import apply_movements, movement
+from shop.numbering import next_document_number
+from shop.payables import credit_purchase_return
 
 logger = logging.getLogger(__name__)
 
 
-# ============================================================
-# ✅ PURCHASE RETURN VIEWSET
-# ============================================================
+def parse_return_lines(data, key):
+    """
+    Return lines from {"items": [{key, "quantity", "reason"?}, ...]} or the
+    single-line form {key, "quantity"}. Quantities of a repeated key are
+    summed. Returns (lines, error): lines is {id: {"quantity", "reason"}}.
+    """
+    items = data.get("items")
+    if items is None:
+        items = [{key: data.get(key), "quantity": data.get("quantity")}]
+    if not isinstance(items, list) or not items:
+        return None, "items list is required"
+
+    lines = {}
+    for idx, item in enumerate(items, start=1):
+        try:
+            ref = int(item.get(key))
+            quantity = int(item.get("quantity"))
+        except (AttributeError, TypeError, ValueError):
+            return None, f"Item #{idx}: {key} and quantity are required"
+        if quantity <= 0:
+            return None, f"Item #{idx}: quantity must be greater than zero"
+        line = lines.setdefault(ref, {"quantity": 0, "reason": item.get("reason")})
+        line["quantity"] += quantity
+    return lines, None
+
 
 class PurchaseReturnViewSet(viewsets.ModelViewSet):
     """
@@ -48,7 +79,8 @@ class PurchaseReturnViewSet(viewsets.ModelViewSet):
                 'purchase',
                 'purchase__invoice',
                 'purchase__supplier',
-                'product'
+                'product',
+                'invoice',
             ).order_by("-created_at")
 
         except Exception as e:
@@ -56,119 +88,142 @@ class PurchaseReturnViewSet(viewsets.ModelViewSet):
             return PurchaseReturn.objects.none()
 
     def create(self, request, *args, **kwargs):
+        """
+        Return one or more purchased products to the supplier.
+        Body: {"purchase_id", "reason"?, "items": [{"product_id", "quantity", "reason"?}]}
+        (or the single-line form {"purchase_id", "product_id", "quantity"})
+        The value returned first comes off what is still owed on the bill;
+        only the rest is refunded through the cashbook.
+        """
         try:
             shop = Shop.objects.filter(owner=request.user).first()
             if not shop:
                 return Response({"error": "Shop not found"}, status=404)
 
             data = request.data
-
             purchase_id = data.get("purchase_id")
-            product_id = data.get("product_id")
-            quantity = data.get("quantity")
             reason = data.get("reason", "")
-
-            # ===================== VALIDATION =====================
-
-            if not all([purchase_id, product_id, quantity]):
-                return Response(
-                    {"error": "purchase_id, product_id and quantity are required"},
-                    status=400
+            if not purchase_id:
+                return Response({"error": "purchase_id is required"}, status=400)
+            lines, error = parse_return_lines(data, "product_id")
+            if error:
+                return Response({"error": error}, status=400)
+
+            with transaction.atomic():
+                # Locking the purchase serializes concurrent returns against it
+                purchase = Purchase.objects.select_for_update(of=('self',)).filter(
+                    id=purchase_id,
+                    shop=shop
+                ).select_related('invoice', 'supplier').first()
+
+                if not purchase:
+                    return Response({"error": "Purchase not found"}, status=404)
+
+                # ===================== VALIDATE AGAINST THE PURCHASE BILL =====================
+
+                bought = {
+                    row["product_id"]: row
+                    for row in InvoiceItem.objects.filter(
+                        invoice_id=purchase.invoice_id, product_id__in=lines
+                    ).values("product_id").annotate(
+                        bought_quantity=Sum("quantity"),
+                        amount=Sum(F("quantity") * F("unit_price")),
+                    ).order_by()
+                } if purchase.invoice_id else {}
+                returned = dict(
+                    PurchaseReturn.objects.filter(purchase=purchase, product_id__in=lines)
+                    .values("product_id").annotate(total=Sum("quantity"))
+                    .values_list("product_id", "total").order_by()
                 )
-
-            try:
-                quantity = int(quantity)
-                if quantity <= 0:
-                    return Response({"error": "Quantity must be greater than zero"}, status=400)
-            except ValueError:
-                return Response({"error": "Invalid quantity"}, status=400)
-
-            # ===================== PURCHASE =====================
-
-            purchase = Purchase.objects.filter(
-                id=purchase_id,
-                shop=shop
-            ).select_related('invoice', 'supplier').first()
-
-            if not purchase:
-                return Response({"error": "Purchase not found"}, status=404)
-
-            # ===================== CHECK PURCHASE ITEM =====================
-
-            invoice_item = InvoiceItem.objects.filter(
-                invoice=purchase.invoice,
-                product_id=product_id
-            ).select_related("product").first()
-
-            if not invoice_item:
-                return Response(
-                    {"error": "This product was not part of this purchase"},
-                    status=400
-                )
-
-            product = invoice_item.product
-
-            # ===================== STOCK VALIDATION =====================
-
-            if product.stock_quantity < quantity:
-                return Response(
-                    {
-                        "error": f"Cannot return {quantity}. Only {product.stock_quantity} items in stock."
-                    },
-                    status=400
+                products = Product.objects.filter(shop=shop, id__in=lines).in_bulk()
+
+                for product_id, line in lines.items():
+                    row = bought.get(product_id)
+                    product = products.get(product_id)
+                    if not row or not product:
+                        return Response(
+                            {"error": f"Product {product_id} was not part of this purchase"},
+                            status=400
+                        )
+                    returnable = row["bought_quantity"] - returned.get(product_id, 0)
+                    if line["quantity"] > returnable:
+                        return Response(
+                            {"error": f"Cannot return {line['quantity']} of {product.name}. "
+                                      f"Only {returnable} left to return on this purchase."},
+                            status=400
+                        )
+                    if product.stock_quantity < line["quantity"]:
+                        return Response(
+                            {"error": f"Cannot return {line['quantity']} of {product.name}. "
+                                      f"Only {product.stock_quantity} items in stock."},
+                            status=400
+                        )
+                    # Average bill price when the product was on several lines
+                    line["unit_price"] = (Decimal(row["amount"]) / row["bought_quantity"]).quantize(Decimal("0.01"))
+
+                # ===================== ONE RETURN INVOICE + BULK WRITES =====================
+
+                total_amount = sum(line["unit_price"] * line["quantity"] for line in lines.values())
+                invoice = Invoice.objects.create(
+                    shop=shop,
+                    invoice_number=next_document_number(shop.id, "PUR-RET"),
+                    total_amount=total_amount,
+                    is_online=False,
+                    customer_name=getattr(purchase.supplier, "name", "Unknown Supplier"),
+                    customer_phone=getattr(purchase.supplier, "phone_number", None),
+                    note=f"Purchase Return | {reason or 'No reason specified'}",
+                    created_at=timezone.now()
                 )
-
-            # ===================== UPDATE STOCK =====================
-
-            product.stock_quantity -= quantity
-            product.save(update_fields=['stock_quantity'])
-
-            # ===================== CREATE RETURN RECORD =====================
-
-            return_record = PurchaseReturn.objects.create(
-                purchase=purchase,
-                product=product,
-                quantity=quantity,
-                reason=reason
-            )
-
-            # ===================== CREATE RETURN INVOICE =====================
-
-            invoice_number = f"PUR-RET-{random.randint(100000, 999999)}"
-            total_amount = Decimal(str(invoice_item.unit_price)) * Decimal(quantity)
-
-            invoice = Invoice.objects.create(
-                shop=shop,
-                invoice_number=invoice_number,
-                total_amount=total_amount,
-                is_online=False,
-                customer_name=getattr(purchase.supplier, "name", "Unknown Supplier"),
-                customer_phone=getattr(purchase.supplier, "phone_number", None),
-                note=f"Purchase Return | {reason or 'No reason specified'}",
-                created_at=timezone.now()
-            )
-
-            InvoiceItem.objects.create(
-                invoice=invoice,
-                product=product,
-                quantity=quantity,
-                unit_price=invoice_item.unit_price
-            )
-
-            # ===================== RESPONSE (for create) =====================
+                InvoiceItem.objects.bulk_create([
+                    InvoiceItem(invoice=invoice, product=products[product_id],
+                                quantity=line["quantity"], unit_price=line["unit_price"])
+                    for product_id, line in lines.items()
+                ])
+                # What is still owed on the bill is reduced first; the rest is refunded
+                credit = credit_purchase_return(purchase, total_amount)
+                for line in lines.values():
+                    line["credited"] = min(line["unit_price"] * line["quantity"], credit)
+                    credit -= line["credited"]
+                returns = PurchaseReturn.objects.bulk_create([
+                    PurchaseReturn(
+                        purchase=purchase,
+                        product=products[product_id],
+                        quantity=line["quantity"],
+                        unit_price=line["unit_price"],
+                        credited_amount=line["credited"],
+                        reason=line["reason"] or reason,
+                        invoice=invoice,
+                    )
+                    for product_id, line in lines.items()
+                ])
+                apply_movements([
+                    movement(r.product, -r.quantity, 'PURCHASE_RETURN', r.id) for r in returns
+                ])
+                post_entries([
+                    purchase_return_entry(r, purchase, r.unit_price * r.quantity - r.credited_amount)
+                    for r in returns
+                ])
 
             return Response(
                 {
                     "status": "success",
                     "message": "Purchase return created successfully",
                     "return": {
-                        "id": return_record.id,
                         "purchase_id": purchase.id,
-                        "product": product.name,
-                        "quantity": quantity,
-                        "total_amount": float(total_amount),
                         "invoice_number": invoice.invoice_number,
-                        "created_at": timezone.localtime(return_record.created_at).isoformat(),
+                        "total_amount": float(total_amount),
+                        "balance_due": float(purchase.balance_due),
+                        "items": [
+                            {
+                                "id": r.id,
+                                "product_id": r.product_id,
+                                "product": r.product.name,
+                                "quantity": r.quantity,
+                                "unit_price": float(r.unit_price),
+                            }
+                            for r in returns
+                        ],
+                        "created_at": timezone.localtime(invoice.created_at).isoformat(),
                     }
                 },
                 status=201
@@ -196,16 +251,18 @@ class SaleReturnViewSet(viewsets.ModelViewSet):
                 return SaleReturn.objects.none()
             return SaleReturn.objects.filter(
                 sale__shop=shop
-            ).order_by('-created_at')
+            ).select_related('product', 'invoice').order_by('-created_at')
         except Exception as e:
             logger.error(f"Error fetching sale returns: {str(e)}", exc_info=True)
             return SaleReturn.objects.none()
 
     def create(self, request, *args, **kwargs):
         """
-        ✅ Create Sale Return
-        ✅ Increase product stock
-        ✅ Create return invoice
+        Return one or more sold items.
+        Body: {"reason"?, "items": [{"sale", "quantity", "product_id"?, "reason"?}]}
+        (or the single-line form {"sale", "product_id", "quantity"})
+        Cash/online sales are refunded from the cashbook; credit sales are
+        credited back to the customer's khata.
         """
         try:
             shop = Shop.objects.filter(owner=request.user).first()
@@ -213,67 +270,103 @@ class SaleReturnViewSet(viewsets.ModelViewSet):
                 return Response({"error": "Shop not found"}, status=404)
 
             data = request.data
-            sale_id = data.get("sale")
-            product_id = data.get("product_id")
-            quantity = data.get("quantity")
             reason = data.get("reason", "")
+            lines, error = parse_return_lines(data, "sale")
+            if error:
+                return Response({"error": error}, status=400)
+            items = data.get("items") or [data]
+            expected_products = {
+                int(item["sale"]): int(item["product_id"])
+                for item in items
+                if str(item.get("product_id", "")).isdigit() and str(item.get("sale", "")).isdigit()
+            }
+
+            with transaction.atomic():
+                sales = Sale.objects.select_for_update(of=('self',)).filter(
+                    shop=shop, id__in=lines
+                ).select_related('product', 'customer').in_bulk()
+                returned = dict(
+                    SaleReturn.objects.filter(sale_id__in=lines)
+                    .values("sale_id").annotate(total=Sum("quantity"))
+                    .values_list("sale_id", "total").order_by()
+                )
 
-            # ✅ Validation
-            if not all([sale_id, product_id, quantity]):
-                return Response({"error": "Missing required fields"}, status=400)
-
-            try:
-                quantity = int(quantity)
-                if quantity <= 0:
-                    return Response({"error": "Quantity must be positive"}, status=400)
-            except ValueError:
-                return Response({"error": "Invalid quantity"}, status=400)
-
-            product = Product.objects.filter(id=product_id, shop=shop).first()
-            if not product:
-                return Response({"error": "Product not found"}, status=404)
-
-            # ✅ Increase stock
-            product.stock_quantity += quantity
-            product.save()
-
-            # ✅ Create return record
-            sale_return = SaleReturn.objects.create(
-                sale_id=sale_id,
-                product=product,
-                quantity=quantity,
-                reason=reason
-            )
-
-            # ✅ Create Return Invoice
-            invoice_number = f"SALE-RET-{random.randint(10000, 99999)}"
-            total_amount = float(product.price) * quantity
-
-            invoice = Invoice.objects.create(
-                shop=shop,
-                invoice_number=invoice_number,
-                total_amount=total_amount,
-                is_online=False,
-                customer_name="Walk-in Customer",
-                note=f"Sale Return | {reason or 'No reason specified'}",
-                created_at=timezone.now()
-            )
-
-            InvoiceItem.objects.create(
-                invoice=invoice,
-                product=product,
-                quantity=quantity,
-                unit_price=product.price
-            )
+                for sale_id, line in lines.items():
+                    sale = sales.get(sale_id)
+                    if not sale:
+                        return Response({"error": f"Sale {sale_id} not found"}, status=404)
+                    if expected_products.get(sale_id, sale.product_id) != sale.product_id:
+                        return Response(
+                            {"error": f"Product {expected_products[sale_id]} is not part of sale {sale_id}"},
+                            status=400
+                        )
+                    returnable = sale.quantity - returned.get(sale_id, 0)
+                    if line["quantity"] > returnable:
+                        return Response(
+                            {"error": f"Cannot return {line['quantity']} of {sale.product.name}. "
+                                      f"Only {returnable} left to return on sale {sale_id}."},
+                            status=400
+                        )
+
+                total_amount = sum(sales[sale_id].unit_price * line["quantity"] for sale_id, line in lines.items())
+                invoice = Invoice.objects.create(
+                    shop=shop,
+                    invoice_number=next_document_number(shop.id, "SALE-RET"),
+                    total_amount=total_amount,
+                    is_online=False,
+                    customer_name=next(
+                        (sale.customer.name for sale in sales.values() if sale.customer), "Walk-in Customer"
+                    ),
+                    note=f"Sale Return | {reason or 'No reason specified'}",
+                    created_at=timezone.now()
+                )
+                InvoiceItem.objects.bulk_create([
+                    InvoiceItem(invoice=invoice, product=sales[sale_id].product,
+                                quantity=line["quantity"], unit_price=sales[sale_id].unit_price)
+                    for sale_id, line in lines.items()
+                ])
+                returns = SaleReturn.objects.bulk_create([
+                    SaleReturn(
+                        sale=sales[sale_id],
+                        product=sales[sale_id].product,
+                        quantity=line["quantity"],
+                        unit_price=sales[sale_id].unit_price,
+                        reason=line["reason"] or reason,
+                        invoice=invoice,
+                    )
+                    for sale_id, line in lines.items()
+                ])
+                apply_movements([movement(r.product, r.quantity, 'SALE_RETURN', r.id) for r in returns])
+
+                # Refunds: cash/online out of the cashbook (credit sales post nothing
+                # there), credit sales back onto the khata, one posting per customer
+                post_entries([sale_return_entry(r, r.sale, r.unit_price * r.quantity) for r in returns])
+                credits = defaultdict(Decimal)
+                for r in returns:
+                    if r.sale.is_credit and r.sale.customer:
+                        credits[r.sale.customer] += r.unit_price * r.quantity
+                for customer, amount in credits.items():
+                    post_transaction(
+                        customer, amount, is_credit=False,
+                        description=f"Sale return {invoice.invoice_number}"
+                    )
 
             return Response({
                 "status": "success",
                 "return": {
-                    "id": sale_return.id,
                     "invoice_number": invoice.invoice_number,
-                    "product": product.name,
-                    "quantity": quantity,
-                    "total_amount": total_amount
+                    "total_amount": float(total_amount),
+                    "items": [
+                        {
+                            "id": r.id,
+                            "sale_id": r.sale_id,
+                            "product_id": r.product_id,
+                            "product": r.product.name,
+                            "quantity": r.quantity,
+                            "unit_price": float(r.unit_price),
+                        }
+                        for r in returns
+                    ],
                 },
                 "message": "Sale return created successfully and stock updated."
             }, status=201)
@@ -9,6 +9,8 @@ from django.utils import timezone
 from shop.models.sale_bill import SaleBill
 from shop.models.sale import Sale
 from shop.api.serializers.sale_bill_serializer import SaleBillSerializer
+from shop.cashbook import post_entries, sale_entry
+from shop.inventory import apply_movements, movement
 
 
 class SaleBillViewSet(viewsets.ModelViewSet):
@@ -93,15 +95,16 @@ class SaleBillViewSet(viewsets.ModelViewSet):
         sale_bill = serializer.save()
 
         # ----------------------------
-        # Create Sale entries (NO stock double deduction)
+        # Create Sale entries; stock moves once, through the ledger
         # ----------------------------
+        sales = []
         for item in sale_bill.items.all():
             product = item.product
 
             if product.stock_quantity < item.quantity:
                 raise Exception(f"Insufficient stock for {product.name}")
 
-            Sale.objects.create(
+            sales.append(Sale.objects.create(
                 shop=shop,
                 product=product,
                 quantity=item.quantity,
@@ -111,7 +114,11 @@ class SaleBillViewSet(viewsets.ModelViewSet):
                 is_credit=is_credit,
                 customer=sale_bill.customer,
                 sale_date=sale_bill.bill_date or timezone.now(),
-            )
+            ))
+
+        apply_movements([movement(sale.product, -sale.quantity, 'SALE', sale.id) for sale in sales])
+        # One cashbook insert for the whole bill (credit bills post nothing)
+        post_entries([sale_entry(sale) for sale in sales])
 
         response_data = serializer.data
         response_data['message'] = 'Sale bill created successfully'
@@ -13,9 +13,12 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from shop.models.sale import Sale, PendingSale
-from shop.models import Product, Invoice, InvoiceItem
+from shop.models import Product, ProductUnit, Invoice, InvoiceItem
 from core.core_models import Shop
 from shop.api.serializers.sale_serializer import SaleSerializer, PendingSaleSerializer
+from shop.cashbook import post_entries, sale_entry
+from shop.catalog import billing_line, get_unit
+from shop.inventory import apply_movements, movement
 
 logger = logging.getLogger(__name__)
 
@@ -76,12 +79,11 @@ class SaleViewSet(viewsets.ModelViewSet):
             if product.stock_quantity < sale.quantity:
                 raise ValueError(f"Not enough stock for {product.name}")
 
-            product.stock_quantity -= sale.quantity
-            product.save()
-
             # Set sale date
             sale.sale_date = timezone.now()
             sale.save()
+            apply_movements([movement(product, -sale.quantity, 'SALE', sale.id)])
+            post_entries([sale_entry(sale)])
 
             # Generate Invoice
             invoice_number = f"INV-{random.randint(10000, 99999)}"
@@ -134,26 +136,32 @@ class SaleViewSet(viewsets.ModelViewSet):
             product = Product.objects.filter(id=product_id).first()
             if not product:
                 return Response({"error": "Product not found"}, status=404)
-            if product.stock_quantity < quantity:
+            try:
+                # Optional pack (box = 12 pcs): quantity is in that unit
+                line = billing_line(product, quantity, get_unit(product, request.data.get('unit_id')))
+            except ProductUnit.DoesNotExist:
+                return Response({"error": "Unit not found for this product"}, status=404)
+            if product.stock_quantity < line.base_quantity:
                 return Response({"error": "Not enough stock"}, status=400)
 
             shop = product.shop
-            total_amount = float(product.price) * quantity
+            total_amount = float(line.total)
 
             # Create Sale
-            sale = Sale.objects.create(
+            sale = Sale(
                 shop=shop,
                 product=product,
-                quantity=quantity,
-                unit_price=product.price,
-                total_amount=total_amount,
+                quantity=line.base_quantity,
+                unit_price=line.base_price,
+                total_amount=line.total,
                 is_online=False,
                 is_credit=False,
             )
+            sale.save(exact_total=True)
+            post_entries([sale_entry(sale)])
 
             # SINGLE PLACE: Stock deduction
-            product.stock_quantity -= quantity
-            product.save()
+            apply_movements([movement(product, -line.base_quantity, 'SALE', sale.id)])
 
             # Generate Invoice
             invoice_number = f"INV-{random.randint(10000, 99999)}"
@@ -170,8 +178,8 @@ class SaleViewSet(viewsets.ModelViewSet):
             InvoiceItem.objects.create(
                 invoice=invoice,
                 product=product,
-                quantity=quantity,
-                unit_price=product.price
+                quantity=line.base_quantity,
+                unit_price=line.base_price
             )
 
             return Response({
@@ -215,7 +223,11 @@ class SaleViewSet(viewsets.ModelViewSet):
 
                 if not product:
                     return Response({"error": f"Product {product_id} not found"}, status=404)
-                if product.stock_quantity < quantity:
+                try:
+                    line = billing_line(product, quantity, get_unit(product, item.get('unit_id')))
+                except ProductUnit.DoesNotExist:
+                    return Response({"error": f"Unit not found for {product.name}"}, status=404)
+                if product.stock_quantity < line.base_quantity:
                     return Response({"error": f"Not enough stock for {product.name}"}, status=400)
 
                 if shop is None:
@@ -223,8 +235,8 @@ class SaleViewSet(viewsets.ModelViewSet):
                 elif shop != product.shop:
                     return Response({"error": "All products must belong to the same shop"}, status=400)
 
-                total_amount += float(product.price) * quantity
-                products_to_update.append((product, quantity))
+                total_amount += float(line.total)
+                products_to_update.append(line)
 
             # Create Invoice
             invoice_number = f"INV-{random.randint(10000, 99999)}"
@@ -239,25 +251,30 @@ class SaleViewSet(viewsets.ModelViewSet):
             )
 
             # Second Pass: Create Sales + Update Stock + Invoice Items
-            for product, quantity in products_to_update:
-                Sale.objects.create(
+            sales = []
+            for line in products_to_update:
+                sale = Sale(
                     shop=shop,
-                    product=product,
-                    quantity=quantity,
-                    unit_price=product.price,
-                    total_amount=float(product.price) * quantity,
+                    product=line.product,
+                    quantity=line.base_quantity,
+                    unit_price=line.base_price,
+                    total_amount=line.total,
                     is_online=is_online,
                     is_credit=False,
                 )
+                sale.save(exact_total=True)
+                sales.append(sale)
 
                 InvoiceItem.objects.create(
                     invoice=invoice,
-                    product=product,
-                    quantity=quantity,
-                    unit_price=product.price
+                    product=line.product,
+                    quantity=line.base_quantity,
+                    unit_price=line.base_price
                 )
 
-                # SINGLE PLACE: Stock deduction
+            # SINGLE PLACE: Stock deduction (one ledger insert for the bill)
+            apply_movements([movement(sale.product, -sale.quantity, 'SALE', sale.id) for sale in sales])
+            post_entries([sale_entry(sale) for sale in sales])
 
             return Response({
                 "status": "success",
@@ -0,0 +1,100 @@
+import logging
+
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core.core_models import Shop
+from core.pagination import StandardResultsPagination
+from shop.api.serializers.stock_take_serializer import StockTakeSerializer
+from shop.models import StockTake
+from shop.stock_take import COUNT_BATCH_LIMIT, post_stock_take, record_counts, variance
+
+logger = logging.getLogger(__name__)
+
+
+# ===================== STOCK TAKE VIEWSET =====================
+class StockTakeViewSet(viewsets.ModelViewSet):
+    """
+    Physical count sessions.
+
+    POST /stock-takes/                 {"name", "category"?, "note"?} open a session
+    POST /stock-takes/{id}/counts/     {"device", "mode": "set"|"add", "counts": [{"barcode"|"product_id", "quantity"}]}
+    GET  /stock-takes/{id}/variance/   ?only_differences=true&include_uncounted=true
+    POST /stock-takes/{id}/post/       {"zero_uncounted": false} apply the variance to stock
+    POST /stock-takes/{id}/cancel/
+    """
+    serializer_class = StockTakeSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = StandardResultsPagination
+    http_method_names = ['get', 'post', 'patch', 'head', 'options']
+
+    def get_shop(self):
+        if not hasattr(self, '_shop'):
+            self._shop = Shop.objects.filter(owner=self.request.user).first()
+        return self._shop
+
+    def get_queryset(self):
+        shop = self.get_shop()
+        if not shop:
+            return StockTake.objects.none()
+        takes = StockTake.objects.filter(shop=shop).select_related('posted_by').order_by('-created_at', '-id')
+        status = self.request.query_params.get('status')
+        if status:
+            takes = takes.filter(status=status.upper())
+        return takes
+
+    def perform_create(self, serializer):
+        shop = self.get_shop()
+        if not shop:
+            raise ValueError("No shop found")
+        serializer.save(shop=shop)
+
+    @action(detail=True, methods=['post'])
+    def counts(self, request, pk=None):
+        stock_take = self.get_object()
+        lines = request.data.get('counts')
+        if not isinstance(lines, list) or not lines:
+            return Response({"error": "counts must be a non-empty list"}, status=400)
+        if len(lines) > COUNT_BATCH_LIMIT:
+            return Response({"error": f"At most {COUNT_BATCH_LIMIT} counts per batch"}, status=400)
+        mode = request.data.get('mode', 'set')
+        if mode not in ('set', 'add'):
+            return Response({"error": "mode must be 'set' or 'add'"}, status=400)
+
+        device = str(request.data.get('device') or '')[:50]
+        try:
+            written, errors = record_counts(stock_take, lines, device=device, mode=mode)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response({"written": written, "error_count": len(errors), "errors": errors[:100]})
+
+    @action(detail=True, methods=['get'])
+    def variance(self, request, pk=None):
+        stock_take = self.get_object()
+        return Response(variance(
+            stock_take,
+            include_uncounted=request.query_params.get('include_uncounted') == 'true',
+            only_differences=request.query_params.get('only_differences') == 'true',
+        ))
+
+    @action(detail=True, methods=['post'], url_path='post')
+    def post_counts(self, request, pk=None):
+        stock_take = self.get_object()
+        try:
+            stock_take = post_stock_take(
+                stock_take, user=request.user, zero_uncounted=bool(request.data.get('zero_uncounted')),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(StockTakeSerializer(stock_take).data)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        stock_take = self.get_object()
+        if not StockTake.objects.filter(pk=stock_take.pk, status=StockTake.OPEN).update(status=StockTake.CANCELLED):
+            return Response({"error": "Only an open stock take can be cancelled"}, status=400)
+        stock_take.refresh_from_db()
+        logger.info(f"Stock take {stock_take.id} cancelled by {request.user}")
+        return Response(StockTakeSerializer(stock_take).data)
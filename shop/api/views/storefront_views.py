@@ -0,0 +1,36 @@
+# shop/api/views/storefront_views.py
+import gzip
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_GET
+
+from core.http_cache import etag_matches, not_modified, set_cache_headers
+from shop.storefront import get_catalog
+
+
+# ===================== PUBLIC STOREFRONT CATALOG =====================
+@require_GET
+def storefront_catalog(request, slug):
+    """
+    GET /api/storefront/<slug>/
+    Public catalog of a live shop, served from the precomputed cache entry.
+    Supports If-None-Match (304) and returns gzip as-is when the client accepts it.
+    """
+    entry = get_catalog(slug)
+    if entry.get('missing'):
+        return JsonResponse({"error": "Shop not found or not live"}, status=404)
+
+    max_age = settings.STOREFRONT_CACHE_MAX_AGE
+    if etag_matches(request, entry['etag']):
+        return not_modified(entry['etag'], max_age)
+
+    if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+        response = HttpResponse(entry['gzip'], content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(entry['gzip']), content_type='application/json')
+
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return set_cache_headers(response, entry['etag'], max_age)
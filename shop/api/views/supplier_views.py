@@ -0,0 +1,109 @@
+import logging
+
+from django.db.models import Count
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core.core_models import Shop
+from core.pagination import StandardResultsPagination
+from shop.api.serializers.purchase_serializer import (
+    PurchaseSlimSerializer,
+    SupplierAccountSerializer,
+    SupplierPaymentSerializer,
+)
+from shop.models.purchase_models import Purchase, Supplier, SupplierPayment
+from shop.payables import get_aging, record_supplier_payment
+
+logger = logging.getLogger(__name__)
+
+
+# ===================== SUPPLIER VIEWSET =====================
+class SupplierViewSet(viewsets.ModelViewSet):
+    """
+    Supplier accounts with their payable balance.
+
+    GET  /suppliers/aging/            what is owed, bucketed by bill age (cached)
+    GET  /suppliers/{id}/purchases/   purchase history (paginated)
+    GET  /suppliers/{id}/payments/    payments made (paginated)
+    POST /suppliers/{id}/payments/    pay: settles the oldest open bills first
+    """
+    serializer_class = SupplierAccountSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_shop(self):
+        if not hasattr(self, '_shop'):
+            self._shop = Shop.objects.filter(owner=self.request.user).first()
+        return self._shop
+
+    def get_queryset(self):
+        shop = self.get_shop()
+        if not shop:
+            return Supplier.objects.none()
+        suppliers = Supplier.objects.filter(shop=shop).order_by('name', 'id')
+        search = self.request.query_params.get('search')
+        if search:
+            suppliers = suppliers.filter(name__icontains=search)
+        if self.request.query_params.get('with_balance') == 'true':
+            suppliers = suppliers.exclude(payable_balance=0)
+        return suppliers
+
+    def perform_create(self, serializer):
+        shop = self.get_shop()
+        if not shop:
+            raise ValueError("No shop found")
+        serializer.save(shop=shop)
+
+    @action(detail=False, methods=['get'])
+    def aging(self, request):
+        shop = self.get_shop()
+        if not shop:
+            return Response({"error": "Shop not found"}, status=404)
+        return Response(get_aging(shop.id))
+
+    @action(detail=True, methods=['get'])
+    def purchases(self, request, pk=None):
+        supplier = self.get_object()
+        purchases = (
+            Purchase.objects.filter(supplier=supplier)
+            .select_related('supplier')
+            .annotate(item_count=Count('invoice__items'))
+            .order_by('-created_at', '-id')
+        )
+        if request.query_params.get('open') == 'true':
+            purchases = purchases.filter(balance_due__gt=0)
+        paginator = StandardResultsPagination()
+        page = paginator.paginate_queryset(purchases, request, view=self)
+        return paginator.get_paginated_response(PurchaseSlimSerializer(page, many=True).data)
+
+    @action(detail=True, methods=['get', 'post'])
+    def payments(self, request, pk=None):
+        supplier = self.get_object()
+        if request.method == 'GET':
+            paginator = StandardResultsPagination()
+            page = paginator.paginate_queryset(
+                SupplierPayment.objects.filter(supplier=supplier).select_related('supplier').order_by('-created_at', '-id'),
+                request, view=self,
+            )
+            return paginator.get_paginated_response(SupplierPaymentSerializer(page, many=True).data)
+
+        serializer = SupplierPaymentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payment, settled = record_supplier_payment(
+            supplier,
+            serializer.validated_data['amount'],
+            payment_type=serializer.validated_data.get('payment_type', 'CASH'),
+            note=serializer.validated_data.get('note') or '',
+            paid_on=serializer.validated_data.get('paid_on'),
+        )
+        supplier.refresh_from_db(fields=['payable_balance'])
+        logger.info(f"Supplier payment ₹{payment.amount} to {supplier.name} settled {len(settled)} bills")
+        return Response({
+            "status": "success",
+            "payment": SupplierPaymentSerializer(payment).data,
+            "settled_bills": [
+                {"purchase_id": bill.id, "balance_due": bill.balance_due} for bill in settled
+            ],
+            "payable_balance": supplier.payable_balance,
+        }, status=201)
@@ -1,6 +1,11 @@
 import logging
 import csv
 import random
+from collections import defaultdict
+from datetime import datetime
+from django.db import transaction
+from django.conf import settings
+from django.db.models import F, Q
 from django.http import HttpResponse
 from django.utils import timezone
 from rest_framework import viewsets, status
@@ -8,13 +13,26 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import api_view, action, permission_classes
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied, NotFound
-from shop.models import Product, Category, Invoice, InvoiceItem, CashbookEntry
-from shop.api.serializers import ProductSerializer, InvoiceSerializer, CategorySerializer, CashbookEntrySerializer
+from shop.models import Product, ProductUnit, Category, Invoice, InvoiceItem, CashbookEntry, CashbookDay, ReorderLevel, StockLot
+from shop.api.serializers import (
+    ProductSerializer, InvoiceSerializer, CategorySerializer, CashbookEntrySerializer,
+    CashbookDaySerializer, ProductBulkUpdateItemSerializer, ReorderLevelSerializer, ProductUnitSerializer,
+)
+from shop.cashbook import cashbook_totals, current_balance, post_entries, sale_entry
+from shop.catalog import billing_line, catalog_tree, resolve_scan
+from shop.inventory import apply_movements, movement
+from shop.importers import ProductCSVImporter, CSVImportError
+from shop.lots import expiring_soon
+from shop.reorder import compute_reorder_levels
+from shop.storefront import get_catalog_products, invalidate_catalog
 from core.core_models import Shop
+from core.pagination import StandardResultsPagination
 from shop.models.sale import Sale
 
 logger = logging.getLogger(__name__)
 
+BULK_UPDATE_LIMIT = 5000
+
 def get_user_shop(user):
     if not user.is_authenticated:
         return None
@@ -73,6 +91,13 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         return Product.objects.filter(shop=shop)
 
+    def list(self, request, *args, **kwargs):
+        # Public shop page: answer from the cached storefront catalog
+        slug = request.query_params.get("slug")
+        if slug:
+            return Response(get_catalog_products(slug) or [])
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         user = self.request.user
         if not user.is_authenticated:
@@ -90,23 +115,162 @@ class ProductViewSet(viewsets.ModelViewSet):
                 defaults={'created_at': timezone.now()}
             )
 
-        serializer.save(shop=shop, category=category)
+        with transaction.atomic():
+            product = serializer.save(shop=shop, category=category)
+            # The row already holds its opening stock; only record it
+            apply_movements([movement(product, product.stock_quantity, 'OPENING')], update_stock=False)
+
+    def perform_update(self, serializer):
+        # A new stock_quantity is applied as an ADJUSTMENT movement, not written over
+        new_stock = serializer.validated_data.pop('stock_quantity', None)
+        with transaction.atomic():
+            product = serializer.save()
+            if new_stock is not None:
+                current = Product.objects.select_for_update().values_list(
+                    'stock_quantity', flat=True
+                ).get(pk=product.pk)
+                apply_movements([movement(product, new_stock - current, 'ADJUSTMENT', note='Product edit')])
+                product.stock_quantity = new_stock
 
     @action(detail=False, methods=['get'])
     def low_stock(self, request):
-        threshold = request.query_params.get('threshold', '10')
+        """
+        Products at or below their reorder point (nightly ReorderLevel), with a
+        suggested order quantity. ?threshold=N keeps the old fixed cut-off;
+        products the reorder job has not scored yet use LOW_STOCK_THRESHOLD.
+        """
+        threshold = request.query_params.get('threshold')
+        if threshold is not None:
+            try:
+                threshold_value = int(threshold)
+                if threshold_value < 0:
+                    return Response({'error': 'Threshold must be a positive number'}, status=400)
+            except ValueError:
+                return Response({'error': 'Invalid threshold value'}, status=400)
+
+            products = self.get_queryset().filter(stock_quantity__lte=threshold_value)
+            serializer = self.get_serializer(products, many=True)
+            logger.info(f"Fetched {len(products)} low stock products for user {self.request.user}")
+            return Response(serializer.data)
+
+        products = list(
+            self.get_queryset().select_related('reorder_level').filter(
+                Q(reorder_level__isnull=False, stock_quantity__lte=F('reorder_level__reorder_point'))
+                | Q(reorder_level__isnull=True, stock_quantity__lte=getattr(settings, 'LOW_STOCK_THRESHOLD', 10))
+            ).order_by('stock_quantity', 'id')
+        )
+        data = self.get_serializer(products, many=True).data
+        for product, row in zip(products, data):
+            level = getattr(product, 'reorder_level', None)
+            row['reorder'] = level and {
+                'avg_daily_sales': level.avg_daily_sales,
+                'reorder_point': level.reorder_point,
+                'suggested_quantity': level.suggested_quantity(product.stock_quantity),
+                'computed_at': level.computed_at,
+            }
+        logger.info(f"Fetched {len(products)} low stock products for user {self.request.user}")
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def expiring(self, request):
+        """Stock lots expiring within ?days (default 30), expired ones included."""
+        shop = get_user_shop(request.user)
+        if not shop:
+            return Response({'error': 'Shop not found for this user'}, status=404)
         try:
-            threshold_value = int(threshold)
-            if threshold_value < 0:
-                return Response({'error': 'Threshold must be a positive number'}, status=400)
+            days = int(request.query_params.get('days', 30))
+            if days < 0:
+                raise ValueError
         except ValueError:
-            return Response({'error': 'Invalid threshold value'}, status=400)
+            return Response({'error': 'days must be a positive number'}, status=400)
+        return Response({'days': days, 'results': expiring_soon(shop.id, days)})
+
+    @action(detail=True, methods=['get'])
+    def lots(self, request, pk=None):
+        """Open batches of a product in the order sales draw them (first expiry first)."""
+        product = self.get_object()
+        # Lots carry purchase costs: owner only, even for ?slug= public products
+        if product.shop.owner_id != request.user.id:
+            return Response({'error': 'Product not found'}, status=404)
+        lots = (
+            StockLot.objects.filter(product=product, quantity_remaining__gt=0)
+            .order_by(F('expiry_date').asc(nulls_last=True), 'id')
+            .values('id', 'lot_number', 'expiry_date', 'cost_price',
+                    'quantity_received', 'quantity_remaining', 'purchase_id', 'created_at')
+        )
+        return Response(list(lots))
 
-        products = self.get_queryset().filter(stock_quantity__lte=threshold_value)
-        serializer = self.get_serializer(products, many=True)
-        logger.info(f"Fetched {len(products)} low stock products for user {self.request.user}")
+    @action(detail=False, methods=['get'])
+    def catalog(self, request):
+        """
+        Compact catalog of the shop for billing clients: variants and units
+        nested under their product, categories by id. ?category=<id> narrows it.
+        """
+        shop = get_user_shop(request.user)
+        if not shop:
+            return Response({'error': 'Shop not found for this user'}, status=404)
+        products = Product.objects.filter(shop=shop).order_by('name', 'id')
+        category = request.query_params.get('category')
+        if category:
+            products = products.filter(category_id=category)
+        return Response({
+            'categories': dict(Category.objects.filter(shop=shop).values_list('id', 'name')),
+            'products': catalog_tree(products),
+        })
+
+    @action(detail=True, methods=['get', 'post'])
+    def units(self, request, pk=None):
+        """Packs the product is sold in (box = 12 pcs); stock stays in base units."""
+        product = self.get_object()
+        if request.method == 'GET':
+            units = ProductUnit.objects.filter(product=product).select_related('product').order_by('factor', 'id')
+            return Response(ProductUnitSerializer(units, many=True).data)
+        if product.shop.owner_id != request.user.id:
+            return Response({'error': 'Product not found'}, status=404)
+
+        serializer = ProductUnitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if ProductUnit.objects.filter(product=product, name=serializer.validated_data['name']).exists():
+            return Response({'error': 'This product already has a unit with that name'}, status=400)
+        unit = serializer.save(product=product)
+        return Response(ProductUnitSerializer(unit).data, status=201)
+
+    @action(detail=True, methods=['patch', 'delete'], url_path=r'units/(?P<unit_id>\d+)')
+    def unit_detail(self, request, pk=None, unit_id=None):
+        product = self.get_object()
+        unit = ProductUnit.objects.filter(pk=unit_id, product=product, product__shop__owner_id=request.user.id).first()
+        if not unit:
+            return Response({'error': 'Unit not found'}, status=404)
+        if request.method == 'DELETE':
+            unit.delete()
+            return Response(status=204)
+
+        serializer = ProductUnitSerializer(unit, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        name = serializer.validated_data.get('name')
+        if name and ProductUnit.objects.filter(product=product, name=name).exclude(pk=unit.pk).exists():
+            return Response({'error': 'This product already has a unit with that name'}, status=400)
+        serializer.save()
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get', 'patch'], url_path='reorder-level')
+    def reorder_level(self, request, pk=None):
+        """Read or tune (lead_time_days, safety_days) a product's reorder numbers."""
+        product = self.get_object()
+        if product.shop.owner_id != request.user.id:
+            return Response({'error': 'Product not found'}, status=404)
+        if request.method == 'PATCH':
+            level, _ = ReorderLevel.objects.get_or_create(product=product, defaults={'shop_id': product.shop_id})
+            serializer = ReorderLevelSerializer(level, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            # Recompute now so the new lead time shows without waiting for the night
+            compute_reorder_levels(product_ids=[product.id])
+        level = ReorderLevel.objects.filter(product=product).first()
+        if level is None:
+            return Response({'error': 'Reorder level not computed yet'}, status=404)
+        return Response(ReorderLevelSerializer(level).data)
+
     @action(detail=False, methods=['get'])
     def barcode(self, request):
         barcode = request.query_params.get('barcode')
@@ -117,12 +281,14 @@ class ProductViewSet(viewsets.ModelViewSet):
             if not shop:
                 return Response({'error': 'Shop not found for this user'}, status=404)
 
-            product = Product.objects.filter(barcode=barcode, shop_id=shop.id).first()
-            if not product:
+            match = resolve_scan(shop.id, barcode)
+            if not match:
                 return Response({'error': 'Product not found'}, status=404)
 
-            serializer = self.get_serializer(product)
-            return Response(serializer.data)
+            data = self.get_serializer(match.product).data
+            # A pack barcode (box of 12) answers with its product and the unit scanned
+            data['unit'] = match.unit and ProductUnitSerializer(match.unit).data
+            return Response(data)
         except Exception as e:
             logger.error(f"Error fetching product by barcode: {e}", exc_info=True)
             return Response({'error': f'Failed to fetch product: {str(e)}'}, status=500)
@@ -146,26 +312,142 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def import_csv(self, request):
+        """
+        Streamed bulk import; rows are upserted by barcode.
+        Columns: Name, Price (required), Category, Stock, Barcode, Description.
+        """
         file = request.FILES.get('file')
         if not file:
             return Response({'error': 'CSV file required'}, status=400)
 
-        decoded = file.read().decode('utf-8').splitlines()
-        reader = csv.DictReader(decoded)
-        shop = Shop.objects.filter(owner=request.user).first()
+        shop = get_user_shop(request.user)
+        if not shop:
+            return Response({'error': 'Shop not found for this user'}, status=404)
 
-        created = 0
-        for row in reader:
-            Product.objects.create(
-                shop=shop,
-                name=row.get('Name'),
-                price=row.get('Price') or 0,
-                stock_quantity=row.get('Stock') or 0,
-                barcode=row.get('Barcode') or None
+        try:
+            result = ProductCSVImporter(shop).run(file)
+        except CSVImportError as e:
+            return Response({'error': str(e)}, status=400)
+
+        invalidate_catalog(shop.id)
+        return Response({
+            "message": f"{result['created']} products imported, {result['updated']} updated.",
+            **result
+        })
+
+    @action(detail=False, methods=['patch', 'post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        """
+        Apply many product edits in one request and one transaction.
+        Body: {"items": [{"id" | "barcode", "price"?, "stock_delta"?,
+                          "category"?, "show_on_website"?}, ...]}
+        Returns only the fields that actually changed, per product.
+        """
+        shop = get_user_shop(request.user)
+        if not shop:
+            return Response({'error': 'Shop not found for this user'}, status=404)
+
+        entries = request.data if isinstance(request.data, list) else request.data.get('items')
+        if not isinstance(entries, list) or not entries:
+            return Response({'error': 'items list is required'}, status=400)
+        if len(entries) > BULK_UPDATE_LIMIT:
+            return Response({'error': f'At most {BULK_UPDATE_LIMIT} items per request'}, status=400)
+
+        serializer = ProductBulkUpdateItemSerializer(data=entries, many=True)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=400)
+        items = serializer.validated_data
+
+        ids = {item['id'] for item in items if item.get('id')}
+        barcodes = {item['barcode'] for item in items if not item.get('id')}
+        category_ids = {item['category'] for item in items if item.get('category')}
+
+        with transaction.atomic():
+            products = list(
+                Product.objects.select_for_update()
+                .filter(shop=shop)
+                .filter(Q(id__in=ids) | Q(barcode__in=barcodes))
             )
-            created += 1
+            # Snapshot the locked rows so the response can report a diff
+            originals = {
+                p.id: (p.price, p.stock_quantity, p.category_id, p.show_on_website)
+                for p in products
+            }
+            by_id = {p.id: p for p in products}
+            by_barcode = {p.barcode: p for p in products}
+            categories = Category.objects.filter(shop=shop, id__in=category_ids).in_bulk()
+
+            errors = []
+            touched = {}
+            stock_deltas = defaultdict(int)
+            fields = set()
+
+            for index, item in enumerate(items):
+                product = by_id.get(item['id']) if item.get('id') else by_barcode.get(item['barcode'])
+                if not product:
+                    errors.append({'index': index, 'error': 'Product not found'})
+                    continue
+
+                if 'price' in item:
+                    product.price = item['price']
+                    fields.add('price')
+                if 'show_on_website' in item:
+                    product.show_on_website = item['show_on_website']
+                    fields.add('show_on_website')
+                if 'category' in item:
+                    category_id = item['category']
+                    if category_id and category_id not in categories:
+                        errors.append({'index': index, 'error': f'Category {category_id} not found'})
+                        continue
+                    product.category_id = category_id
+                    fields.add('category')
+                if item.get('stock_delta'):
+                    stock_deltas[product.id] += item['stock_delta']
+                touched[product.id] = product
+
+            for product_id, delta in stock_deltas.items():
+                product = touched[product_id]
+                if product.stock_quantity + delta < 0:
+                    errors.append({
+                        'product_id': product_id,
+                        'error': f'Stock for {product.name} cannot go below zero '
+                                 f'({product.stock_quantity} {delta:+d})'
+                    })
+
+            if errors:
+                return Response({'errors': errors}, status=400)
 
-        return Response({"message": f"{created} products imported successfully."})
+            now = timezone.now()
+            for product in touched.values():
+                product.updated_at = now
+
+            if fields:
+                Product.objects.bulk_update(
+                    touched.values(), sorted(fields | {'updated_at'}), batch_size=500
+                )
+            apply_movements([
+                movement(touched[product_id], delta, 'ADJUSTMENT', note='Bulk update')
+                for product_id, delta in stock_deltas.items()
+            ])
+
+        diff = []
+        for product_id, product in touched.items():
+            old_price, old_stock, old_category, old_visible = originals[product_id]
+            changes = {}
+            if product.price != old_price:
+                changes['price'] = [str(old_price), str(product.price)]
+            if stock_deltas.get(product_id):
+                changes['stock_quantity'] = [old_stock, old_stock + stock_deltas[product_id]]
+            if product.category_id != old_category:
+                changes['category'] = [old_category, product.category_id]
+            if product.show_on_website != old_visible:
+                changes['show_on_website'] = [old_visible, product.show_on_website]
+            if changes:
+                diff.append({'id': product_id, 'barcode': product.barcode, 'changes': changes})
+
+        invalidate_catalog(shop.id)
+        logger.info(f"Bulk update: {len(touched)} products for shop {shop.id}")
+        return Response({'updated': len(diff), 'changes': diff})
 
     @action(detail=False, methods=['post'], url_path='barcode-billing')
     def barcode_billing(self, request):
@@ -176,16 +458,19 @@ class ProductViewSet(viewsets.ModelViewSet):
             if not barcode:
                 return Response({"error": "Barcode is required"}, status=400)
 
-            product = self.get_queryset().filter(barcode=barcode).first()
-            if not product:
+            shop = get_user_shop(request.user)
+            match = shop and resolve_scan(shop.id, barcode)
+            if not match:
                 return Response({"error": "Product not found"}, status=404)
 
-            shop = product.shop
+            # Quantity is in the scanned unit; stock moves in base units
+            product = match.product
+            line = billing_line(product, quantity, match.unit)
 
-            if product.stock_quantity < quantity:
+            if product.stock_quantity < line.base_quantity:
                 return Response({"error": f"Not enough stock for {product.name}"}, status=400)
 
-            total_amount = float(product.price) * quantity
+            total_amount = float(line.total)
             invoice_number = f"INV-{random.randint(10000, 99999)}"
 
             invoice = Invoice.objects.create(
@@ -198,28 +483,30 @@ class ProductViewSet(viewsets.ModelViewSet):
             InvoiceItem.objects.create(
                 invoice=invoice,
                 product=product,
-                quantity=quantity,
-                unit_price=product.price
+                quantity=line.base_quantity,
+                unit_price=line.base_price
             )
 
-            Sale.objects.create(
+            sale = Sale(
                 shop=shop,
                 product=product,
-                quantity=quantity,
-                unit_price=product.price,
-                total_amount=total_amount,
+                quantity=line.base_quantity,
+                unit_price=line.base_price,
+                total_amount=line.total,
                 is_online=False,
                 sale_date=timezone.localtime(invoice.created_at),
             )
-
-            product.stock_quantity -= quantity
-            product.save()
+            sale.save(exact_total=True)
+            post_entries([sale_entry(sale)])
+            apply_movements([movement(product, -line.base_quantity, 'SALE', sale.id)])
 
             return Response({
                 "status": "success",
                 "invoice_number": invoice_number,
                 "product": product.name,
+                "unit": match.unit.name if match.unit else None,
                 "quantity": quantity,
+                "base_quantity": line.base_quantity,
                 "total_amount": total_amount,
                 "message": "Product billed successfully!"
             }, status=201)
@@ -311,6 +598,8 @@ class CashbookViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         shop = Shop.objects.filter(owner=self.request.user).first()
+        if not shop:
+            raise NotFound("Shop not found")
         serializer.save(shop=shop)
 
     @action(detail=False, methods=['get'])
@@ -319,17 +608,16 @@ class CashbookViewSet(viewsets.ModelViewSet):
         if not shop:
             return Response({"error": "Shop not found"}, status=404)
 
-        today = timezone.now().date()
-        entries = CashbookEntry.objects.filter(shop=shop, date=today)
+        today = timezone.localdate()
+        entries = CashbookEntry.objects.filter(shop=shop, date=today).order_by('-created_at')
         serializer = self.get_serializer(entries, many=True)
-
-        total_in = sum(e.amount for e in entries if e.entry_type == 'IN')
-        total_out = sum(e.amount for e in entries if e.entry_type == 'OUT')
+        totals = cashbook_totals(entries)
 
         return Response({
             "today": today.strftime("%d %b %Y"),
-            "total_in": total_in,
-            "total_out": total_out,
+            "total_in": totals['cash_in'] + totals['online_in'],
+            "total_out": totals['cash_out'] + totals['online_out'],
+            **totals,
             "entries": serializer.data
         })
 
@@ -338,17 +626,27 @@ class CashbookViewSet(viewsets.ModelViewSet):
         shop = Shop.objects.filter(owner=request.user).first()
         if not shop:
             return Response({"error": "Shop not found"}, status=404)
+        return Response(current_balance(shop))
 
-        cash_in = sum(e.amount for e in CashbookEntry.objects.filter(shop=shop, entry_type='IN', is_online=False))
-        cash_out = sum(e.amount for e in CashbookEntry.objects.filter(shop=shop, entry_type='OUT', is_online=False))
-
-        online_in = sum(e.amount for e in CashbookEntry.objects.filter(shop=shop, entry_type='IN', is_online=True))
-        online_out = sum(e.amount for e in CashbookEntry.objects.filter(shop=shop, entry_type='OUT', is_online=True))
+    # Day-wise opening / in / out / closing (?start_date=&end_date=, YYYY-MM-DD)
+    @action(detail=False, methods=['get'])
+    def days(self, request):
+        shop = Shop.objects.filter(owner=request.user).first()
+        if not shop:
+            return Response({"error": "Shop not found"}, status=404)
 
-        return Response({
-            "cash_in_hand": cash_in - cash_out,
-            "online_balance": online_in - online_out
-        })
+        days = CashbookDay.objects.filter(shop=shop).order_by('-date')
+        for param, lookup in (('start_date', 'date__gte'), ('end_date', 'date__lte')):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    days = days.filter(**{lookup: datetime.strptime(value, '%Y-%m-%d').date()})
+                except ValueError:
+                    return Response({"error": f"Invalid {param} format. Use YYYY-MM-DD."}, status=400)
+
+        paginator = StandardResultsPagination()
+        page = paginator.paginate_queryset(days, request, view=self)
+        return paginator.get_paginated_response(CashbookDaySerializer(page, many=True).data)
 
 
 # ===================== NEW: MY CURRENT SHOP ENDPOINT =====================
@@ -4,5 +4,10 @@ class ShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shop'
 
-def ready(self):
-    import shop.signals  # noqa
+    def ready(self):
+        # Catalog cache invalidation receivers. shop.signals is still not wired:
+        # its auto-invoice receiver would duplicate invoices the views create.
+        import shop.storefront  # noqa
+        import shop.cashbook  # noqa  (CashbookDay running balances)
+        import shop.expenses  # noqa  (expense summary cache versioning)
+        import shop.payables  # noqa  (supplier payables on purchase delete)
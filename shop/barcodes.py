@@ -0,0 +1,86 @@
+"""
+Barcode allocation for products.
+
+Codes come from a per-shop counter (BarcodeSequence), so N codes cost one
+counter bump plus one collision check against manually entered barcodes,
+instead of one existence query per product.
+
+Formats:
+- default:  PRD-<shop_id>-<seq>        e.g. PRD-12-000045
+- EAN-13:   2 + shop(5) + seq(6) + check digit, in the GS1 "2" prefix range
+            reserved for in-store (restricted circulation) numbers.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+EAN13_PREFIX = '2'
+EAN13_SHOP_DIGITS = 5
+EAN13_SEQ_DIGITS = 6
+
+
+def ean13_check_digit(digits):
+    """Check digit for a 12 digit EAN-13 body."""
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits))
+    return str((10 - total % 10) % 10)
+
+
+def is_valid_ean13(code):
+    return (
+        len(code) == 13 and code.isdigit()
+        and ean13_check_digit(code[:12]) == code[12]
+    )
+
+
+def format_barcode(shop_id, seq, ean13=False):
+    if not ean13:
+        return f"PRD-{shop_id}-{seq:06d}"
+
+    if shop_id >= 10 ** EAN13_SHOP_DIGITS or seq >= 10 ** EAN13_SEQ_DIGITS:
+        raise ValueError(f"EAN-13 barcode range exhausted for shop {shop_id}")
+    body = f"{EAN13_PREFIX}{shop_id:0{EAN13_SHOP_DIGITS}d}{seq:0{EAN13_SEQ_DIGITS}d}"
+    return body + ean13_check_digit(body)
+
+
+def reserve_sequence(shop_id, count):
+    """Atomically reserve `count` numbers for a shop and return them as a range."""
+    from shop.models import BarcodeSequence
+
+    with transaction.atomic():
+        BarcodeSequence.objects.get_or_create(shop_id=shop_id)
+        BarcodeSequence.objects.filter(shop_id=shop_id).update(
+            last_value=F('last_value') + count
+        )
+        last = (
+            BarcodeSequence.objects.filter(shop_id=shop_id)
+            .values_list('last_value', flat=True).get()
+        )
+    return range(last - count + 1, last + 1)
+
+
+def generate_barcodes(shop_id, count, ean13=None):
+    """
+    Return `count` barcodes that are not used by any product or product unit.
+
+    Sequence numbers are unique per shop and the shop id is part of the code,
+    so generated codes never collide with each other; the single lookup per
+    round only skips codes someone already typed in by hand.
+    """
+    from shop.models import Product, ProductUnit
+
+    if ean13 is None:
+        ean13 = getattr(settings, 'PRODUCT_BARCODE_EAN13', False)
+
+    codes = []
+    while len(codes) < count:
+        candidates = [
+            format_barcode(shop_id, seq, ean13)
+            for seq in reserve_sequence(shop_id, count - len(codes))
+        ]
+        taken = set(
+            Product.objects.filter(barcode__in=candidates)
+            .values_list('barcode', flat=True)
+            .union(ProductUnit.objects.filter(barcode__in=candidates).values_list('barcode', flat=True))
+        )
+        codes.extend(code for code in candidates if code not in taken)
+    return codes
@@ -0,0 +1,244 @@
+# shop/cashbook.py
+"""
+Cashbook totals and the per-day running balance.
+
+CashbookDay keeps, per shop and date, the money in/out (cash and online) and
+the opening balance carried from the previous day. Every CashbookEntry write
+is folded in with F-expression updates: the entry's day moves by the amount
+and all later days' openings shift by the net change in one UPDATE. The
+current balance is then the closing of the latest day, one indexed row read
+however many entries the shop has.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from shop.models import CashbookEntry, CashbookDay
+
+ZERO = Decimal('0')
+
+# (entry_type, is_online) -> CashbookDay column
+BUCKETS = {
+    ('IN', False): 'cash_in',
+    ('OUT', False): 'cash_out',
+    ('IN', True): 'online_in',
+    ('OUT', True): 'online_out',
+}
+
+
+def cashbook_totals(entries):
+    """In/out totals of an entry queryset, cash and online, in one query."""
+    money = DecimalField(max_digits=14, decimal_places=2)
+    return entries.aggregate(**{
+        column: Coalesce(
+            Sum('amount', filter=Q(entry_type=entry_type, is_online=is_online)),
+            Value(ZERO), output_field=money,
+        )
+        for (entry_type, is_online), column in BUCKETS.items()
+    })
+
+
+def current_balance(shop):
+    day = CashbookDay.objects.filter(shop=shop).order_by('-date').first()
+    if day is None:
+        return {"cash_in_hand": ZERO, "online_balance": ZERO}
+    return {"cash_in_hand": day.closing_cash, "online_balance": day.closing_online}
+
+
+def _entry_date(entry):
+    return CashbookEntry._meta.get_field('date').to_python(entry.date)
+
+
+def _open_day(shop_id, day, values):
+    """Create the CashbookDay row for `day`, opening from the closest earlier day."""
+    previous = (
+        CashbookDay.objects.filter(shop_id=shop_id, date__lt=day)
+        .order_by('-date')
+        .first()
+    )
+    try:
+        with transaction.atomic():
+            CashbookDay.objects.create(
+                shop_id=shop_id,
+                date=day,
+                opening_cash=previous.closing_cash if previous else ZERO,
+                opening_online=previous.closing_online if previous else ZERO,
+                **values,
+            )
+        return True
+    except IntegrityError:
+        return False  # created concurrently; caller applies an update instead
+
+
+def apply_entries(entries, sign=1):
+    """
+    Fold `entries` into the CashbookDay rows (sign=-1 to take them back out).
+    One UPDATE per touched day plus one to shift the later openings.
+    """
+    deltas = defaultdict(lambda: defaultdict(lambda: ZERO))
+    for entry in entries:
+        column = BUCKETS[(entry.entry_type, bool(entry.is_online))]
+        deltas[(entry.shop_id, _entry_date(entry))][column] += sign * Decimal(str(entry.amount))
+
+    now = timezone.now()
+    with transaction.atomic():
+        for (shop_id, day), values in sorted(deltas.items()):
+            values = dict(values)
+            days = CashbookDay.objects.filter(shop_id=shop_id, date=day)
+            updates = {column: F(column) + amount for column, amount in values.items()}
+            if not days.update(updated_at=now, **updates):
+                if not _open_day(shop_id, day, values):
+                    days.update(updated_at=now, **updates)
+
+            cash = values.get('cash_in', ZERO) - values.get('cash_out', ZERO)
+            online = values.get('online_in', ZERO) - values.get('online_out', ZERO)
+            if cash or online:
+                CashbookDay.objects.filter(shop_id=shop_id, date__gt=day).update(
+                    opening_cash=F('opening_cash') + cash,
+                    opening_online=F('opening_online') + online,
+                    updated_at=now,
+                )
+
+
+def post_entries(entries):
+    """bulk_create CashbookEntry rows and apply them to the day balances."""
+    entries = [entry for entry in entries if entry is not None and entry.amount]
+    if not entries:
+        return []
+    with transaction.atomic():
+        created = CashbookEntry.objects.bulk_create(entries)
+        apply_entries(created)
+    return created
+
+
+# ----------------------------------------------------------
+# Automatic entries for business records (posted by the write paths and
+# by the backfill_cashbook command). Each returns an unsaved entry, or None
+# when no money moved (credit sales, COD orders, unpaid purchases).
+# ----------------------------------------------------------
+ONLINE_PAYMENT_TYPES = {'ONLINE', 'UPI', 'CARD', 'GPAY', 'PHONEPE', 'PAYTM', 'NETBANKING'}
+CREDIT_PAYMENT_TYPES = {'CREDIT', 'UNPAID'}
+
+
+def _local_date(value):
+    return timezone.localtime(value).date() if value else timezone.localdate()
+
+
+def sale_entry(sale, collected_on=None):
+    """
+    Money received for a sale. A COD sale has none until its order is
+    completed: pass the day the cash was collected (`collected_on`).
+    """
+    if sale.is_credit or (sale.is_cod and collected_on is None):
+        return None
+    return CashbookEntry(
+        shop_id=sale.shop_id,
+        entry_type='IN',
+        amount=sale.total_amount,
+        is_online=sale.is_online,
+        note=f"Sale #{sale.id}",
+        source_type='SALE',
+        source_id=sale.id,
+        date=collected_on or _local_date(sale.sale_date),
+    )
+
+
+def purchase_entry(purchase):
+    """
+    Money paid out when the purchase was entered (paid_up_front). Later
+    settlements are SUPPLIER_PAYMENT entries of their own.
+    """
+    paid = Decimal(str(purchase.paid_up_front or 0))
+    if not paid:
+        return None
+    return CashbookEntry(
+        shop_id=purchase.shop_id,
+        entry_type='OUT',
+        amount=paid.quantize(Decimal('0.01')),
+        is_online=(purchase.payment_type or '').upper() in ONLINE_PAYMENT_TYPES,
+        note=f"Purchase {purchase.invoice_number or purchase.id}",
+        source_type='PURCHASE',
+        source_id=purchase.id,
+        date=_local_date(purchase.created_at),
+    )
+
+
+def sale_return_entry(sale_return, sale, amount):
+    """
+    Refund paid to the customer (credit sales are settled on the khata
+    instead; a COD sale only once its cash was booked).
+    """
+    if sale is None or sale.is_credit:
+        return None
+    if sale.is_cod and not CashbookEntry.objects.filter(source_type='SALE', source_id=sale.id).exists():
+        return None
+    return CashbookEntry(
+        shop_id=sale.shop_id,
+        entry_type='OUT',
+        amount=amount,
+        is_online=sale.is_online,
+        note=f"Sale return #{sale_return.id}",
+        source_type='SALE_RETURN',
+        source_id=sale_return.id,
+        date=_local_date(sale_return.created_at),
+    )
+
+
+def purchase_return_entry(purchase_return, purchase, amount):
+    """Refund received from the supplier."""
+    return CashbookEntry(
+        shop_id=purchase.shop_id,
+        entry_type='IN',
+        amount=amount,
+        is_online=(purchase.payment_type or '').upper() in ONLINE_PAYMENT_TYPES,
+        note=f"Purchase return #{purchase_return.id}",
+        source_type='PURCHASE_RETURN',
+        source_id=purchase_return.id,
+        date=_local_date(purchase_return.created_at),
+    )
+
+
+def expense_entry(expense):
+    return CashbookEntry(
+        shop_id=expense.shop_id,
+        entry_type='OUT',
+        amount=expense.amount,
+        note=f"Expense: {expense.title}"[:255],
+        source_type='EXPENSE',
+        source_id=expense.id,
+        date=expense.date,
+    )
+
+
+# ----------------------------------------------------------
+# Keep CashbookDay in step with single-row saves/deletes
+# ----------------------------------------------------------
+@receiver(pre_save, sender=CashbookEntry)
+def remember_previous_entry(sender, instance, **kwargs):
+    instance._cashbook_previous = None
+    if instance.pk and not instance._state.adding:
+        instance._cashbook_previous = (
+            CashbookEntry.objects.filter(pk=instance.pk)
+            .only('shop_id', 'entry_type', 'amount', 'is_online', 'date')
+            .first()
+        )
+
+
+@receiver(post_save, sender=CashbookEntry)
+def apply_saved_entry(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_cashbook_previous', None)
+    with transaction.atomic():
+        if previous is not None:
+            apply_entries([previous], sign=-1)
+        apply_entries([instance])
+
+
+@receiver(post_delete, sender=CashbookEntry)
+def revert_deleted_entry(sender, instance, **kwargs):
+    apply_entries([instance], sign=-1)
@@ -0,0 +1,145 @@
+# shop/catalog.py
+"""
+Variants, units of measure and the compact catalog.
+
+- A variant is a Product whose `parent` is another product (500 g / 1 kg,
+  red / blue). Each variant keeps its own barcode, price and stock; the
+  parent groups them in the catalog. One level only.
+- A ProductUnit is a pack a product is also sold in (box = 12 pcs). Stock is
+  always kept in the product's base unit: billing 2 boxes is a SALE movement
+  of -24, priced at the box price. Sale / InvoiceItem rows store base units
+  and the per-base-unit price; the line total is exact.
+- resolve_scan() maps a scanned code to (product, unit): a product barcode
+  gives the base unit, a unit barcode gives that pack of its product. Each
+  is one lookup on a unique index; resolve_codes() does a batch in two.
+- catalog_tree() renders products as a nested list (variants and units under
+  their product, category as an id, empty keys left out) from two queries.
+"""
+from collections import defaultdict, namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+from shop.models import Product, ProductUnit
+
+CENT = Decimal('0.01')
+
+ScanMatch = namedtuple('ScanMatch', 'product unit')
+BillingLine = namedtuple('BillingLine', 'product unit quantity base_quantity unit_price base_price total')
+
+
+def resolve_scan(shop_id, code):
+    """ScanMatch(product, unit or None) for a scanned code in the shop, or None."""
+    product = Product.objects.filter(shop_id=shop_id, barcode=code).first()
+    if product:
+        return ScanMatch(product, None)
+    unit = (
+        ProductUnit.objects.filter(barcode=code, product__shop_id=shop_id)
+        .select_related('product')
+        .first()
+    )
+    if unit:
+        return ScanMatch(unit.product, unit)
+    return None
+
+
+def resolve_codes(shop_id, codes):
+    """{code: (product_id, factor)} for many scanned codes, two queries in all."""
+    codes = set(codes)
+    resolved = {
+        code: (product_id, 1)
+        for code, product_id in Product.objects.filter(shop_id=shop_id, barcode__in=codes)
+        .values_list('barcode', 'id')
+    }
+    rest = codes - resolved.keys()
+    if rest:
+        resolved.update(
+            (code, (product_id, factor))
+            for code, product_id, factor in ProductUnit.objects.filter(barcode__in=rest, product__shop_id=shop_id)
+            .values_list('barcode', 'product_id', 'factor')
+        )
+    return resolved
+
+
+def get_unit(product, unit_id):
+    """The product's unit `unit_id`; None when unit_id is empty. Raises ProductUnit.DoesNotExist."""
+    if not unit_id:
+        return None
+    unit = ProductUnit.objects.get(pk=unit_id, product_id=product.id)
+    unit.product = product
+    return unit
+
+
+def billing_line(product, quantity, unit=None):
+    """
+    Price `quantity` of `unit` (base unit when None): the units to take from
+    stock, the price per unit sold, the per-base-unit price to record and the total.
+    """
+    factor = unit.factor if unit else 1
+    unit_price = Decimal(str(unit.unit_price if unit else product.price))
+    total = unit_price * quantity
+    base_quantity = quantity * factor
+    base_price = (total / base_quantity).quantize(CENT, rounding=ROUND_HALF_UP) if base_quantity else unit_price
+    return BillingLine(product, unit, quantity, base_quantity, unit_price, base_price, total)
+
+
+def _units(product):
+    return [
+        {k: v for k, v in (
+            ('id', unit.id),
+            ('name', unit.name),
+            ('factor', unit.factor),
+            ('price', str(unit.unit_price)),
+            ('barcode', unit.barcode),
+        ) if v is not None}
+        for unit in product.units.all()
+    ]
+
+
+def _node(product, public):
+    node = {
+        'id': product.id,
+        'name': product.name,
+        'price': str(product.price),
+        'stock_quantity': product.stock_quantity,
+    }
+    if product.variant_label:
+        node['variant_label'] = product.variant_label
+    if product.barcode:
+        node['barcode'] = product.barcode
+    if product.category_id:
+        node['category_id'] = product.category_id
+    if product.image_url:
+        node['image_url'] = product.image_url
+    if public and product.description:
+        node['description'] = product.description
+    units = _units(product)
+    if units:
+        node['units'] = units
+    return node
+
+
+def catalog_tree(products, public=False):
+    """
+    Nested catalog for `products` (a queryset): top-level products in the
+    queryset's order, each with its variants and units. A variant whose
+    parent is not in the queryset is listed on its own.
+    """
+    products = list(products.select_related(None).prefetch_related('units'))
+    ids = {product.id for product in products}
+
+    variants = defaultdict(list)
+    for product in products:
+        if product.parent_id in ids:
+            variants[product.parent_id].append(product)
+
+    tree = []
+    for product in products:
+        if product.parent_id in ids:
+            continue
+        node = _node(product, public)
+        if variants[product.id]:
+            node['variants'] = [
+                _node(variant, public)
+                for variant in sorted(variants[product.id], key=lambda v: (v.variant_label, v.id))
+            ]
+        tree.append(node)
+    return tree
@@ -0,0 +1,291 @@
+# shop/day_close.py
+"""
+Day close (Z-report) snapshots.
+
+compute_totals() builds the per-day figures for any number of shops and days
+with one grouped query per source (sales, returns, purchases, expenses,
+cashbook days), so closing a day, auto-closing every shop and re-verifying a
+week of history all cost the same handful of queries.
+
+A DayClose row is never edited. When a late edit changes a closed day, the
+verification job stores the difference as a DayCloseCorrection, and readers
+use snapshot + corrections instead of going back to the raw rows.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from shop.models import CashbookDay, DayClose, DayCloseCorrection, Expense, Sale
+from shop.models.purchase_models import Purchase, SaleReturn
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0')
+TOTAL_FIELDS = [
+    'sales_count', 'cash_sales', 'online_sales', 'credit_sales', 'returns',
+    'purchases', 'expenses',
+    'opening_cash', 'cash_in', 'cash_out', 'closing_cash',
+    'opening_online', 'online_in', 'online_out', 'closing_online',
+]
+
+
+def _empty():
+    totals = {field: ZERO for field in TOTAL_FIELDS}
+    totals['sales_count'] = 0
+    return totals
+
+
+def _day_bounds(start, end):
+    return (
+        timezone.make_aware(datetime.combine(start, time.min)),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+    )
+
+
+def _shop_filter(queryset, shop_ids, field='shop_id'):
+    return queryset.filter(**{f'{field}__in': shop_ids}) if shop_ids is not None else queryset
+
+
+def compute_totals(start, end, shop_ids=None, include=()):
+    """
+    {(shop_id, date): totals} for every shop/day with activity between
+    `start` and `end` (inclusive), plus any (shop_id, date) in `include`.
+    """
+    tz = timezone.get_current_timezone()
+    start_dt, end_dt = _day_bounds(start, end)
+    totals = defaultdict(_empty)
+    for key in include:
+        totals[key]
+
+    sales = (
+        _shop_filter(Sale.objects.filter(sale_date__gte=start_dt, sale_date__lt=end_dt), shop_ids)
+        .annotate(day=TruncDate('sale_date', tzinfo=tz))
+        .values('shop_id', 'day')
+        .annotate(
+            sales_count=Count('id'),
+            cash_sales=Sum('total_amount', filter=Q(is_credit=False, is_cod=False, is_online=False)),
+            online_sales=Sum('total_amount', filter=Q(is_credit=False, is_cod=False, is_online=True)),
+            credit_sales=Sum('total_amount', filter=Q(is_credit=True)),
+        )
+        .order_by()
+    )
+    for row in sales:
+        day = totals[(row['shop_id'], row['day'])]
+        day['sales_count'] = row['sales_count']
+        for field in ('cash_sales', 'online_sales', 'credit_sales'):
+            day[field] = row[field] or ZERO
+
+    returns = (
+        _shop_filter(
+            SaleReturn.objects.filter(created_at__gte=start_dt, created_at__lt=end_dt),
+            shop_ids, 'sale__shop_id',
+        )
+        .annotate(day=TruncDate('created_at', tzinfo=tz))
+        .values('sale__shop_id', 'day')
+        .annotate(amount=Sum(
+            F('quantity') * F('sale__unit_price'),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ))
+        .order_by()
+    )
+    for row in returns:
+        totals[(row['sale__shop_id'], row['day'])]['returns'] = row['amount'] or ZERO
+
+    purchases = (
+        _shop_filter(Purchase.objects.filter(created_at__gte=start_dt, created_at__lt=end_dt), shop_ids)
+        .annotate(day=TruncDate('created_at', tzinfo=tz))
+        .values('shop_id', 'day')
+        .annotate(amount=Sum('total_amount'))
+        .order_by()
+    )
+    for row in purchases:
+        totals[(row['shop_id'], row['day'])]['purchases'] = row['amount'] or ZERO
+
+    expenses = (
+        _shop_filter(Expense.objects.filter(date__gte=start, date__lte=end), shop_ids)
+        .values('shop_id', 'date')
+        .annotate(amount=Sum('amount'))
+        .order_by()
+    )
+    for row in expenses:
+        totals[(row['shop_id'], row['date'])]['expenses'] = row['amount'] or ZERO
+
+    _apply_cashbook(totals, start, end, shop_ids)
+    return dict(totals)
+
+
+def _apply_cashbook(totals, start, end, shop_ids):
+    """Fill opening/in/out/closing from CashbookDay, carrying balances over quiet days."""
+    days = {
+        (day.shop_id, day.date): day
+        for day in _shop_filter(CashbookDay.objects.filter(date__gte=start, date__lte=end), shop_ids)
+    }
+    for key in days:
+        totals[key]
+
+    shops = {shop_id for shop_id, _ in totals}
+    last_before = (
+        CashbookDay.objects.filter(shop_id__in=shops, date__lt=start)
+        .values('shop_id')
+        .annotate(last=Max('date'))
+        .order_by()
+    )
+    carried = {}
+    previous = Q()
+    for row in last_before:
+        previous |= Q(shop_id=row['shop_id'], date=row['last'])
+    if previous:
+        for day in CashbookDay.objects.filter(previous):
+            carried[day.shop_id] = (day.closing_cash, day.closing_online)
+
+    for shop_id, date in sorted(totals):
+        values = totals[(shop_id, date)]
+        day = days.get((shop_id, date))
+        if day is not None:
+            for field in ('opening_cash', 'cash_in', 'cash_out', 'opening_online', 'online_in', 'online_out'):
+                values[field] = getattr(day, field)
+            values['closing_cash'] = day.closing_cash
+            values['closing_online'] = day.closing_online
+            carried[shop_id] = (day.closing_cash, day.closing_online)
+        else:
+            cash, online = carried.get(shop_id, (ZERO, ZERO))
+            values['opening_cash'] = values['closing_cash'] = cash
+            values['opening_online'] = values['closing_online'] = online
+
+
+def effective_totals(day_close):
+    """Snapshot plus its corrections (use prefetch_related('corrections'))."""
+    values = {field: getattr(day_close, field) for field in TOTAL_FIELDS}
+    for correction in day_close.corrections.all():
+        for field in TOTAL_FIELDS:
+            values[field] += getattr(correction, field)
+    return values
+
+
+# ----------------------------------------------------------
+# Closing
+# ----------------------------------------------------------
+def close_day(shop, day, user=None, note=''):
+    """Freeze `day` for `shop`. Returns (DayClose, created); closing twice is a no-op."""
+    existing = DayClose.objects.filter(shop=shop, date=day).first()
+    if existing:
+        return existing, False
+
+    values = compute_totals(day, day, [shop.id], include=[(shop.id, day)])[(shop.id, day)]
+    try:
+        with transaction.atomic():
+            day_close = DayClose.objects.create(
+                shop=shop, date=day, closed_by=user, note=note, **values
+            )
+    except IntegrityError:
+        return DayClose.objects.get(shop=shop, date=day), False
+    return day_close, True
+
+
+def auto_close(start, end=None, shop_ids=None):
+    """
+    Close every day from `start` to `end` (default: just `start`) for every
+    shop that had activity on it and hasn't closed it yet, so days the job
+    missed are caught up. compute_totals() covers the whole range at once.
+    Returns the number of days actually closed by this call.
+    """
+    end = end or start
+    started = timezone.now()
+    totals = compute_totals(start, end, shop_ids)
+    closed = set(
+        _shop_filter(DayClose.objects.filter(date__gte=start, date__lte=end), shop_ids)
+        .values_list('shop_id', 'date')
+    )
+    snapshots = [
+        DayClose(shop_id=shop_id, date=date, is_auto=True, **values)
+        for (shop_id, date), values in sorted(totals.items())
+        if (shop_id, date) not in closed
+    ]
+    if not snapshots:
+        return 0
+    DayClose.objects.bulk_create(snapshots, batch_size=500, ignore_conflicts=True)
+    # Days closed by hand (or by another run) meanwhile were skipped by the
+    # insert: count only the auto snapshots for our pairs written since we started
+    wanted = {(snapshot.shop_id, snapshot.date) for snapshot in snapshots}
+    inserted = _shop_filter(
+        DayClose.objects.filter(date__gte=start, date__lte=end, is_auto=True, closed_at__gte=started),
+        {shop_id for shop_id, _ in wanted},
+    ).values_list('shop_id', 'date')
+    return sum(1 for pair in inserted if pair in wanted)
+
+
+def verify_closed_days(start, end):
+    """
+    Recompute closed days between `start` and `end` and record a correction
+    wherever the books moved since the snapshot (plus earlier corrections).
+    """
+    closes = list(
+        DayClose.objects.filter(date__gte=start, date__lte=end).prefetch_related('corrections')
+    )
+    if not closes:
+        return 0
+
+    shop_ids = {close.shop_id for close in closes}
+    totals = compute_totals(
+        start, end, shop_ids, include=[(close.shop_id, close.date) for close in closes]
+    )
+
+    corrections = []
+    for close in closes:
+        expected = totals[(close.shop_id, close.date)]
+        current = effective_totals(close)
+        delta = {field: expected[field] - current[field] for field in TOTAL_FIELDS}
+        if any(delta.values()):
+            changed = ', '.join(field for field, value in delta.items() if value)
+            corrections.append(DayCloseCorrection(
+                day_close=close, reason=f"Late changes: {changed}"[:255], **delta
+            ))
+
+    DayCloseCorrection.objects.bulk_create(corrections, batch_size=500)
+    if corrections:
+        logger.info(f"Day close verification: {len(corrections)} corrections between {start} and {end}")
+    return len(corrections)
+
+
+# ----------------------------------------------------------
+# Reading
+# ----------------------------------------------------------
+def month_summary(shop, year, month):
+    """Per-day rows and totals for a month from snapshots (today computed live if open)."""
+    start = datetime(year, month, 1).date()
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+    rows = []
+    for close in (
+        DayClose.objects.filter(shop=shop, date__gte=start, date__lte=end)
+        .prefetch_related('corrections')
+        .order_by('date')
+    ):
+        rows.append({"date": close.date, "closed": True, "is_auto": close.is_auto,
+                     "corrected": bool(close.corrections.all()), **effective_totals(close)})
+
+    today = timezone.localdate()
+    if start <= today <= end and not any(row['date'] == today for row in rows):
+        live = compute_totals(today, today, [shop.id], include=[(shop.id, today)])[(shop.id, today)]
+        rows.append({"date": today, "closed": False, "is_auto": False, "corrected": False, **live})
+
+    flow_fields = [f for f in TOTAL_FIELDS if not f.startswith(('opening_', 'closing_'))]
+    summary = {field: sum((row[field] for row in rows), 0) for field in flow_fields}
+    if rows:
+        for field in ('opening_cash', 'opening_online'):
+            summary[field] = rows[0][field]
+        for field in ('closing_cash', 'closing_online'):
+            summary[field] = rows[-1][field]
+
+    return {
+        "month": f"{year:04d}-{month:02d}",
+        "days_closed": sum(1 for row in rows if row['closed']),
+        "totals": summary,
+        "days": rows,
+    }
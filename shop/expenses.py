@@ -0,0 +1,299 @@
+# shop/expenses.py
+"""
+Expense summary by category and month, with budget alerts.
+
+One grouped query returns, per normalized category and month, the spend of
+the requested period and of the period before it (conditional sums), so the
+category totals, the month breakdown and the comparison all come from the
+same rows. Budgets are one more small query.
+
+Summaries are cached per shop and period. The key carries a per-shop version
+that every expense or budget write bumps, so an edit is visible on the next
+request without scanning or deleting old keys.
+
+Recurring templates are materialized by one pass over all shops: due
+templates are locked in keyset batches, their missing occurrences are
+inserted with bulk_create and each template's next_run_date cursor moves
+forward. The (recurring, date) unique constraint makes re-runs harmless.
+"""
+import calendar
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from shop.cashbook import expense_entry, post_entries
+from shop.models import Expense, ExpenseBudget, RecurringExpense
+
+ZERO = Decimal('0')
+UNCATEGORIZED = 'Uncategorized'
+
+
+def _version_key(shop_id):
+    return f"expenses:summary:version:{shop_id}"
+
+
+def _summary_key(shop_id, version, start, end):
+    return f"expenses:summary:{shop_id}:{version}:{start}:{end}"
+
+
+def _version(shop_id):
+    return cache.get_or_set(_version_key(shop_id), time.time_ns(), None)
+
+
+def invalidate_expense_summary(shop_id):
+    """Bump the shop's summary version once the current transaction commits."""
+    def bump():
+        try:
+            cache.incr(_version_key(shop_id))
+        except ValueError:
+            # Version evicted: start from a value no cached entry can carry
+            cache.set(_version_key(shop_id), time.time_ns(), None)
+    transaction.on_commit(bump)
+
+
+def _shift_months(day, months, keep_month_end=False):
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    last = calendar.monthrange(year, month + 1)[1]
+    return day.replace(year=year, month=month + 1, day=last if keep_month_end else min(day.day, last))
+
+
+def previous_period(start, end):
+    """
+    The period to compare against: the same months shifted back when `start`
+    is a 1st (Oct 1-18 -> Sep 1-18, Q3 -> Q2), else the same number of days
+    right before `start`.
+    """
+    if start.day == 1:
+        months = (end.year - start.year) * 12 + end.month - start.month + 1
+        month_end = end.day == calendar.monthrange(end.year, end.month)[1]
+        return _shift_months(start, -months), _shift_months(end, -months, keep_month_end=month_end)
+    previous_end = start - timedelta(days=1)
+    return previous_end - (end - start), previous_end
+
+
+def _change(current, previous):
+    change = current - previous
+    percent = (change * 100 / previous).quantize(Decimal('0.1')) if previous else None
+    return change, percent
+
+
+def _level(spent, budget):
+    if spent > budget.monthly_limit:
+        return 'EXCEEDED'
+    if spent * 100 >= budget.monthly_limit * budget.alert_percent:
+        return 'WARNING'
+    return None
+
+
+def compute_expense_summary(shop_id, start, end):
+    previous_start, previous_end = previous_period(start, end)
+    current = Q(date__gte=start, date__lte=end)
+    previous = Q(date__gte=previous_start, date__lte=previous_end)
+
+    rows = (
+        Expense.objects.filter(current | previous, shop_id=shop_id)
+        .annotate(month=TruncMonth('date'))
+        .values('category_key', 'month')
+        .annotate(
+            label=Max('category'),
+            current=Sum('amount', filter=current),
+            current_count=Count('id', filter=current),
+            previous=Sum('amount', filter=previous),
+        )
+        .order_by()
+    )
+
+    categories = {}
+    months = defaultdict(dict)
+    for row in rows:
+        key = row['category_key']
+        category = categories.setdefault(key, {
+            "category_key": key,
+            "category": row['label'].strip() if key else UNCATEGORIZED,
+            "total": ZERO, "count": 0, "previous_total": ZERO,
+        })
+        category['total'] += row['current'] or ZERO
+        category['count'] += row['current_count']
+        category['previous_total'] += row['previous'] or ZERO
+        if row['current']:
+            months[row['month']][key] = row['current']
+
+    budgets = {
+        budget.category_key: budget
+        for budget in ExpenseBudget.objects.filter(shop_id=shop_id)
+    }
+
+    alerts = []
+    for month, spent_by_category in sorted(months.items()):
+        for key, spent in spent_by_category.items():
+            budget = budgets.get(key)
+            level = budget and _level(spent, budget)
+            if level:
+                alerts.append({
+                    "category_key": key,
+                    "category": categories[key]['category'],
+                    "month": month.strftime('%Y-%m'),
+                    "spent": spent,
+                    "monthly_limit": budget.monthly_limit,
+                    "percent_used": (spent * 100 / budget.monthly_limit).quantize(Decimal('0.1')),
+                    "level": level,
+                })
+
+    total = sum((c['total'] for c in categories.values()), ZERO)
+    previous_total = sum((c['previous_total'] for c in categories.values()), ZERO)
+    for category in categories.values():
+        category['change'], category['change_percent'] = _change(category['total'], category['previous_total'])
+        category['share_percent'] = (
+            (category['total'] * 100 / total).quantize(Decimal('0.1')) if total else None
+        )
+        budget = budgets.get(category['category_key'])
+        category['monthly_limit'] = budget.monthly_limit if budget else None
+
+    change, change_percent = _change(total, previous_total)
+    return {
+        "start_date": start,
+        "end_date": end,
+        "previous_start_date": previous_start,
+        "previous_end_date": previous_end,
+        "total": total,
+        "previous_total": previous_total,
+        "change": change,
+        "change_percent": change_percent,
+        "categories": sorted(categories.values(), key=lambda c: (c['total'], c['previous_total']), reverse=True),
+        "months": [
+            {
+                "month": month.strftime('%Y-%m'),
+                "total": sum(spent_by_category.values(), ZERO),
+                "categories": spent_by_category,
+            }
+            for month, spent_by_category in sorted(months.items())
+        ],
+        "alerts": alerts,
+    }
+
+
+def get_expense_summary(shop_id, start, end):
+    """Cached summary for a shop and period; computed inline on a miss."""
+    key = _summary_key(shop_id, _version(shop_id), start, end)
+    data = cache.get(key)
+    if data is None:
+        data = compute_expense_summary(shop_id, start, end)
+        cache.set(key, data, getattr(settings, 'EXPENSE_SUMMARY_TTL', 60 * 60))
+    return data
+
+
+# ----------------------------------------------------------
+# Recurring expenses
+# ----------------------------------------------------------
+MAX_CATCH_UP = 400  # occurrences per template per run (a long-paused daily template)
+
+
+def next_occurrence(template, day):
+    """
+    The occurrence after `day`. Months are counted from start_date, so a
+    template anchored on the 31st is back on the 31st after February.
+    """
+    if template.frequency == 'DAILY':
+        return day + timedelta(days=template.interval)
+    if template.frequency == 'WEEKLY':
+        return day + timedelta(weeks=template.interval)
+    step = template.interval * (12 if template.frequency == 'YEARLY' else 1)
+    start = template.start_date
+    elapsed = (day.year - start.year) * 12 + day.month - start.month
+    return _shift_months(start, elapsed + step)
+
+
+def _due_dates(template, today):
+    """Due occurrences from the cursor up to `today`, and the cursor after them."""
+    dates = []
+    day = template.next_run_date
+    while day <= today and len(dates) < MAX_CATCH_UP:
+        if template.end_date and day > template.end_date:
+            break
+        dates.append(day)
+        day = next_occurrence(template, day)
+    return dates, day
+
+
+def materialize_due_expenses(today=None, batch_size=500, template_ids=None):
+    """Create every due Expense for all active templates; returns how many were created."""
+    today = today or timezone.localdate()
+    created_count = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            templates = RecurringExpense.objects.filter(
+                is_active=True, next_run_date__lte=today, id__gt=last_id,
+            )
+            if template_ids is not None:
+                templates = templates.filter(id__in=template_ids)
+            templates = list(
+                templates.select_for_update(skip_locked=True).order_by('id')[:batch_size]
+            )
+            if not templates:
+                break
+            last_id = templates[-1].id
+
+            earliest = min(template.next_run_date for template in templates)
+            existing = set(
+                Expense.objects.filter(recurring__in=templates, date__gte=earliest)
+                .values_list('recurring_id', 'date')
+            )
+
+            now = timezone.now()
+            expenses = []
+            for template in templates:
+                dates, following = _due_dates(template, today)
+                expenses.extend(
+                    Expense(
+                        shop_id=template.shop_id,
+                        title=template.title,
+                        amount=template.amount,
+                        category=template.category,
+                        category_key=template.category_key,  # bulk_create skips save()
+                        note=template.note,
+                        date=day,
+                        recurring=template,
+                    )
+                    for day in dates
+                    if (template.id, day) not in existing
+                )
+                if dates:
+                    template.last_run_date = dates[-1]
+                template.next_run_date = following
+                if template.end_date and following > template.end_date:
+                    template.is_active = False
+                template.updated_at = now
+
+            created = Expense.objects.bulk_create(expenses, batch_size=500)
+            # bulk_create sends no signals: post the cashbook and bump the caches here
+            post_entries([expense_entry(expense) for expense in created])
+            RecurringExpense.objects.bulk_update(
+                templates, ['next_run_date', 'last_run_date', 'is_active', 'updated_at'], batch_size=500
+            )
+            for shop_id in {expense.shop_id for expense in created}:
+                invalidate_expense_summary(shop_id)
+            created_count += len(created)
+    return created_count
+
+
+# ----------------------------------------------------------
+# Invalidation (bulk writes must call invalidate_expense_summary themselves)
+# ----------------------------------------------------------
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=ExpenseBudget)
+@receiver(post_delete, sender=ExpenseBudget)
+def expense_changed(sender, instance, **kwargs):
+    invalidate_expense_summary(instance.shop_id)
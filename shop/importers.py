@@ -0,0 +1,291 @@
+import codecs
+import csv
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from shop.barcodes import generate_barcodes
+from shop.inventory import apply_movements, movement
+from shop.models import Product, Category
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 200
+
+# Header aliases -> internal key (headers are lower-cased, spaces -> "_")
+COLUMN_ALIASES = {
+    'name': 'name',
+    'product': 'name',
+    'category': 'category',
+    'price': 'price',
+    'stock': 'stock',
+    'stock_quantity': 'stock',
+    'barcode': 'barcode',
+    'description': 'description',
+}
+REQUIRED_COLUMNS = {'name', 'price'}
+MAX_PRICE = Decimal('99999999.99')
+
+
+class CSVImportError(ValueError):
+    """Raised when the upload can't be imported at all (bad header, empty file)."""
+
+
+class ProductCSVImporter:
+    """
+    Streams a product CSV (same columns as export_csv) into a shop's catalog.
+
+    The upload is decoded line by line and processed in chunks of `batch_size`
+    rows, so memory stays bounded whatever the file size. For every chunk:
+    - rows are validated, bad rows are reported with their row number
+    - duplicate barcodes inside the chunk collapse to the last row
+    - existing products are matched by barcode in one query and bulk_updated
+    - new products are bulk_created (missing barcodes generated in one go)
+    - stock differences are recorded as IMPORT stock movements
+    - unknown categories are bulk_created once and cached for later chunks
+      ("General" only when a new product has no category)
+    """
+
+    # stock_quantity is not overwritten: the difference goes through the stock ledger
+    UPDATE_FIELDS = ['name', 'price', 'updated_at']
+
+    def __init__(self, shop, batch_size=IMPORT_BATCH_SIZE):
+        self.shop = shop
+        self.batch_size = batch_size
+        self.categories = None  # lower-cased name -> Category, loaded lazily
+        self.created = 0
+        self.updated = 0
+        self.duplicates = 0
+        self.errors = []
+        self.error_count = 0
+
+    # ----------------------------------------------------------
+    # Public API
+    # ----------------------------------------------------------
+    def run(self, file):
+        reader = csv.DictReader(codecs.iterdecode(file, 'utf-8-sig'))
+        try:
+            columns = self._map_columns(reader.fieldnames)
+        except UnicodeDecodeError:
+            raise CSVImportError("File must be a UTF-8 encoded CSV")
+
+        chunk = []
+        row_number = 1
+        try:
+            for row_number, row in enumerate(reader, start=2):
+                data = self._parse_row(row_number, row, columns)
+                if data is not None:
+                    chunk.append((row_number, data))
+                if len(chunk) >= self.batch_size:
+                    self._flush(chunk)
+                    chunk = []
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Keep what was already committed and report where we stopped
+            self._add_error(row_number + 1, f"Import stopped: {e}")
+
+        if chunk:
+            self._flush(chunk)
+
+        logger.info(
+            f"CSV import for shop {self.shop.id}: {self.created} created, "
+            f"{self.updated} updated, {self.error_count} errors"
+        )
+        return self.result()
+
+    def result(self):
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "duplicates": self.duplicates,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+    # ----------------------------------------------------------
+    # Parsing / validation
+    # ----------------------------------------------------------
+    def _map_columns(self, fieldnames):
+        if not fieldnames:
+            raise CSVImportError("CSV file is empty")
+
+        columns = {}
+        for header in fieldnames:
+            key = COLUMN_ALIASES.get((header or '').strip().lower().replace(' ', '_'))
+            if key and key not in columns:
+                columns[key] = header
+
+        missing = REQUIRED_COLUMNS - set(columns)
+        if missing:
+            raise CSVImportError(
+                f"Missing required column(s): {', '.join(sorted(c.title() for c in missing))}"
+            )
+        return columns
+
+    def _parse_row(self, row_number, row, columns):
+        def value(key):
+            header = columns.get(key)
+            return (row.get(header) or '').strip() if header else ''
+
+        name = value('name')
+        if not name:
+            return self._add_error(row_number, "Name is required")
+        if len(name) > 200:
+            return self._add_error(row_number, "Name is longer than 200 characters")
+
+        try:
+            price = Decimal(value('price') or '0').quantize(Decimal('0.01'))
+        except InvalidOperation:
+            return self._add_error(row_number, f"Invalid price '{value('price')}'")
+        if price < 0 or price > MAX_PRICE:
+            return self._add_error(row_number, f"Price out of range '{value('price')}'")
+
+        try:
+            stock = Decimal(value('stock') or '0')
+            if stock != stock.to_integral_value():
+                raise InvalidOperation
+            stock = int(stock)
+        except InvalidOperation:
+            return self._add_error(row_number, f"Invalid stock '{value('stock')}'")
+        if stock < 0:
+            return self._add_error(row_number, "Stock cannot be negative")
+
+        barcode = value('barcode') or None
+        if barcode and len(barcode) > 100:
+            return self._add_error(row_number, "Barcode is longer than 100 characters")
+
+        category = value('category')
+        if len(category) > 100:
+            return self._add_error(row_number, "Category is longer than 100 characters")
+
+        data = {
+            'name': name,
+            'price': price,
+            'stock_quantity': stock,
+            'barcode': barcode,
+            'category': category or None,
+        }
+        if 'description' in columns:
+            data['description'] = value('description') or None
+        return data
+
+    def _add_error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+        return None
+
+    # ----------------------------------------------------------
+    # Writing
+    # ----------------------------------------------------------
+    def _resolve_categories(self, names):
+        """Map lower-cased category names to Category rows, creating missing ones."""
+        if self.categories is None:
+            self.categories = {}
+            for category in Category.objects.filter(shop=self.shop).order_by('id'):
+                self.categories.setdefault(category.name.lower(), category)
+
+        missing = {}
+        for name in names:
+            if name.lower() not in self.categories:
+                missing.setdefault(name.lower(), name)
+
+        if missing:
+            Category.objects.bulk_create(
+                [Category(shop=self.shop, name=name) for name in missing.values()],
+                ignore_conflicts=True,
+            )
+            # Re-select (case-insensitively, oldest first) rather than trust the
+            # returned objects: a concurrent import may have created the same names
+            created = (
+                Category.objects.annotate(lower_name=Lower('name'))
+                .filter(shop=self.shop, lower_name__in=missing.keys())
+                .order_by('id')
+            )
+            for category in created:
+                self.categories.setdefault(category.lower_name, category)
+
+    def _flush(self, rows):
+        # Last row wins for a barcode repeated inside the chunk
+        keyed = {}
+        unkeyed = []
+        for row_number, data in rows:
+            if data['barcode']:
+                if data['barcode'] in keyed:
+                    self.duplicates += 1
+                keyed[data['barcode']] = (row_number, data)
+            else:
+                unkeyed.append((row_number, data))
+
+        # Barcodes are unique across all shops, so look them up globally
+        existing = Product.objects.filter(barcode__in=keyed.keys()).in_bulk(field_name='barcode')
+
+        names = {data['category'] for _, data in rows if data['category']}
+        new_rows = [data for barcode, (_, data) in keyed.items() if barcode not in existing]
+        new_rows += [data for _, data in unkeyed]
+        if any(not data['category'] for data in new_rows):
+            names.add('General')
+        self._resolve_categories(names)
+
+        now = timezone.now()
+        to_create, to_update = [], []
+        stock_changes = []
+        update_fields = set(self.UPDATE_FIELDS)
+
+        for barcode, (row_number, data) in keyed.items():
+            product = existing.get(barcode)
+            if product is None:
+                to_create.append(self._build(data))
+            elif product.shop_id != self.shop.id:
+                self._add_error(row_number, f"Barcode '{barcode}' is already used by another shop")
+            else:
+                product.name = data['name']
+                product.price = data['price']
+                stock_changes.append(movement(
+                    product, data['stock_quantity'] - product.stock_quantity, 'IMPORT', note='CSV import'
+                ))
+                product.updated_at = now
+                if data['category']:
+                    product.category = self.categories[data['category'].lower()]
+                    update_fields.add('category')
+                if 'description' in data:
+                    product.description = data['description']
+                    update_fields.add('description')
+                to_update.append(product)
+
+        new_without_barcode = [self._build(data) for _, data in unkeyed]
+        if new_without_barcode:
+            codes = generate_barcodes(self.shop.id, len(new_without_barcode))
+            for product, code in zip(new_without_barcode, codes):
+                product.barcode = code
+            to_create.extend(new_without_barcode)
+
+        with transaction.atomic():
+            if to_create:
+                Product.objects.bulk_create(to_create, batch_size=self.batch_size)
+                # New rows already hold their stock; only record it
+                apply_movements(
+                    [movement(product, product.stock_quantity, 'IMPORT', note='CSV import') for product in to_create],
+                    update_stock=False,
+                )
+            if to_update:
+                Product.objects.bulk_update(to_update, sorted(update_fields), batch_size=self.batch_size)
+                apply_movements(stock_changes)
+
+        self.created += len(to_create)
+        self.updated += len(to_update)
+
+    def _build(self, data):
+        category_name = data['category'] or 'General'
+        return Product(
+            shop=self.shop,
+            name=data['name'],
+            price=data['price'],
+            stock_quantity=data['stock_quantity'],
+            barcode=data['barcode'],
+            category=self.categories[category_name.lower()],
+            description=data.get('description'),
+        )
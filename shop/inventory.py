@@ -0,0 +1,81 @@
+# shop/inventory.py
+"""
+Stock movement ledger.
+
+Every stock change is a StockMovement row (product, delta, reason, ref).
+apply_movements() inserts a batch of them with one bulk_create and moves
+Product.stock_quantity, the cached projection, by each product's summed
+delta in a single UPDATE (one F() increment per product via CASE), so a
+200-line bill costs the same as a single sale. The reconcile_stock command
+rebuilds the projection from the ledger when the two disagree. Products the
+batch moved across their low-stock threshold open or resolve a StockAlert
+(shop.stock_alerts) in the same transaction, and every decrease is taken out
+of the products' batches (shop.lots).
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from shop.lots import draw_down
+from shop.models import Product, StockMovement
+from shop.stock_alerts import detect_crossings
+from shop.storefront import invalidate_catalog
+
+
+def movement(product, delta, reason, ref_id=None, note=''):
+    """Unsaved StockMovement for `product` (only its id and shop_id are read)."""
+    return StockMovement(
+        shop_id=product.shop_id,
+        product_id=product.id,
+        delta=delta,
+        reason=reason,
+        ref_id=ref_id,
+        note=note[:255],
+    )
+
+
+def apply_movements(movements, update_stock=True):
+    """
+    Record `movements` and apply them to the cached stock. Pass
+    update_stock=False when the product row already holds the new value
+    (a product created with its opening stock).
+    """
+    movements = [m for m in movements if m is not None and m.delta]
+    if not movements:
+        return []
+
+    deltas = defaultdict(int)
+    for m in movements:
+        deltas[m.product_id] += m.delta
+
+    with transaction.atomic():
+        created = StockMovement.objects.bulk_create(movements, batch_size=500)
+        deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+        if update_stock and deltas:
+            Product.objects.filter(id__in=deltas).update(
+                stock_quantity=F('stock_quantity') + Case(
+                    *[When(id=product_id, then=Value(delta)) for product_id, delta in deltas.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ),
+                updated_at=timezone.now(),
+            )
+            detect_crossings(deltas)
+            draw_down(movements)
+        for shop_id in {m.shop_id for m in movements}:
+            invalidate_catalog(shop_id)
+    return created
+
+
+def ledger_stock():
+    """Subquery: SUM(delta) of the outer product's movements (0 when none)."""
+    total = (
+        StockMovement.objects.filter(product_id=OuterRef('pk'))
+        .values('product_id')
+        .annotate(total=Sum('delta'))
+        .values('total')
+    )
+    return Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
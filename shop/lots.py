@@ -0,0 +1,190 @@
+# shop/lots.py
+"""
+Batch / expiry tracking.
+
+Purchase lines with an expiry date or lot number become StockLot rows.
+Every stock decrease draws lots down: apply_movements() hands its negative
+movements to draw_down(). A purchase return takes its units from its own
+bill's lots first (expired ones included: that is what goes back to the
+supplier); sales, stock-take shortfalls, adjustments and whatever a return
+left over go first-expiry-first-out through allocate_fefo(), which locks
+the open, unexpired lots of those products in one SELECT over the
+(product, expiry_date) partial index and writes the new remaining
+quantities with one bulk_update, inside the movement's own transaction.
+Units beyond the lots come from untracked stock, so shops that never enter
+expiries see no change. cap_lots() then trims the open lots of those
+products to their stock, so lots never hold more units than the shelf.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Q, Sum
+from django.utils import timezone
+
+from shop.models import StockLot
+from shop.models.purchase_models import PurchaseReturn
+
+
+def create_lots(purchase, lines):
+    """
+    StockLot rows for the purchase lines that carry an expiry_date or a
+    lot_number. `lines` are dicts with product, quantity, unit_price,
+    expiry_date and lot_number.
+    """
+    return StockLot.objects.bulk_create([
+        StockLot(
+            shop_id=purchase.shop_id,
+            product=line["product"],
+            purchase=purchase,
+            lot_number=line.get("lot_number") or '',
+            expiry_date=line.get("expiry_date"),
+            cost_price=line["unit_price"],
+            quantity_received=line["quantity"],
+            quantity_remaining=line["quantity"],
+        )
+        for line in lines
+        if line.get("expiry_date") or line.get("lot_number")
+    ])
+
+
+def allocate_fefo(quantities, today=None, purchase_id=None):
+    """
+    Take `quantities` ({product_id: units}) out of the products' open lots,
+    earliest expiry first (lots without expiry last, expired lots never).
+    With `purchase_id`, only that purchase's lots are used, expired ones
+    included. Returns {product_id: [(lot_id, units), ...]}. Call inside a
+    transaction.
+    """
+    quantities = {product_id: units for product_id, units in quantities.items() if units > 0}
+    if not quantities:
+        return {}
+    today = today or timezone.localdate()
+
+    lots = StockLot.objects.select_for_update().filter(product_id__in=quantities, quantity_remaining__gt=0)
+    if purchase_id is not None:
+        lots = lots.filter(purchase_id=purchase_id)
+    else:
+        lots = lots.filter(Q(expiry_date__isnull=True) | Q(expiry_date__gte=today))
+    lots = lots.order_by('product_id', F('expiry_date').asc(nulls_last=True), 'id').only(
+        'id', 'product_id', 'quantity_remaining'
+    )
+
+    wanted = dict(quantities)
+    allocations = defaultdict(list)
+    touched = []
+    for lot in lots:
+        units = min(wanted[lot.product_id], lot.quantity_remaining)
+        if not units:
+            continue
+        lot.quantity_remaining -= units
+        wanted[lot.product_id] -= units
+        allocations[lot.product_id].append((lot.id, units))
+        touched.append(lot)
+    StockLot.objects.bulk_update(touched, ['quantity_remaining'], batch_size=500)
+    return dict(allocations)
+
+
+def draw_down(movements, today=None):
+    """
+    Take the units of the negative `movements` out of the products' lots:
+    purchase returns from their own purchase's lots first, everything else
+    (and what those lots could not cover) FEFO. Then cap_lots(). Call inside
+    the movements' transaction.
+    """
+    taken = defaultdict(int)
+    returned = defaultdict(int)
+    for m in movements:
+        if m.delta >= 0:
+            continue
+        if m.reason == 'PURCHASE_RETURN' and m.ref_id:
+            returned[m.ref_id] -= m.delta
+        else:
+            taken[m.product_id] -= m.delta
+    if not taken and not returned:
+        return
+
+    by_purchase = defaultdict(lambda: defaultdict(int))
+    for return_id, purchase_id, product_id in PurchaseReturn.objects.filter(
+        id__in=returned,
+    ).values_list('id', 'purchase_id', 'product_id'):
+        by_purchase[purchase_id][product_id] += returned[return_id]
+    for purchase_id, quantities in by_purchase.items():
+        allocations = allocate_fefo(quantities, today, purchase_id=purchase_id)
+        for product_id, units in quantities.items():
+            taken[product_id] += units - sum(lot_units for _, lot_units in allocations.get(product_id, []))
+
+    allocate_fefo(taken, today)
+    cap_lots(set(taken) | {p for quantities in by_purchase.values() for p in quantities})
+
+
+def cap_lots(product_ids):
+    """
+    Trim the open lots of `product_ids` whose units add up to more than the
+    product's stock, oldest expiry (expired lots included) first. Returns
+    the number of lots trimmed; one grouped query when nothing is over.
+    """
+    over = {
+        row['product_id']: row['open_units'] - max(row['stock'], 0)
+        for row in StockLot.objects.filter(product_id__in=product_ids, quantity_remaining__gt=0)
+        .values('product_id')
+        .annotate(open_units=Sum('quantity_remaining'), stock=Max('product__stock_quantity'))
+        .filter(open_units__gt=F('stock'))
+        .order_by()
+    }
+    if not over:
+        return 0
+
+    lots = (
+        StockLot.objects.select_for_update()
+        .filter(product_id__in=over, quantity_remaining__gt=0)
+        .order_by('product_id', F('expiry_date').asc(nulls_last=True), 'id')
+        .only('id', 'product_id', 'quantity_remaining')
+    )
+    touched = []
+    for lot in lots:
+        units = min(over[lot.product_id], lot.quantity_remaining)
+        if not units:
+            continue
+        lot.quantity_remaining -= units
+        over[lot.product_id] -= units
+        touched.append(lot)
+    StockLot.objects.bulk_update(touched, ['quantity_remaining'], batch_size=500)
+    return len(touched)
+
+
+def expiring_soon(shop_id, days=30, today=None):
+    """
+    Open lots expiring within `days` (expired ones included), per product
+    and expiry date, with the units and cost value at stake. One grouped query.
+    """
+    today = today or timezone.localdate()
+    value = ExpressionWrapper(
+        F('quantity_remaining') * F('cost_price'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    rows = (
+        StockLot.objects.filter(
+            shop_id=shop_id, quantity_remaining__gt=0,
+            expiry_date__isnull=False, expiry_date__lte=today + timedelta(days=days),
+        )
+        .values('product_id', 'product__name', 'expiry_date')
+        .annotate(
+            quantity=Sum('quantity_remaining'),
+            value=Sum(value),
+            lots=Count('id'),
+        )
+        .order_by('expiry_date', 'product__name')
+    )
+    return [
+        {
+            "product_id": row['product_id'],
+            "product_name": row['product__name'],
+            "expiry_date": row['expiry_date'],
+            "days_left": (row['expiry_date'] - today).days,
+            "expired": row['expiry_date'] < today,
+            "quantity": row['quantity'],
+            "value": row['value'],
+            "lots": row['lots'],
+        }
+        for row in rows
+    ]
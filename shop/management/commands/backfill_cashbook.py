@@ -0,0 +1,117 @@
+# shop/management/commands/backfill_cashbook.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import DecimalField, Exists, ExpressionWrapper, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from shop.cashbook import (
+    post_entries, sale_entry, purchase_entry, sale_return_entry,
+    purchase_return_entry, expense_entry,
+)
+from shop.models import CashbookEntry, Expense, InvoiceItem, OrderRecord, Sale
+from shop.models.purchase_models import Purchase, PurchaseReturn, SaleReturn
+
+
+def _sales(shop_id):
+    # COD sales only once their order was completed, dated that day
+    completed = OrderRecord.objects.filter(sale_id=OuterRef('pk'), status='COMPLETED').order_by('-updated_at')
+    queryset = Sale.objects.filter(is_credit=False).annotate(
+        collected_at=Subquery(completed.values('updated_at')[:1]),
+    ).filter(Q(is_cod=False) | Q(collected_at__isnull=False))
+    if shop_id:
+        queryset = queryset.filter(shop_id=shop_id)
+    return queryset, lambda sale: sale_entry(
+        sale, collected_on=timezone.localtime(sale.collected_at).date() if sale.collected_at else None,
+    )
+
+
+def _purchases(shop_id):
+    queryset = Purchase.objects.all()
+    if shop_id:
+        queryset = queryset.filter(shop_id=shop_id)
+    return queryset, purchase_entry
+
+
+def _sale_returns(shop_id):
+    queryset = SaleReturn.objects.select_related('sale').annotate(
+        refund=F('quantity') * F('sale__unit_price'),
+    )
+    if shop_id:
+        queryset = queryset.filter(sale__shop_id=shop_id)
+    return queryset, lambda row: sale_return_entry(row, row.sale, row.refund)
+
+
+def _purchase_returns(shop_id):
+    # Same refund as the live path: the return's price, less what was
+    # credited against the bill's balance_due (bill price for old rows)
+    bill_price = InvoiceItem.objects.filter(
+        invoice_id=OuterRef('purchase__invoice_id'), product_id=OuterRef('product_id'),
+    ).order_by('id').values('unit_price')[:1]
+    money = DecimalField(max_digits=12, decimal_places=2)
+    queryset = PurchaseReturn.objects.select_related('purchase').annotate(
+        refund=ExpressionWrapper(
+            F('quantity') * Coalesce('unit_price', Subquery(bill_price, output_field=money))
+            - F('credited_amount'),
+            output_field=money,
+        ),
+    )
+    if shop_id:
+        queryset = queryset.filter(purchase__shop_id=shop_id)
+    return queryset, lambda row: (
+        purchase_return_entry(row, row.purchase, row.refund) if row.refund and row.refund > 0 else None
+    )
+
+
+def _expenses(shop_id):
+    queryset = Expense.objects.all()
+    if shop_id:
+        queryset = queryset.filter(shop_id=shop_id)
+    return queryset, expense_entry
+
+
+SOURCES = {
+    'SALE': _sales,
+    'PURCHASE': _purchases,
+    'SALE_RETURN': _sale_returns,
+    'PURCHASE_RETURN': _purchase_returns,
+    'EXPENSE': _expenses,
+}
+
+
+class Command(BaseCommand):
+    help = "Create the missing automatic cashbook entries for existing sales, purchases, returns and expenses."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--shop', type=int, help="Only this shop id")
+        parser.add_argument('--source', choices=sorted(SOURCES), action='append',
+                            help="Only these sources (repeatable); default all")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError("--chunk-size must be positive")
+
+        for source in options['source'] or list(SOURCES):
+            queryset, build = SOURCES[source](options['shop'])
+            # Rows that already have their entry are skipped in SQL, so the
+            # command can be re-run (or interrupted) safely.
+            queryset = queryset.filter(~Exists(CashbookEntry.objects.filter(
+                source_type=source, source_id=OuterRef('pk'),
+            )))
+
+            last_id, scanned, posted = 0, 0, 0
+            while True:
+                chunk = list(queryset.filter(id__gt=last_id).order_by('id')[:chunk_size])
+                if not chunk:
+                    break
+                last_id = chunk[-1].id
+                scanned += len(chunk)
+                entries = [entry for entry in map(build, chunk) if entry is not None and entry.amount]
+                if not options['dry_run']:
+                    post_entries(entries)
+                posted += len(entries)
+
+            verb = "would post" if options['dry_run'] else "posted"
+            self.stdout.write(f"{source}: scanned {scanned}, {verb} {posted} entries")
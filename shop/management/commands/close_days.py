@@ -0,0 +1,70 @@
+# shop/management/commands/close_days.py
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from shop.day_close import auto_close
+from shop.models import CashbookDay, Expense, Sale
+from shop.models.purchase_models import Purchase
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}'. Use YYYY-MM-DD.")
+
+
+def _first_activity(shop_id):
+    """Earliest day anything was recorded (sales, purchases, expenses, cashbook)."""
+    firsts = []
+    for queryset, field in (
+        (Sale.objects.all(), 'sale_date'),
+        (Purchase.objects.all(), 'created_at'),
+        (Expense.objects.all(), 'date'),
+        (CashbookDay.objects.all(), 'date'),
+    ):
+        if shop_id:
+            queryset = queryset.filter(shop_id=shop_id)
+        first = queryset.aggregate(first=Min(field))['first']
+        if first is not None:
+            firsts.append(timezone.localdate(first) if isinstance(first, datetime) else first)
+    return min(firsts, default=None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Auto-close every unclosed day with activity (a Z-report snapshot per shop and day), "
+        "for history the nightly job's catch-up window doesn't reach."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="First day YYYY-MM-DD (default: the first day with activity)")
+        parser.add_argument('--until', help="Last day YYYY-MM-DD (default: yesterday)")
+        parser.add_argument('--shop', type=int, help="Only this shop id")
+        parser.add_argument('--chunk-days', type=int, default=31, help="Days computed per pass (default 31)")
+
+    def handle(self, *args, **options):
+        chunk_days = options['chunk_days']
+        if chunk_days <= 0:
+            raise CommandError("--chunk-days must be positive")
+
+        yesterday = timezone.localdate() - timedelta(days=1)
+        until = _date(options['until']) if options['until'] else yesterday
+        if until > yesterday:
+            raise CommandError("--until must be before today (today is still open)")
+        since = _date(options['since']) if options['since'] else _first_activity(options['shop'])
+        if since is None:
+            self.stdout.write("Nothing to close")
+            return
+
+        shop_ids = [options['shop']] if options['shop'] else None
+        closed = 0
+        start = since
+        while start <= until:
+            end = min(start + timedelta(days=chunk_days - 1), until)
+            closed += auto_close(start, end, shop_ids)
+            start = end + timedelta(days=1)
+        self.stdout.write(f"Closed {closed} shop days between {since} and {until}")
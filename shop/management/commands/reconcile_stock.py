@@ -0,0 +1,59 @@
+# shop/management/commands/reconcile_stock.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from shop.inventory import ledger_stock
+from shop.models import Product
+from shop.storefront import invalidate_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare Product.stock_quantity with the stock movement ledger "
+        "(one grouped SUM) and, with --fix, rebuild the drifted products from the ledger."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', type=int, help="Only this shop id")
+        parser.add_argument('--fix', action='store_true', help="Overwrite drifted stock with the ledger sum")
+        parser.add_argument('--show', type=int, default=50, help="Drifted products to list (default 50)")
+
+    def handle(self, *args, **options):
+        products = Product.objects.all()
+        if options['shop']:
+            products = products.filter(shop_id=options['shop'])
+
+        drifted = list(
+            products.annotate(ledger=Coalesce(Sum('stock_movements__delta'), Value(0)))
+            .exclude(stock_quantity=F('ledger'))
+            .values('id', 'shop_id', 'name', 'stock_quantity', 'ledger')
+            .order_by('shop_id', 'id')
+        )
+
+        for row in drifted[:options['show']]:
+            self.stdout.write(
+                f"shop {row['shop_id']} product {row['id']} {row['name']!r}: "
+                f"stock {row['stock_quantity']}, ledger {row['ledger']} "
+                f"({row['stock_quantity'] - row['ledger']:+d})"
+            )
+        if len(drifted) > options['show']:
+            self.stdout.write(f"... and {len(drifted) - options['show']} more")
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Stock matches the ledger."))
+            return
+        if not options['fix']:
+            self.stdout.write(self.style.WARNING(f"{len(drifted)} products drifted (use --fix to rebuild)."))
+            return
+
+        # Recompute inside the UPDATE so movements written meanwhile are included
+        with transaction.atomic():
+            fixed = Product.objects.filter(id__in=[row['id'] for row in drifted]).update(
+                stock_quantity=ledger_stock(), updated_at=timezone.now(),
+            )
+            for shop_id in {row['shop_id'] for row in drifted}:
+                invalidate_catalog(shop_id)
+        self.stdout.write(self.style.SUCCESS(f"{fixed} products rebuilt from the ledger."))
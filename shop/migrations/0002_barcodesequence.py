@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 23:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_otpcode_options_profile_email'),
+        ('shop', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BarcodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_value', models.BigIntegerField(default=0)),
+                ('shop', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='barcode_sequence', to='core.shop')),
+            ],
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2 on 2026-10-18 23:50
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(raw):
+    """Frozen copy of customers.phones.normalize_phone as of this migration."""
+    if not raw:
+        return ''
+    raw = str(raw).strip()
+    digits = NON_DIGITS.sub('', raw)
+    country = str(getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '91')).lstrip('+')
+
+    if raw.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif len(digits) == 10:
+        digits = country + digits
+    elif len(digits) == 11 and digits.startswith('0'):
+        digits = country + digits[1:]
+    elif not (digits.startswith(country) and len(digits) == len(country) + 10):
+        return ''
+
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return ''
+    return '+' + digits
+
+
+def normalize_walkin_phones(apps, schema_editor):
+    for model_name in ('Invoice', 'OrderRecord'):
+        model = apps.get_model('shop', model_name)
+        rows = model.objects.exclude(customer_phone__isnull=True).exclude(customer_phone='')
+        batch = []
+        for row in rows.only('id', 'customer_phone').iterator(chunk_size=BATCH_SIZE):
+            normalized = normalize_phone(row.customer_phone)
+            if normalized and normalized != row.customer_phone:
+                row.customer_phone = normalized
+                batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, ['customer_phone'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['customer_phone'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0002_barcodesequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['shop', 'customer_phone'], name='shop_invoic_shop_id_614a2b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderrecord',
+            index=models.Index(fields=['shop', 'customer_phone'], name='shop_orderr_shop_id_6cb798_idx'),
+        ),
+        migrations.RunPython(normalize_walkin_phones, migrations.RunPython.noop),
+    ]
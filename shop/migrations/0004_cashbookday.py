@@ -0,0 +1,77 @@
+# Generated by Django 4.2 on 2026-10-18 23:53
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Q, Sum
+import django.db.models.deletion
+
+
+def backfill_cashbook_days(apps, schema_editor):
+    """One grouped query over CashbookEntry, openings carried forward per shop."""
+    CashbookEntry = apps.get_model('shop', 'CashbookEntry')
+    CashbookDay = apps.get_model('shop', 'CashbookDay')
+    zero = Decimal('0')
+
+    rows = (
+        CashbookEntry.objects.values('shop_id', 'date')
+        .annotate(
+            cash_in=Sum('amount', filter=Q(entry_type='IN', is_online=False)),
+            cash_out=Sum('amount', filter=Q(entry_type='OUT', is_online=False)),
+            online_in=Sum('amount', filter=Q(entry_type='IN', is_online=True)),
+            online_out=Sum('amount', filter=Q(entry_type='OUT', is_online=True)),
+        )
+        .order_by('shop_id', 'date')
+    )
+
+    days = []
+    shop_id = None
+    cash = online = zero
+    for row in rows.iterator():
+        if row['shop_id'] != shop_id:
+            shop_id, cash, online = row['shop_id'], zero, zero
+        day = CashbookDay(
+            shop_id=shop_id,
+            date=row['date'],
+            opening_cash=cash,
+            cash_in=row['cash_in'] or zero,
+            cash_out=row['cash_out'] or zero,
+            opening_online=online,
+            online_in=row['online_in'] or zero,
+            online_out=row['online_out'] or zero,
+        )
+        cash += day.cash_in - day.cash_out
+        online += day.online_in - day.online_out
+        days.append(day)
+    CashbookDay.objects.bulk_create(days, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_otpcode_options_profile_email'),
+        ('shop', '0003_walkin_phone_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashbookDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('opening_cash', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cash_in', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cash_out', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('opening_online', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('online_in', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('online_out', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cashbook_days', to='core.shop')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='cashbookday',
+            constraint=models.UniqueConstraint(fields=('shop', 'date'), name='unique_cashbook_day'),
+        ),
+        migrations.RunPython(backfill_cashbook_days, migrations.RunPython.noop),
+    ]
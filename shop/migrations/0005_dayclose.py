@@ -0,0 +1,78 @@
+# Generated by Django 4.2 on 2026-10-18 23:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_otpcode_options_profile_email'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('shop', '0004_cashbookday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DayClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sales_count', models.IntegerField(default=0)),
+                ('cash_sales', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('online_sales', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('credit_sales', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('returns', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('purchases', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('opening_cash', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cash_in', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cash_out', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('closing_cash', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('opening_online', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('online_in', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('online_out', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('closing_online', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('date', models.DateField()),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('is_auto', models.BooleanField(default=False)),
+                ('note', models.TextField(blank=True)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_closes', to='core.shop')),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DayCloseCorrection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sales_count', models.IntegerField(default=0)),
+                ('cash_sales', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('online_sales', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('credit_sales', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('returns', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('purchases', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('opening_cash', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cash_in', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cash_out', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('closing_cash', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('opening_online', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('online_in', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('online_out', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('closing_online', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reason', models.CharField(blank=True, max_length=255)),
+                ('day_close', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='corrections', to='shop.dayclose')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dayclose',
+            constraint=models.UniqueConstraint(fields=('shop', 'date'), name='unique_day_close'),
+        ),
+    ]
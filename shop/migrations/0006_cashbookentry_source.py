@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0005_dayclose'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cashbookentry',
+            name='source_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='cashbookentry',
+            name='source_type',
+            field=models.CharField(blank=True, choices=[('SALE', 'Sale'), ('PURCHASE', 'Purchase'), ('SALE_RETURN', 'Sale Return'), ('PURCHASE_RETURN', 'Purchase Return'), ('EXPENSE', 'Expense')], default='', max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name='cashbookentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('source_id__isnull', False)), fields=('shop', 'source_type', 'source_id'), name='unique_cashbook_source'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-18 23:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def normalize_category(value):
+    """Frozen copy of shop.models.expense_models.normalize_category as of this migration."""
+    return ' '.join((value or '').split()).casefold()[:100]
+
+
+def backfill_category_key(apps, schema_editor):
+    # Few distinct spellings per table, so one UPDATE per raw category value
+    Expense = apps.get_model('shop', 'Expense')
+    for raw in Expense.objects.exclude(category__isnull=True).values_list('category', flat=True).distinct():
+        key = normalize_category(raw)
+        if key:
+            Expense.objects.filter(category=raw).update(category_key=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_otpcode_options_profile_email'),
+        ('shop', '0006_cashbookentry_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseBudget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(blank=True, default='', max_length=100)),
+                ('category_key', models.CharField(blank=True, default='', editable=False, max_length=100)),
+                ('monthly_limit', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('alert_percent', models.PositiveSmallIntegerField(default=80)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='category_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['shop', 'date', 'category_key'], name='shop_expens_shop_id_60fa17_idx'),
+        ),
+        migrations.AddField(
+            model_name='expensebudget',
+            name='shop',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_budgets', to='core.shop'),
+        ),
+        migrations.AddConstraint(
+            model_name='expensebudget',
+            constraint=models.UniqueConstraint(fields=('shop', 'category_key'), name='unique_expense_budget_category'),
+        ),
+        migrations.RunPython(backfill_category_key, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0008_recurringexpense'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchase',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2 on 2026-10-19 00:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 2000
+
+
+def record_opening_stock(apps, schema_editor):
+    # The current stock_quantity of every product becomes its OPENING movement
+    Product = apps.get_model('shop', 'Product')
+    StockMovement = apps.get_model('shop', 'StockMovement')
+    products = Product.objects.exclude(stock_quantity=0).only('id', 'shop_id', 'stock_quantity')
+    batch = []
+    for product in products.iterator(chunk_size=BATCH_SIZE):
+        batch.append(StockMovement(
+            shop_id=product.shop_id,
+            product_id=product.id,
+            delta=product.stock_quantity,
+            reason='OPENING',
+            note='Stock before the movement ledger',
+        ))
+        if len(batch) >= BATCH_SIZE:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_otpcode_options_profile_email'),
+        ('shop', '0009_purchase_total_decimal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('reason', models.CharField(choices=[('OPENING', 'Opening stock'), ('PURCHASE', 'Purchase'), ('SALE', 'Sale'), ('PURCHASE_RETURN', 'Purchase return'), ('SALE_RETURN', 'Sale return'), ('ADJUSTMENT', 'Adjustment'), ('IMPORT', 'CSV import')], max_length=20)),
+                ('ref_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('note', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='shop.product')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='core.shop')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['product', 'created_at'], name='shop_stockm_product_5c5229_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['shop', 'created_at'], name='shop_stockm_shop_id_ca1d04_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['reason', 'ref_id'], name='shop_stockm_reason_70061d_idx'),
+        ),
+        migrations.RunPython(record_opening_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2 on 2026-10-19 00:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_unit_price(apps, schema_editor):
+    # Refund prices of existing returns, one UPDATE per table
+    SaleReturn = apps.get_model('shop', 'SaleReturn')
+    PurchaseReturn = apps.get_model('shop', 'PurchaseReturn')
+    Sale = apps.get_model('shop', 'Sale')
+    InvoiceItem = apps.get_model('shop', 'InvoiceItem')
+
+    SaleReturn.objects.update(unit_price=models.Subquery(
+        Sale.objects.filter(id=models.OuterRef('sale_id')).values('unit_price')[:1]
+    ))
+    PurchaseReturn.objects.update(unit_price=models.Subquery(
+        InvoiceItem.objects.filter(
+            invoice__related_purchase__id=models.OuterRef('purchase_id'),
+            product_id=models.OuterRef('product_id'),
+        ).order_by('id').values('unit_price')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_otpcode_options_profile_email'),
+        ('shop', '0010_stockmovement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchasereturn',
+            name='invoice',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='purchase_returns', to='shop.invoice'),
+        ),
+        migrations.AddField(
+            model_name='purchasereturn',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='salereturn',
+            name='invoice',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sale_returns', to='shop.invoice'),
+        ),
+        migrations.AddField(
+            model_name='salereturn',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=20)),
+                ('last_value', models.BigIntegerField(default=0)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_sequences', to='core.shop')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='documentsequence',
+            constraint=models.UniqueConstraint(fields=('shop', 'prefix'), name='unique_document_sequence'),
+        ),
+        migrations.RunPython(backfill_unit_price, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 4.2 on 2026-10-19 00:09
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+import django.db.models.deletion
+import shop.models.purchase_models
+
+CREDIT_PAYMENT_TYPES = ['CREDIT', 'UNPAID']
+
+
+def move_suppliers(apps, schema_editor):
+    """
+    One Supplier per Customer used as a purchase supplier, repoint the
+    purchases, then derive balance_due and the payable balances.
+    """
+    Customer = apps.get_model('customers', 'Customer')
+    Purchase = apps.get_model('shop', 'Purchase')
+    Supplier = apps.get_model('shop', 'Supplier')
+
+    customer_ids = (
+        Purchase.objects.filter(supplier__isnull=False)
+        .values_list('supplier_id', flat=True).distinct()
+    )
+    for customer in Customer.objects.filter(id__in=customer_ids).iterator():
+        supplier = Supplier.objects.create(
+            shop_id=customer.shop_id,
+            name=customer.name,
+            phone_number=customer.phone_number,
+            normalized_phone=customer.normalized_phone,
+            address=customer.address,
+        )
+        Purchase.objects.filter(supplier_id=customer.id).update(supplier_account=supplier)
+
+    # Bills paid in full up front (cash/online with no paid_amount) owe nothing
+    money = DecimalField(max_digits=12, decimal_places=2)
+    Purchase.objects.filter(payment_type__in=CREDIT_PAYMENT_TYPES).update(
+        balance_due=Greatest(F('total_amount') - F('paid_amount'), Value(Decimal('0')), output_field=money)
+    )
+    Purchase.objects.exclude(payment_type__in=CREDIT_PAYMENT_TYPES).filter(paid_amount__gt=0).update(
+        balance_due=Greatest(F('total_amount') - F('paid_amount'), Value(Decimal('0')), output_field=money)
+    )
+    due = (
+        Purchase.objects.filter(supplier_account=OuterRef('pk'))
+        .values('supplier_account').annotate(total=Sum('balance_due')).values('total')
+    )
+    Supplier.objects.update(
+        payable_balance=Coalesce(Subquery(due, output_field=money), Value(Decimal('0')), output_field=money)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_otpcode_options_profile_email'),
+        ('customers', '0005_normalized_phone'),
+        ('shop', '0011_return_invoice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Supplier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('phone_number', models.CharField(blank=True, max_length=15)),
+                ('normalized_phone', models.CharField(blank=True, default='', editable=False, max_length=16)),
+                ('address', models.TextField(blank=True)),
+                ('payable_balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suppliers', to='core.shop')),
+            ],
+            options={
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['shop', 'normalized_phone'], name='shop_suppli_shop_id_7f237c_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SupplierPayment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('payment_type', models.CharField(default='CASH', max_length=20)),
+                ('unallocated', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('note', models.TextField(blank=True, null=True)),
+                ('paid_on', models.DateField(default=shop.models.purchase_models.current_date)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='supplier_payments', to='core.shop')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='shop.supplier')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['supplier', 'created_at'], name='shop_suppli_supplie_7e72ea_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='purchase',
+            name='balance_due',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='cashbookentry',
+            name='source_type',
+            field=models.CharField(blank=True, choices=[('SALE', 'Sale'), ('PURCHASE', 'Purchase'), ('SALE_RETURN', 'Sale Return'), ('PURCHASE_RETURN', 'Purchase Return'), ('EXPENSE', 'Expense'), ('SUPPLIER_PAYMENT', 'Supplier Payment')], default='', max_length=20),
+        ),
+        # Purchase.supplier: Customer -> Supplier, carried over by move_suppliers
+        migrations.AddField(
+            model_name='purchase',
+            name='supplier_account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='purchases', to='shop.supplier'),
+        ),
+        migrations.RunPython(move_suppliers, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='purchase',
+            name='supplier',
+        ),
+        migrations.RenameField(
+            model_name='purchase',
+            old_name='supplier_account',
+            new_name='supplier',
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(condition=models.Q(('balance_due__gt', 0)), fields=['supplier', 'created_at'], name='purchase_supplier_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(condition=models.Q(('balance_due__gt', 0)), fields=['shop', 'created_at'], name='purchase_shop_open_idx'),
+        ),
+    ]
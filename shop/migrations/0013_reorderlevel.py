@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-19 00:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_otpcode_options_profile_email'),
+        ('shop', '0012_supplier'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderLevel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lead_time_days', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('safety_days', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('avg_daily_sales', models.DecimalField(decimal_places=3, default=0, max_digits=10)),
+                ('safety_stock', models.PositiveIntegerField(default=0)),
+                ('reorder_point', models.PositiveIntegerField(default=0)),
+                ('order_up_to', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_level', to='shop.product')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_levels', to='core.shop')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='reorderlevel',
+            index=models.Index(fields=['shop', 'reorder_point'], name='shop_reorde_shop_id_657e61_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2 on 2026-10-19 00:14
+
+from django.db import migrations, models
+from django.db.models import F, Q
+import django.db.models.deletion
+from django.utils import timezone
+
+LOW_STOCK_THRESHOLD = 10
+
+
+def seed_alerts(apps, schema_editor):
+    """
+    Products already low get an active alert marked SENT, so the dashboard
+    shows them without mailing every owner at once.
+    """
+    Product = apps.get_model('shop', 'Product')
+    StockAlert = apps.get_model('shop', 'StockAlert')
+    now = timezone.now()
+    low = Product.objects.filter(
+        Q(reorder_level__isnull=False, stock_quantity__lte=F('reorder_level__reorder_point'))
+        | Q(reorder_level__isnull=True, stock_quantity__lte=LOW_STOCK_THRESHOLD)
+    ).values_list('id', 'shop_id', 'stock_quantity', 'reorder_level__reorder_point')
+    alerts = [
+        StockAlert(
+            shop_id=shop_id, product_id=product_id,
+            threshold=LOW_STOCK_THRESHOLD if reorder_point is None else reorder_point,
+            stock_quantity=stock, status='SENT', sent_at=now,
+        )
+        for product_id, shop_id, stock, reorder_point in low.iterator(chunk_size=2000)
+    ]
+    StockAlert.objects.bulk_create(alerts, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_otpcode_options_profile_email'),
+        ('shop', '0013_reorderlevel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('threshold', models.IntegerField()),
+                ('stock_quantity', models.IntegerField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='shop.product')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='core.shop')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='stockalert',
+            index=models.Index(fields=['status', 'created_at'], name='shop_stocka_status_35cab6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockalert',
+            index=models.Index(fields=['shop', 'resolved_at'], name='shop_stocka_shop_id_bf876b_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockalert',
+            constraint=models.UniqueConstraint(condition=models.Q(('resolved_at__isnull', True)), fields=('product',), name='unique_active_stock_alert'),
+        ),
+        migrations.RunPython(seed_alerts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 00:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_otpcode_options_profile_email'),
+        ('shop', '0014_stockalert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot_number', models.CharField(blank=True, default='', max_length=60)),
+                ('expiry_date', models.DateField(blank=True, null=True)),
+                ('cost_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('quantity_received', models.PositiveIntegerField()),
+                ('quantity_remaining', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lots', to='shop.product')),
+                ('purchase', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lots', to='shop.purchase')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_lots', to='core.shop')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='stocklot',
+            index=models.Index(condition=models.Q(('quantity_remaining__gt', 0)), fields=['product', 'expiry_date', 'id'], name='stocklot_fefo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocklot',
+            index=models.Index(condition=models.Q(('quantity_remaining__gt', 0)), fields=['shop', 'expiry_date'], name='stocklot_expiry_idx'),
+        ),
+    ]
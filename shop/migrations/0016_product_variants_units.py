@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-19 00:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0015_stocklot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='variants', to='shop.product'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='variant_label',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.CreateModel(
+            name='ProductUnit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('factor', models.PositiveIntegerField()),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('barcode', models.CharField(blank=True, max_length=100, null=True, unique=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='units', to='shop.product')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='productunit',
+            constraint=models.UniqueConstraint(fields=('product', 'name'), name='unique_product_unit_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='productunit',
+            constraint=models.CheckConstraint(check=models.Q(('factor__gte', 1)), name='product_unit_factor_positive'),
+        ),
+    ]
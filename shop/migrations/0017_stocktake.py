@@ -0,0 +1,57 @@
+# Generated by Django 4.2 on 2026-10-19 00:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0004_alter_otpcode_options_profile_email'),
+        ('shop', '0016_product_variants_units'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockTake',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('POSTED', 'Posted'), ('CANCELLED', 'Cancelled')], default='OPEN', max_length=10)),
+                ('note', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('posted_at', models.DateTimeField(blank=True, null=True)),
+                ('adjusted_products', models.PositiveIntegerField(default=0)),
+                ('net_delta', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='shop.category')),
+                ('posted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_takes', to='core.shop')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='reason',
+            field=models.CharField(choices=[('OPENING', 'Opening stock'), ('PURCHASE', 'Purchase'), ('SALE', 'Sale'), ('PURCHASE_RETURN', 'Purchase return'), ('SALE_RETURN', 'Sale return'), ('ADJUSTMENT', 'Adjustment'), ('IMPORT', 'CSV import'), ('STOCK_TAKE', 'Stock take')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='StockTakeCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device', models.CharField(blank=True, default='', max_length=50)),
+                ('counted_quantity', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_take_counts', to='shop.product')),
+                ('stock_take', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counts', to='shop.stocktake')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='stocktakecount',
+            constraint=models.UniqueConstraint(fields=('stock_take', 'product', 'device'), name='unique_stock_take_count'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktake',
+            index=models.Index(fields=['shop', 'status'], name='shop_stockt_shop_id_53e4c7_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2 on 2026-10-19 00:31
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, Exists, ExpressionWrapper, F, OuterRef, Subquery
+
+CREDIT_PAYMENT_TYPES = ['CREDIT', 'UNPAID']
+
+
+def derive_amounts(apps, schema_editor):
+    """
+    paid_up_front: the amount of the bill's PURCHASE cashbook entry when it
+    has one (bills entered since supplier accounts always have it when
+    anything was paid). Older bills without an entry keep their paid_amount
+    only if their supplier was never paid through a SupplierPayment, which
+    could have raised it; cash/online bills with nothing entered were paid
+    in full. The rest stay at 0, so the backfill never posts money a
+    supplier payment already did.
+
+    credited_amount: returns made by the multi-line return path (they have a
+    return invoice) always posted their refund, so the credited part is the
+    value less that entry; no entry means all of it was credited.
+    """
+    Purchase = apps.get_model('shop', 'Purchase')
+    PurchaseReturn = apps.get_model('shop', 'PurchaseReturn')
+    SupplierPayment = apps.get_model('shop', 'SupplierPayment')
+    CashbookEntry = apps.get_model('shop', 'CashbookEntry')
+    money = DecimalField(max_digits=12, decimal_places=2)
+
+    def entry_amount(source_type):
+        return Subquery(
+            CashbookEntry.objects.filter(source_type=source_type, source_id=OuterRef('pk'))
+            .values('amount')[:1],
+            output_field=money,
+        )
+
+    def has_entry(source_type):
+        return Exists(CashbookEntry.objects.filter(source_type=source_type, source_id=OuterRef('pk')))
+
+    Purchase.objects.filter(has_entry('PURCHASE')).update(paid_up_front=entry_amount('PURCHASE'))
+
+    unposted = Purchase.objects.filter(~has_entry('PURCHASE'))
+    never_paid_later = ~Exists(SupplierPayment.objects.filter(supplier_id=OuterRef('supplier_id')))
+    unposted.filter(never_paid_later, paid_amount__gt=0).update(paid_up_front=F('paid_amount'))
+    unposted.filter(paid_amount=0).exclude(payment_type__in=CREDIT_PAYMENT_TYPES).update(
+        paid_up_front=F('total_amount')
+    )
+
+    value = ExpressionWrapper(F('quantity') * F('unit_price'), output_field=money)
+    returns = PurchaseReturn.objects.filter(invoice__isnull=False, unit_price__isnull=False)
+    returns.filter(has_entry('PURCHASE_RETURN')).update(
+        credited_amount=ExpressionWrapper(value - entry_amount('PURCHASE_RETURN'), output_field=money)
+    )
+    returns.filter(~has_entry('PURCHASE_RETURN')).update(credited_amount=value)
+    PurchaseReturn.objects.filter(credited_amount__lt=0).update(credited_amount=Decimal('0'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0017_stocktake'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchase',
+            name='paid_up_front',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='purchasereturn',
+            name='credited_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(derive_amounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0018_purchase_paid_up_front'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stocktakecount',
+            name='system_quantity',
+            field=models.IntegerField(default=0),
+        ),
+    ]
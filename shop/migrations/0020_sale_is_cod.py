@@ -0,0 +1,42 @@
+# Generated by Django 4.2 on 2026-10-19 00:34
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def mark_cod_sales(apps, schema_editor):
+    """
+    offline_purchase never linked its Sale to the OrderRecord it created in
+    the same request: a sale is the COD one when an order has its shop,
+    product, quantity and total within a minute of it.
+    """
+    Sale = apps.get_model('shop', 'Sale')
+    OrderRecord = apps.get_model('shop', 'OrderRecord')
+    window = timedelta(minutes=1)
+
+    orders = OrderRecord.objects.filter(
+        shop_id=OuterRef('shop_id'), product_id=OuterRef('product_id'),
+        quantity=OuterRef('quantity'), total_amount=OuterRef('total_amount'),
+        created_at__gte=OuterRef('created_at') - window,
+        created_at__lte=OuterRef('created_at') + window,
+    )
+    cod = Sale.objects.filter(Exists(orders), is_credit=False, customer__isnull=True)
+    cod.update(is_cod=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0019_stocktakecount_system_quantity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='is_cod',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_cod_sales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 00:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0020_sale_is_cod'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockalert',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 00:55
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def link_cod_sales(apps, schema_editor):
+    """Same match as 0020_sale_is_cod: the COD sale recorded with the order."""
+    Sale = apps.get_model('shop', 'Sale')
+    OrderRecord = apps.get_model('shop', 'OrderRecord')
+    window = timedelta(minutes=1)
+
+    sale = Sale.objects.filter(
+        is_cod=True, shop_id=OuterRef('shop_id'), product_id=OuterRef('product_id'),
+        quantity=OuterRef('quantity'), total_amount=OuterRef('total_amount'),
+        created_at__gte=OuterRef('created_at') - window,
+        created_at__lte=OuterRef('created_at') + window,
+    ).order_by('id').values('id')[:1]
+    OrderRecord.objects.filter(sale__isnull=True).update(sale_id=Subquery(sale))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0021_stockalert_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderrecord',
+            name='sale',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='shop.sale'),
+        ),
+        migrations.RunPython(link_cod_sales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0022_orderrecord_sale'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='invoice',
+            name='shop_invoic_shop_id_614a2b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='orderrecord',
+            name='shop_orderr_shop_id_6cb798_idx',
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['shop', 'customer_phone'], name='invoice_shop_phone_like_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='orderrecord',
+            index=models.Index(fields=['shop', 'customer_phone'], name='orderrec_shop_phone_like_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+    ]
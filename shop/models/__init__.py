@@ -1,3 +1,5 @@
-from .models import Product, Category, Invoice, InvoiceItem, CashbookEntry, OrderRecord
-from .expense_models import Expense
+from .models import Product, ProductUnit, Category, Invoice, InvoiceItem, CashbookEntry, CashbookDay, OrderRecord, BarcodeSequence, DocumentSequence
+from .expense_models import Expense, ExpenseBudget, RecurringExpense
 from .sale import Sale, PendingSale
+from .day_close_models import DayClose, DayCloseCorrection
+from .inventory_models import StockMovement, ReorderLevel, StockAlert, StockLot, StockTake, StockTakeCount
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import models
+from core.core_models import Shop
+
+
+class DayTotals(models.Model):
+    """Per-day figures shared by the Z-report snapshot and its corrections."""
+    sales_count = models.IntegerField(default=0)
+    cash_sales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    online_sales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    credit_sales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    returns = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    purchases = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expenses = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    opening_cash = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cash_in = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cash_out = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    closing_cash = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    opening_online = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    online_in = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    online_out = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    closing_online = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+
+# ===================== DAY CLOSE (Z-REPORT) =====================
+class DayClose(DayTotals):
+    """Frozen end-of-day totals; never edited, late changes go to corrections."""
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='day_closes')
+    date = models.DateField()
+    closed_at = models.DateTimeField(auto_now_add=True)
+    closed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    is_auto = models.BooleanField(default=False)  # closed by the scheduled job
+    note = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'date'], name='unique_day_close'),
+        ]
+
+    def __str__(self):
+        return f"Day close {self.shop_id} {self.date}"
+
+
+class DayCloseCorrection(DayTotals):
+    """Delta between a snapshot and what the books said when re-verified."""
+    day_close = models.ForeignKey(DayClose, on_delete=models.CASCADE, related_name='corrections')
+    created_at = models.DateTimeField(auto_now_add=True)
+    reason = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Correction for {self.day_close}"
@@ -9,14 +9,114 @@ def current_date():
     return timezone.now().date()
 
 
+def normalize_category(value):
+    """'  Shop  RENT ' -> 'shop rent'; blank categories group under ''."""
+    return ' '.join((value or '').split()).casefold()[:100]
+
+
 class Expense(models.Model):
     shop = models.ForeignKey(Shop, on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     category = models.CharField(max_length=100, blank=True, null=True)
+    # Grouping key for reports, kept in step with `category` on save
+    category_key = models.CharField(max_length=100, blank=True, default='', editable=False)
     date = models.DateField(default=current_date)  # ✅ Ab ye callable function hai
     note = models.TextField(blank=True, null=True)
+    # Set when generated from a RecurringExpense template
+    recurring = models.ForeignKey(
+        'RecurringExpense', null=True, blank=True, on_delete=models.SET_NULL,
+        related_name='expenses'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['shop', 'date', 'category_key']),
+        ]
+        constraints = [
+            # A template produces at most one expense per due date
+            models.UniqueConstraint(
+                fields=['recurring', 'date'],
+                condition=models.Q(recurring__isnull=False),
+                name='unique_recurring_expense_date',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.category_key = normalize_category(self.category)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'category' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'category_key'}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.title} - ₹{self.amount}"
+
+
+class ExpenseBudget(models.Model):
+    """Monthly spending limit for one expense category of a shop."""
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='expense_budgets')
+    category = models.CharField(max_length=100, blank=True, default='')
+    category_key = models.CharField(max_length=100, blank=True, default='', editable=False)
+    monthly_limit = models.DecimalField(max_digits=12, decimal_places=2)
+    # Warn once spending reaches this share of the limit
+    alert_percent = models.PositiveSmallIntegerField(default=80)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'category_key'], name='unique_expense_budget_category'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.category_key = normalize_category(self.category)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.category or 'Uncategorized'} budget - ₹{self.monthly_limit}"
+
+
+class RecurringExpense(models.Model):
+    """
+    Template for rent, salaries, bills... The beat job in shop/tasks.py turns
+    every due occurrence into an Expense and moves next_run_date forward.
+    """
+    FREQUENCIES = [
+        ('DAILY', 'Daily'),
+        ('WEEKLY', 'Weekly'),
+        ('MONTHLY', 'Monthly'),
+        ('YEARLY', 'Yearly'),
+    ]
+
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='recurring_expenses')
+    title = models.CharField(max_length=200)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    category = models.CharField(max_length=100, blank=True, null=True)
+    category_key = models.CharField(max_length=100, blank=True, default='', editable=False)
+    note = models.TextField(blank=True, null=True)
+    frequency = models.CharField(max_length=10, choices=FREQUENCIES, default='MONTHLY')
+    interval = models.PositiveSmallIntegerField(default=1)  # every N periods
+    start_date = models.DateField(default=current_date)  # also the day-of-month anchor
+    end_date = models.DateField(null=True, blank=True)
+    # Cursor: the next occurrence still to be materialized
+    next_run_date = models.DateField()
+    last_run_date = models.DateField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'next_run_date']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.category_key = normalize_category(self.category)
+        if self.next_run_date is None:
+            self.next_run_date = self.start_date
+        super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.title} - ₹{self.amount}"
\ No newline at end of file
+        return f"{self.title} ({self.get_frequency_display()}) - ₹{self.amount}"
@@ -0,0 +1,216 @@
+from django.conf import settings
+from django.db import models
+from core.core_models import Shop
+from shop.models import Product, Category
+
+
+# ===================== STOCK MOVEMENT LEDGER =====================
+class StockMovement(models.Model):
+    """
+    Append-only stock ledger. Product.stock_quantity is a cached projection
+    of SUM(delta) per product; reconcile_stock rebuilds it from here.
+    """
+    REASONS = [
+        ('OPENING', 'Opening stock'),
+        ('PURCHASE', 'Purchase'),
+        ('SALE', 'Sale'),
+        ('PURCHASE_RETURN', 'Purchase return'),
+        ('SALE_RETURN', 'Sale return'),
+        ('ADJUSTMENT', 'Adjustment'),
+        ('IMPORT', 'CSV import'),
+        ('STOCK_TAKE', 'Stock take'),
+    ]
+
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='stock_movements')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_movements')
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASONS)
+    # Id of the Sale / Purchase / return row behind the movement (per reason)
+    ref_id = models.PositiveBigIntegerField(null=True, blank=True)
+    note = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'created_at']),
+            models.Index(fields=['shop', 'created_at']),
+            models.Index(fields=['reason', 'ref_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_reason_display()} {self.delta:+d} - {self.product_id}"
+
+
+# ===================== REORDER LEVELS =====================
+class ReorderLevel(models.Model):
+    """
+    Reorder point per product, recomputed nightly from sales velocity
+    (shop.reorder). lead_time_days and safety_days are the owner's inputs
+    and are kept across runs; the other numbers belong to the job.
+    """
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='reorder_levels')
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='reorder_level')
+    lead_time_days = models.PositiveSmallIntegerField(null=True, blank=True)  # null: REORDER_LEAD_TIME_DAYS
+    safety_days = models.PositiveSmallIntegerField(null=True, blank=True)  # null: variability-based safety stock
+    avg_daily_sales = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    safety_stock = models.PositiveIntegerField(default=0)
+    reorder_point = models.PositiveIntegerField(default=0)
+    # Stock to top up to when reordering (reorder point + REORDER_COVER_DAYS of sales)
+    order_up_to = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['shop', 'reorder_point'])]
+
+    def __str__(self):
+        return f"Reorder {self.product_id} at {self.reorder_point}"
+
+    def suggested_quantity(self, stock_quantity):
+        return max(self.order_up_to - stock_quantity, 0)
+
+
+# ===================== STOCK ALERTS =====================
+class StockAlert(models.Model):
+    """
+    A product's stock fell to its reorder point (shop/stock_alerts.py).
+    Active while resolved_at is null; at most one active alert per product.
+    Delivered once, in per-shop batches, after a debounce delay.
+    """
+    PENDING = 'PENDING'
+    SENDING = 'SENDING'
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='stock_alerts')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_alerts')
+    threshold = models.IntegerField()
+    stock_quantity = models.IntegerField()  # stock when the alert (re)opened
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)  # moved to SENDING by a dispatch run
+    sent_at = models.DateTimeField(null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product'],
+                condition=models.Q(resolved_at__isnull=True),
+                name='unique_active_stock_alert',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['shop', 'resolved_at']),
+        ]
+
+    def __str__(self):
+        return f"Low stock {self.product_id}: {self.stock_quantity} <= {self.threshold}"
+
+
+# ===================== STOCK LOTS (batch / expiry) =====================
+class StockLot(models.Model):
+    """
+    Optional batch of a product with its expiry (shop/lots.py). Created by
+    purchase lines that carry an expiry date or lot number; stock
+    decreases draw them down. Stock without lots stays untracked.
+    """
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='stock_lots')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='lots')
+    purchase = models.ForeignKey(
+        'shop.Purchase', on_delete=models.SET_NULL, null=True, blank=True, related_name='lots'
+    )
+    lot_number = models.CharField(max_length=60, blank=True, default='')
+    expiry_date = models.DateField(null=True, blank=True)
+    cost_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    quantity_received = models.PositiveIntegerField()
+    quantity_remaining = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Open lots only: FEFO allocation and the expiring-soon report
+            models.Index(
+                fields=['product', 'expiry_date', 'id'],
+                condition=models.Q(quantity_remaining__gt=0),
+                name='stocklot_fefo_idx',
+            ),
+            models.Index(
+                fields=['shop', 'expiry_date'],
+                condition=models.Q(quantity_remaining__gt=0),
+                name='stocklot_expiry_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Lot {self.lot_number or self.id} of {self.product_id} ({self.quantity_remaining} left)"
+
+
+# ===================== STOCK TAKE (physical count) =====================
+class StockTake(models.Model):
+    """
+    A physical count session (shop/stock_take.py). Devices upload their
+    counts while it is OPEN; posting turns the variance against the system
+    stock into STOCK_TAKE movements. Optionally limited to one category.
+    """
+    OPEN = 'OPEN'
+    POSTED = 'POSTED'
+    CANCELLED = 'CANCELLED'
+    STATUS_CHOICES = [
+        (OPEN, 'Open'),
+        (POSTED, 'Posted'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='stock_takes')
+    name = models.CharField(max_length=100, blank=True)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=OPEN)
+    note = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    posted_at = models.DateTimeField(null=True, blank=True)
+    posted_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    # Filled when posted
+    adjusted_products = models.PositiveIntegerField(default=0)
+    net_delta = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['shop', 'status'])]
+
+    def __str__(self):
+        return f"Stock take {self.name or self.id} ({self.status})"
+
+
+class StockTakeCount(models.Model):
+    """
+    Units of a product one device counted in a session (base units). A device
+    re-sends its running total, so uploads are upserts; devices add up.
+    system_quantity is the product's stock when it was last counted in the
+    session (the same on all its rows); variance is measured against it.
+    """
+    stock_take = models.ForeignKey(StockTake, on_delete=models.CASCADE, related_name='counts')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_take_counts')
+    device = models.CharField(max_length=50, blank=True, default='')
+    counted_quantity = models.PositiveIntegerField()
+    system_quantity = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['stock_take', 'product', 'device'], name='unique_stock_take_count',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.counted_quantity} ({self.device or 'default'})"
@@ -1,7 +1,7 @@
 from django.db import models
 from core.core_models import Shop
+from customers.phones import normalize_phone
 from datetime import date
-import uuid
 from django.utils import timezone
 
 
@@ -19,6 +19,11 @@ class Category(models.Model):
 class Product(models.Model):
     shop = models.ForeignKey('core.Shop', on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    # Variant of another product (size / flavour / pack); each variant keeps its own stock
+    parent = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='variants'
+    )
+    variant_label = models.CharField(max_length=100, blank=True, default='')
     name = models.CharField(max_length=200)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock_quantity = models.IntegerField(default=0)
@@ -37,18 +42,63 @@ class Product(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        # ✅ AUTO GENERATE BARCODE
+        # ✅ AUTO GENERATE BARCODE (per-shop sequence, no existence loop)
         if not self.barcode:
-            self.barcode = self.generate_unique_barcode()
+            from shop.barcodes import generate_barcodes
+            self.barcode = generate_barcodes(self.shop_id, 1)[0]
         super().save(*args, **kwargs)
 
-    @staticmethod
-    def generate_unique_barcode():
-        while True:
-            code = f"PRD-{uuid.uuid4().hex[:8].upper()}"
-            if not Product.objects.filter(barcode=code).exists():
-                return code
 
+# ===================== PRODUCT UNITS =====================
+class ProductUnit(models.Model):
+    """
+    A unit a product is sold in besides its base unit, e.g. box = 12 pcs.
+    Stock stays in base units; billing 2 boxes moves 24 (see shop/catalog.py).
+    price is the price of one unit; empty means factor x product price.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='units')
+    name = models.CharField(max_length=50)
+    factor = models.PositiveIntegerField()  # base units in one of this unit
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    barcode = models.CharField(max_length=100, unique=True, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'name'], name='unique_product_unit_name'),
+            models.CheckConstraint(check=models.Q(factor__gte=1), name='product_unit_factor_positive'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.factor}) - {self.product_id}"
+
+    @property
+    def unit_price(self):
+        return self.price if self.price is not None else self.product.price * self.factor
+
+
+# ===================== BARCODE SEQUENCE =====================
+class BarcodeSequence(models.Model):
+    """Last barcode number handed out for a shop (see shop/barcodes.py)."""
+    shop = models.OneToOneField(Shop, on_delete=models.CASCADE, related_name='barcode_sequence')
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.shop_id}: {self.last_value}"
+
+
+class DocumentSequence(models.Model):
+    """Last number handed out per shop and document prefix (see shop/numbering.py)."""
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='document_sequences')
+    prefix = models.CharField(max_length=20)
+    last_value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'prefix'], name='unique_document_sequence'),
+        ]
+
+    def __str__(self):
+        return f"{self.shop_id} {self.prefix}: {self.last_value}"
 
 
 # ===================== INVOICE MODEL =====================
@@ -65,6 +115,20 @@ class Invoice(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Walk-in lookup is a prefix match: pattern ops (see Customer)
+            models.Index(
+                fields=['shop', 'customer_phone'], name='invoice_shop_phone_like_idx',
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Walk-in phones are stored in E.164 so repeat customers group together
+        self.customer_phone = normalize_phone(self.customer_phone) or self.customer_phone
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.invoice_number
 
@@ -84,18 +148,72 @@ class CashbookEntry(models.Model):
         ('IN', 'Money In'),
         ('OUT', 'Money Out'),
     )
+    # Business record an automatic entry was posted for (blank = manual entry)
+    SOURCE_TYPES = (
+        ('SALE', 'Sale'),
+        ('PURCHASE', 'Purchase'),
+        ('SALE_RETURN', 'Sale Return'),
+        ('PURCHASE_RETURN', 'Purchase Return'),
+        ('EXPENSE', 'Expense'),
+        ('SUPPLIER_PAYMENT', 'Supplier Payment'),
+    )
 
     shop = models.ForeignKey(Shop, on_delete=models.CASCADE)
     entry_type = models.CharField(max_length=3, choices=ENTRY_TYPES)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     note = models.CharField(max_length=255, blank=True, null=True)
     is_online = models.BooleanField(default=False)
+    source_type = models.CharField(max_length=20, choices=SOURCE_TYPES, blank=True, default='')
+    source_id = models.PositiveBigIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     date = models.DateField(default=date.today)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['shop', 'source_type', 'source_id'],
+                condition=models.Q(source_id__isnull=False),
+                name='unique_cashbook_source',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.entry_type} ₹{self.amount} ({'Online' if self.is_online else 'Cash'})"
 
+
+# ===================== CASHBOOK DAY =====================
+class CashbookDay(models.Model):
+    """
+    Per-shop daily cashbook totals with the opening balance carried forward.
+    Maintained by shop/cashbook.py from CashbookEntry writes; the latest row's
+    closing balance is the current balance.
+    """
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='cashbook_days')
+    date = models.DateField()
+    opening_cash = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cash_in = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cash_out = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    opening_online = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    online_in = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    online_out = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'date'], name='unique_cashbook_day'),
+        ]
+
+    @property
+    def closing_cash(self):
+        return self.opening_cash + self.cash_in - self.cash_out
+
+    @property
+    def closing_online(self):
+        return self.opening_online + self.online_in - self.online_out
+
+    def __str__(self):
+        return f"{self.shop_id} {self.date}"
+
 class OrderRecord(models.Model):
     STATUS_CHOICES = [
         ('PENDING', 'Pending'),
@@ -105,6 +223,8 @@ class OrderRecord(models.Model):
     shop = models.ForeignKey(Shop, on_delete=models.CASCADE)
     invoice = models.ForeignKey('Invoice', on_delete=models.CASCADE, related_name='orders')
     product = models.ForeignKey('Product', on_delete=models.CASCADE)
+    # The COD Sale recorded with the order; its cash is booked on completion
+    sale = models.ForeignKey('Sale', on_delete=models.SET_NULL, null=True, blank=True, related_name='orders')
     customer_name = models.CharField(max_length=200, blank=True, null=True)
     customer_phone = models.CharField(max_length=30, blank=True, null=True)
     quantity = models.PositiveIntegerField(default=1)
@@ -113,5 +233,18 @@ class OrderRecord(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Walk-in lookup is a prefix match: pattern ops (see Customer)
+            models.Index(
+                fields=['shop', 'customer_phone'], name='orderrec_shop_phone_like_idx',
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.customer_phone = normalize_phone(self.customer_phone) or self.customer_phone
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.customer_name or 'Guest'} - {self.product.name} ({self.status})"
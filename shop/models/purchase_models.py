@@ -1,10 +1,48 @@
 from django.db import models
+from django.utils import timezone
 from core.core_models import Shop
-from customers.models import Customer  # supplier stored as Customer model (nullable)
+from customers.phones import normalize_phone
 from shop.models.sale import Sale  # For SaleReturn relation
 from shop.models import Product  # For product reference
 
 
+def current_date():
+    return timezone.localdate()
+
+
+class Supplier(models.Model):
+    """
+    ✅ Supplier account (who the shop buys from)
+    """
+    shop = models.ForeignKey(
+        Shop, on_delete=models.CASCADE, related_name='suppliers'
+    )
+    name = models.CharField(max_length=100)
+    phone_number = models.CharField(max_length=15, blank=True)
+    # E.164 copy of phone_number used for lookups ('' when not a valid number)
+    normalized_phone = models.CharField(max_length=16, blank=True, default='', editable=False)
+    address = models.TextField(blank=True)
+    # Materialized payable: sum of the open bills' balance_due minus unused
+    # advances (-ve: advance paid). Only shop.payables moves it.
+    payable_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [models.Index(fields=['shop', 'normalized_phone'])]
+
+    def save(self, *args, **kwargs):
+        self.normalized_phone = normalize_phone(self.phone_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone_number' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'normalized_phone'}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+
 class Purchase(models.Model):
     """
     ✅ Main Purchase model for supplier bills / purchases
@@ -13,14 +51,19 @@ class Purchase(models.Model):
         Shop, on_delete=models.CASCADE, related_name='purchases'
     )
     supplier = models.ForeignKey(
-        Customer, null=True, blank=True, on_delete=models.SET_NULL,
-        related_name='supplier_purchases'
+        Supplier, null=True, blank=True, on_delete=models.SET_NULL,
+        related_name='purchases'
     )
     invoice_number = models.CharField(max_length=120, blank=True, null=True)
-    total_amount = models.FloatField(default=0.0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     note = models.TextField(blank=True, null=True)
     payment_type = models.CharField(max_length=20, default='CASH')
     paid_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Paid when the bill was entered (its PURCHASE cashbook entry); paid_amount
+    # also grows as supplier payments settle the bill
+    paid_up_front = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Still owed on this bill (total - paid - returns credited); payments settle oldest first
+    balance_due = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     received = models.BooleanField(default=True)  # Mark if goods received
     invoice = models.OneToOneField(
@@ -35,11 +78,50 @@ class Purchase(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Purchase'
         verbose_name_plural = 'Purchases'
+        indexes = [
+            # Open bills only: FIFO settlement and the aging report
+            models.Index(
+                fields=['supplier', 'created_at'],
+                condition=models.Q(balance_due__gt=0),
+                name='purchase_supplier_open_idx',
+            ),
+            models.Index(
+                fields=['shop', 'created_at'],
+                condition=models.Q(balance_due__gt=0),
+                name='purchase_shop_open_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Purchase {self.invoice_number or self.id} - {self.shop.name}"
 
 
+class SupplierPayment(models.Model):
+    """
+    ✅ Money paid to a supplier, settled against the oldest open bills
+    """
+    shop = models.ForeignKey(
+        Shop, on_delete=models.CASCADE, related_name='supplier_payments'
+    )
+    supplier = models.ForeignKey(
+        Supplier, on_delete=models.CASCADE, related_name='payments'
+    )
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    payment_type = models.CharField(max_length=20, default='CASH')
+    # Part not yet settled against a bill (advance); used by the next purchases
+    unallocated = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    note = models.TextField(blank=True, null=True)
+    paid_on = models.DateField(default=current_date)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['supplier', 'created_at'])]
+
+    def __str__(self):
+        return f"SupplierPayment #{self.id} | {self.supplier.name} | {self.amount}"
+
+
 class PurchaseReturn(models.Model):
     """
     ✅ Records items returned to supplier (stock decreases)
@@ -52,6 +134,14 @@ class PurchaseReturn(models.Model):
     )
     quantity = models.PositiveIntegerField()
     reason = models.TextField(blank=True, null=True)
+    # Price per unit refunded (from the purchase bill) and the return invoice
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Part of the value taken off the bill's balance_due instead of refunded
+    credited_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    invoice = models.ForeignKey(
+        'shop.Invoice', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='purchase_returns'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -75,6 +165,12 @@ class SaleReturn(models.Model):
     )
     quantity = models.PositiveIntegerField()
     reason = models.TextField(blank=True, null=True)
+    # Price per unit refunded (the sale's unit price) and the return invoice
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    invoice = models.ForeignKey(
+        'shop.Invoice', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='sale_returns'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -1,7 +1,12 @@
+from decimal import Decimal
+
 from django.db import models
 from core.core_models import Shop
 from shop.models import Product
-from customers.models import Customer, Khata, Transaction
+from customers.models import Customer
+from customers.ledger import post_transaction
+
+HALF_PAISA = Decimal('0.005')
 
 class Sale(models.Model):
     shop = models.ForeignKey(Shop, on_delete=models.CASCADE)
@@ -12,6 +17,7 @@ class Sale(models.Model):
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     is_online = models.BooleanField(default=False)
     is_credit = models.BooleanField(default=False)  # True if sale is on credit (updates Khata)
+    is_cod = models.BooleanField(default=False)  # Website COD order: no money received when recorded
     sale_date = models.DateTimeField(auto_now_add=True)
     created_at = models.DateTimeField(auto_now_add=True)
     customer_name = models.CharField(max_length=100, blank=True, null=True)
@@ -19,24 +25,29 @@ class Sale(models.Model):
     def __str__(self):
         return f"Sale: {self.product.name} - {self.quantity} units"
 
-    def save(self, *args, **kwargs):
-        # Calculate total_amount
-        self.total_amount = self.quantity * self.unit_price
+    def save(self, *args, exact_total=False, **kwargs):
+        # Calculate total_amount. exact_total: the total comes from
+        # shop.catalog.billing_line, where a pack sold at its own price (box
+        # of 12 for 110) keeps its exact total, unit_price being only the
+        # per-piece price rounded to the paisa. Any other total is recomputed.
+        computed = self.quantity * Decimal(str(self.unit_price))
+        if (
+            not exact_total or self.total_amount is None
+            or abs(Decimal(str(self.total_amount)) - computed) > self.quantity * HALF_PAISA
+        ):
+            self.total_amount = computed
+        is_new = self._state.adding
         super().save(*args, **kwargs)
-        # Update product stock
-        self.product.stock_quantity -= self.quantity
-        self.product.save()
-        # If credit sale, update customer's Khata
-        if self.is_credit and self.customer:
-            khata, _ = Khata.objects.get_or_create(customer=self.customer)
-            Transaction.objects.create(
-                khata=khata,
-                amount=self.total_amount,
+        # Stock is not touched here: the view that creates the sale writes a
+        # SALE StockMovement (shop.inventory.apply_movements).
+        # If credit sale, post it to the customer's khata ledger (once)
+        if is_new and self.is_credit and self.customer:
+            post_transaction(
+                self.customer,
+                self.total_amount,
                 is_credit=True,
                 description=f"Credit sale: {self.quantity} units of {self.product.name}"
             )
-            khata.total_due += self.total_amount
-            khata.save()
 
 class PendingSale(models.Model):
     shop = models.ForeignKey(Shop, on_delete=models.CASCADE)
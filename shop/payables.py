@@ -0,0 +1,265 @@
+# shop/payables.py
+"""
+Supplier payables and aging.
+
+Every purchase records what is still owed on it (Purchase.balance_due) and
+moves the supplier's materialized Supplier.payable_balance in the same DB
+transaction with an F-expression, so "what do I owe" is one row read.
+Payments settle the oldest open bills first (FIFO); whatever is left over
+stays on the payment as an advance and is used by the next bills. Purchase
+returns reduce what is owed on their bill before any money is refunded.
+
+The aging report buckets every open bill by age in one grouped aggregate
+over the partial (open bills only) index and is cached per shop behind a
+version that each payable write bumps.
+"""
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Min, Q, Sum
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from shop.cashbook import CREDIT_PAYMENT_TYPES, ONLINE_PAYMENT_TYPES, post_entries
+from shop.models import CashbookEntry
+from shop.models.purchase_models import Purchase, Supplier, SupplierPayment
+
+ZERO = Decimal('0')
+
+# (label, min days old, max days old or None)
+AGING_BUCKETS = (
+    ('0_30', 0, 30),
+    ('31_60', 31, 60),
+    ('61_90', 61, 90),
+    ('90_plus', 91, None),
+)
+
+
+def _version_key(shop_id):
+    return f"payables:aging:version:{shop_id}"
+
+
+def _aging_key(shop_id, version, day):
+    return f"payables:aging:{shop_id}:{version}:{day}"
+
+
+def _version(shop_id):
+    return cache.get_or_set(_version_key(shop_id), time.time_ns(), None)
+
+
+def invalidate_payables(shop_id):
+    """Bump the shop's aging report version once the current transaction commits."""
+    def bump():
+        try:
+            cache.incr(_version_key(shop_id))
+        except ValueError:
+            cache.set(_version_key(shop_id), time.time_ns(), None)
+    transaction.on_commit(bump)
+
+
+def _move_payable(supplier_id, delta):
+    if supplier_id and delta:
+        Supplier.objects.filter(pk=supplier_id).update(
+            payable_balance=F('payable_balance') + delta,
+            updated_at=timezone.now(),
+        )
+
+
+def paid_up_front(purchase):
+    """What was paid when the bill was entered: paid_amount, or the total unless bought on credit."""
+    paid = Decimal(str(purchase.paid_amount or 0))
+    if not paid and (purchase.payment_type or '').upper() not in CREDIT_PAYMENT_TYPES:
+        paid = purchase.total_amount or ZERO
+    return min(paid, purchase.total_amount or ZERO)
+
+
+# ----------------------------------------------------------
+# Writes (each runs inside the caller's transaction when there is one)
+# ----------------------------------------------------------
+def record_purchase(purchase):
+    """
+    Set the new purchase's balance_due, add it to the supplier's payable and
+    settle it from any advance already paid to that supplier.
+    """
+    due = (purchase.total_amount or ZERO) - Decimal(str(purchase.paid_amount or 0))
+    if due <= 0:
+        return purchase
+
+    with transaction.atomic():
+        _move_payable(purchase.supplier_id, due)
+
+        settled = ZERO
+        if purchase.supplier_id:
+            advances = list(
+                SupplierPayment.objects.select_for_update()
+                .filter(supplier_id=purchase.supplier_id, unallocated__gt=0)
+                .order_by('created_at', 'id')
+            )
+            used = []
+            for payment in advances:
+                if settled == due:
+                    break
+                applied = min(payment.unallocated, due - settled)
+                payment.unallocated -= applied
+                settled += applied
+                used.append(payment)
+            SupplierPayment.objects.bulk_update(used, ['unallocated'])
+
+        purchase.paid_amount = Decimal(str(purchase.paid_amount or 0)) + settled
+        purchase.balance_due = due - settled
+        Purchase.objects.filter(pk=purchase.pk).update(
+            paid_amount=purchase.paid_amount, balance_due=purchase.balance_due,
+        )
+        invalidate_payables(purchase.shop_id)
+    return purchase
+
+
+def record_supplier_payment(supplier, amount, payment_type='CASH', note='', paid_on=None):
+    """
+    Pay `supplier`: settle their open bills oldest first, keep the rest as
+    an advance, lower the payable and post the cashbook entry.
+    Returns (payment, bills settled or part-settled).
+    """
+    amount = Decimal(str(amount))
+    payment_type = (payment_type or 'CASH').upper()
+
+    with transaction.atomic():
+        bills = list(
+            Purchase.objects.select_for_update()
+            .filter(supplier=supplier, balance_due__gt=0)
+            .only('id', 'paid_amount', 'balance_due')
+            .order_by('created_at', 'id')
+        )
+        remaining = amount
+        settled = []
+        for bill in bills:
+            if not remaining:
+                break
+            applied = min(bill.balance_due, remaining)
+            bill.balance_due -= applied
+            bill.paid_amount += applied
+            remaining -= applied
+            settled.append(bill)
+        Purchase.objects.bulk_update(settled, ['paid_amount', 'balance_due'], batch_size=500)
+
+        payment = SupplierPayment.objects.create(
+            shop_id=supplier.shop_id,
+            supplier=supplier,
+            amount=amount,
+            payment_type=payment_type,
+            unallocated=remaining,
+            note=note,
+            paid_on=paid_on or timezone.localdate(),
+        )
+        _move_payable(supplier.id, -amount)
+        post_entries([CashbookEntry(
+            shop_id=supplier.shop_id,
+            entry_type='OUT',
+            amount=amount,
+            is_online=payment_type in ONLINE_PAYMENT_TYPES,
+            note=f"Payment to {supplier.name}",
+            source_type='SUPPLIER_PAYMENT',
+            source_id=payment.id,
+            date=payment.paid_on,
+        )])
+        invalidate_payables(supplier.shop_id)
+    return payment, settled
+
+
+def credit_purchase_return(purchase, amount):
+    """
+    Take a return's value off what is still owed on `purchase` (locked by
+    the caller). Returns the part credited; the rest is refunded.
+    """
+    credited = min(Decimal(str(amount)), purchase.balance_due or ZERO)
+    if credited <= 0:
+        return ZERO
+    with transaction.atomic():
+        Purchase.objects.filter(pk=purchase.pk).update(balance_due=F('balance_due') - credited)
+        purchase.balance_due -= credited
+        _move_payable(purchase.supplier_id, -credited)
+        invalidate_payables(purchase.shop_id)
+    return credited
+
+
+def change_purchase_supplier(purchase, supplier):
+    """Point `purchase` at `supplier`, carrying what is still owed on it across."""
+    if purchase.supplier_id == getattr(supplier, 'id', None):
+        return purchase
+    with transaction.atomic():
+        due = Purchase.objects.select_for_update().values_list('balance_due', flat=True).get(pk=purchase.pk)
+        _move_payable(purchase.supplier_id, -due)
+        _move_payable(getattr(supplier, 'id', None), due)
+        Purchase.objects.filter(pk=purchase.pk).update(supplier=supplier)
+        purchase.supplier = supplier
+        invalidate_payables(purchase.shop_id)
+    return purchase
+
+
+# ----------------------------------------------------------
+# Aging report
+# ----------------------------------------------------------
+def compute_aging(shop_id, today):
+    def day_start(day):
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+    buckets = {}
+    for label, min_days, max_days in AGING_BUCKETS:
+        age = Q(created_at__lt=day_start(today - timedelta(days=min_days - 1)))
+        if max_days is not None:
+            age &= Q(created_at__gte=day_start(today - timedelta(days=max_days)))
+        buckets[label] = Sum('balance_due', filter=age)
+
+    rows = (
+        Purchase.objects.filter(shop_id=shop_id, balance_due__gt=0)
+        .values('supplier_id', 'supplier__name', 'supplier__payable_balance')
+        .annotate(total=Sum('balance_due'), oldest=Min('created_at'), **buckets)
+        .order_by()
+    )
+
+    suppliers = []
+    totals = {label: ZERO for label, _, _ in AGING_BUCKETS}
+    totals['total'] = ZERO
+    for row in rows:
+        entry = {
+            "supplier_id": row['supplier_id'],
+            "supplier_name": row['supplier__name'] or "Unknown Supplier",
+            "payable_balance": row['supplier__payable_balance'],
+            "total": row['total'],
+            "oldest_bill_date": timezone.localtime(row['oldest']).date(),
+        }
+        for label, _, _ in AGING_BUCKETS:
+            entry[label] = row[label] or ZERO
+            totals[label] += entry[label]
+        totals['total'] += row['total']
+        suppliers.append(entry)
+
+    return {
+        "as_of": today,
+        "totals": totals,
+        "suppliers": sorted(suppliers, key=lambda s: s['total'], reverse=True),
+    }
+
+
+def get_aging(shop_id, today=None):
+    """Cached aging report for a shop; computed inline on a miss."""
+    today = today or timezone.localdate()
+    key = _aging_key(shop_id, _version(shop_id), today)
+    data = cache.get(key)
+    if data is None:
+        data = compute_aging(shop_id, today)
+        cache.set(key, data, getattr(settings, 'SUPPLIER_AGING_TTL', 60 * 60))
+    return data
+
+
+@receiver(post_delete, sender=Purchase)
+def purchase_deleted(sender, instance, **kwargs):
+    # A deleted bill no longer owes anything
+    if instance.balance_due:
+        _move_payable(instance.supplier_id, -instance.balance_due)
+    invalidate_payables(instance.shop_id)
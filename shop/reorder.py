@@ -0,0 +1,132 @@
+# shop/reorder.py
+"""
+Reorder points from sales velocity.
+
+The nightly job walks products in keyset batches. For each batch, one grouped
+query over the stock ledger returns the units sold per product per day in the
+window (SALE and SALE_RETURN movements, so every sale path counts, returns
+net out). From those daily totals it derives each product's average and
+standard deviation of daily sales, then:
+
+    safety stock  = z * stddev * sqrt(lead time)   (or avg * safety_days)
+    reorder point = avg * lead time + safety stock
+    order up to   = reorder point + avg * REORDER_COVER_DAYS
+
+Results are upserted into ReorderLevel in one statement per batch, so the
+low-stock screen is a join on an indexed table instead of a scan of sales.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from shop.models import Product, ReorderLevel, StockMovement
+
+SALE_REASONS = ('SALE', 'SALE_RETURN')
+COMPUTED_FIELDS = ['avg_daily_sales', 'safety_stock', 'reorder_point', 'order_up_to', 'computed_at']
+
+
+def _settings():
+    return {
+        'window': getattr(settings, 'REORDER_WINDOW_DAYS', 28),
+        'lead_time': getattr(settings, 'REORDER_LEAD_TIME_DAYS', 7),
+        'cover': getattr(settings, 'REORDER_COVER_DAYS', 14),
+        'z': getattr(settings, 'REORDER_SERVICE_Z', 1.65),
+    }
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def reorder_numbers(daily_units, days, lead_time, safety_days, cover, z):
+    """(avg, safety stock, reorder point, order up to) from one product's daily sales."""
+    days = max(days, 1)
+    total = sum(daily_units)
+    avg = total / days
+    variance = max(sum(units * units for units in daily_units) / days - avg * avg, 0)
+    if safety_days is not None:
+        safety = math.ceil(avg * safety_days)
+    else:
+        safety = math.ceil(z * math.sqrt(variance) * math.sqrt(lead_time))
+    reorder_point = math.ceil(avg * lead_time) + safety
+    order_up_to = reorder_point + math.ceil(avg * cover)
+    return avg, safety, reorder_point, order_up_to
+
+
+def compute_reorder_levels(shop_ids=None, product_ids=None, today=None, batch_size=1000):
+    """Recompute ReorderLevel for every product (of `shop_ids` / `product_ids`); returns rows written."""
+    today = today or timezone.localdate()
+    config = _settings()
+    window_start = today - timedelta(days=config['window'])
+    start, end = _day_start(window_start), _day_start(today)  # completed days only
+    now = timezone.now()
+
+    written = 0
+    last_id = 0
+    while True:
+        products = Product.objects.filter(id__gt=last_id)
+        if shop_ids is not None:
+            products = products.filter(shop_id__in=shop_ids)
+        if product_ids is not None:
+            products = products.filter(id__in=product_ids)
+        products = list(products.order_by('id').values('id', 'shop_id', 'created_at')[:batch_size])
+        if not products:
+            break
+        last_id = products[-1]['id']
+        ids = [p['id'] for p in products]
+
+        params = {
+            product_id: (lead_time, safety_days)
+            for product_id, lead_time, safety_days in ReorderLevel.objects.filter(product_id__in=ids)
+            .values_list('product_id', 'lead_time_days', 'safety_days')
+        }
+        daily = defaultdict(list)
+        rows = (
+            StockMovement.objects.filter(
+                product_id__in=ids, reason__in=SALE_REASONS,
+                created_at__gte=start, created_at__lt=end,
+            )
+            .annotate(day=TruncDate('created_at'))
+            .values('product_id', 'day')
+            .annotate(delta=Sum('delta'))
+            .order_by()
+        )
+        for row in rows:
+            daily[row['product_id']].append(max(-row['delta'], 0))
+
+        levels = []
+        for product in products:
+            lead_time, safety_days = params.get(product['id'], (None, None))
+            # A product added inside the window is averaged over its own age
+            age = (today - timezone.localtime(product['created_at']).date()).days
+            avg, safety, reorder_point, order_up_to = reorder_numbers(
+                daily.get(product['id'], []),
+                min(age, config['window']),
+                lead_time or config['lead_time'],
+                safety_days,
+                config['cover'],
+                config['z'],
+            )
+            levels.append(ReorderLevel(
+                shop_id=product['shop_id'],
+                product_id=product['id'],
+                lead_time_days=lead_time,
+                safety_days=safety_days,
+                avg_daily_sales=Decimal(str(round(avg, 3))),
+                safety_stock=safety,
+                reorder_point=reorder_point,
+                order_up_to=order_up_to,
+                computed_at=now,
+            ))
+
+        ReorderLevel.objects.bulk_create(
+            levels, update_conflicts=True, unique_fields=['product'], update_fields=COMPUTED_FIELDS,
+        )
+        written += len(levels)
+    return written
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import Product, Invoice, InvoiceItem, Category, Sale, CashbookEntry, OrderRecord
-from shop.models.expense_models import Expense
+from shop.models.expense_models import Expense, ExpenseBudget, RecurringExpense, normalize_category
 
 
 # ===========================
@@ -114,7 +114,66 @@ class InvoiceSerializer(serializers.ModelSerializer):
 class ExpenseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Expense
-        fields = ['id', 'title', 'amount', 'category', 'date', 'note', 'created_at']
+        fields = ['id', 'title', 'amount', 'category', 'category_key', 'date', 'note', 'created_at']
+
+
+class ExpenseBudgetSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExpenseBudget
+        fields = ['id', 'category', 'category_key', 'monthly_limit', 'alert_percent', 'created_at', 'updated_at']
+
+    def validate_monthly_limit(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Monthly limit must be greater than zero.")
+        return value
+
+    def validate_alert_percent(self, value):
+        if not 1 <= value <= 100:
+            raise serializers.ValidationError("Alert percent must be between 1 and 100.")
+        return value
+
+    def validate(self, attrs):
+        shop = self.context['shop']
+        key = normalize_category(attrs.get('category', getattr(self.instance, 'category', '')))
+        duplicates = ExpenseBudget.objects.filter(shop=shop, category_key=key)
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError({"category": "A budget for this category already exists."})
+        return attrs
+
+
+class RecurringExpenseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RecurringExpense
+        fields = [
+            'id', 'title', 'amount', 'category', 'category_key', 'note',
+            'frequency', 'interval', 'start_date', 'end_date',
+            'next_run_date', 'last_run_date', 'is_active', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['next_run_date', 'last_run_date']
+
+    def validate_interval(self, value):
+        if value < 1:
+            raise serializers.ValidationError("Interval must be at least 1.")
+        return value
+
+    def validate(self, attrs):
+        start = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if start and end and end < start:
+            raise serializers.ValidationError({"end_date": "End date cannot be before start date."})
+        return attrs
+
+    def update(self, instance, validated_data):
+        schedule = ('start_date', 'frequency', 'interval')
+        if instance.last_run_date is None and any(
+            field in validated_data and validated_data[field] != getattr(instance, field)
+            for field in schedule
+        ):
+            # Nothing generated yet: restart the cursor from the new schedule
+            instance.next_run_date = validated_data.get('start_date', instance.start_date)
+        return super().update(instance, validated_data)
 
 class CashbookEntrySerializer(serializers.ModelSerializer):
     class Meta:
@@ -128,3 +187,4 @@ class OrderRecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderRecord
         fields = '__all__'
+        read_only_fields = ['sale']
@@ -6,7 +6,7 @@ import random
 import logging
 
 from shop.models.sale import Sale
-from shop.models import Invoice, InvoiceItem, CashbookEntry
+from shop.models import Invoice, InvoiceItem
 
 logger = logging.getLogger(__name__)
 
@@ -57,11 +57,3 @@ def create_invoice_for_sale(sender, instance, created, **kwargs):
 
     except Exception as e:
         logger.error(f"❌ Error creating invoice for sale {instance.id}: {str(e)}", exc_info=True)
-
-CashbookEntry.objects.create(
-    shop=instance.shop,
-    entry_type='IN',
-    amount=instance.total_amount,
-    note=f"Sale: {instance.product.name}",
-    is_online=getattr(instance, 'is_online', False)
-)
\ No newline at end of file
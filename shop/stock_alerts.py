@@ -0,0 +1,296 @@
+# shop/stock_alerts.py
+"""
+Low-stock alert pipeline.
+
+1. detect_crossings() runs inside apply_movements(), right after the stock
+   UPDATE, with one SELECT over the products the batch touched. A product
+   whose stock fell to or below its threshold (its ReorderLevel reorder
+   point, else LOW_STOCK_THRESHOLD) gets a PENDING StockAlert; one whose
+   stock climbed back above it has its active alert resolved.
+   - Dedup: at most one active alert per product (partial unique constraint).
+   - Debounce: a product that dips again within STOCK_ALERT_COOLDOWN_MINUTES
+     of recovering reopens its last alert instead of creating a new one, so
+     a flapping product is announced once.
+2. dispatch_alerts() (beat task) claims PENDING alerts older than
+   STOCK_ALERT_DELAY_SECONDS that are still active, so a dip fixed right away
+   by a purchase never goes out. It sends one message per shop through the
+   backend and bulk_updates the delivery state. Alerts a crashed run left
+   in SENDING for over STOCK_ALERT_CLAIM_TIMEOUT_MINUTES go back to PENDING
+   (as a failed attempt) when the next run starts.
+
+Backends are selected by the STOCK_ALERT_BACKEND dotted path, like the
+payment reminder backends:
+
+- ConsoleStockAlertBackend  logs the messages (default)
+- LocmemStockAlertBackend   keeps them in `outbox` (for tests)
+- EmailStockAlertBackend    mails the shop owner
+- WebhookStockAlertBackend  POSTs each batch to a push gateway
+"""
+import logging
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.mail import get_connection, EmailMessage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from customers.reminders import DeliveryResult
+from shop.models import Product, StockAlert
+
+logger = logging.getLogger(__name__)
+
+AlertMessage = namedtuple('AlertMessage', 'shop_id recipient subject body alert_ids')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ----------------------------------------------------------
+# Backends
+# ----------------------------------------------------------
+class BaseStockAlertBackend:
+    """Send a batch of AlertMessage, return one DeliveryResult per message."""
+
+    def send_messages(self, messages):
+        raise NotImplementedError
+
+
+class ConsoleStockAlertBackend(BaseStockAlertBackend):
+    def send_messages(self, messages):
+        for message in messages:
+            logger.info(f"Stock alert for shop {message.shop_id}: {message.body}")
+        return [DeliveryResult(True, '', '') for _ in messages]
+
+
+class LocmemStockAlertBackend(BaseStockAlertBackend):
+    outbox = []
+
+    def send_messages(self, messages):
+        LocmemStockAlertBackend.outbox.extend(messages)
+        return [DeliveryResult(True, '', '') for _ in messages]
+
+
+class EmailStockAlertBackend(BaseStockAlertBackend):
+    """One email per shop over a single SMTP connection."""
+
+    def send_messages(self, messages):
+        results = []
+        with get_connection() as connection:
+            for message in messages:
+                if not message.recipient:
+                    results.append(DeliveryResult(False, '', 'Shop owner has no email'))
+                    continue
+                try:
+                    EmailMessage(
+                        message.subject, message.body,
+                        _setting('STOCK_ALERT_FROM_EMAIL', 'noreply@shopmanager.com'),
+                        [message.recipient], connection=connection,
+                    ).send()
+                    results.append(DeliveryResult(True, '', ''))
+                except Exception as e:
+                    results.append(DeliveryResult(False, '', str(e)))
+        return results
+
+
+class WebhookStockAlertBackend(BaseStockAlertBackend):
+    """
+    One POST per batch to STOCK_ALERT_WEBHOOK_URL:
+    {"alerts": [{"shop_id", "to", "title", "text"}, ...]}
+    """
+
+    def __init__(self, url=None, token=None, timeout=10):
+        self.url = url or _setting('STOCK_ALERT_WEBHOOK_URL', None)
+        self.token = token or _setting('STOCK_ALERT_WEBHOOK_TOKEN', None)
+        self.timeout = timeout
+
+    def send_messages(self, messages):
+        payload = {"alerts": [
+            {"shop_id": m.shop_id, "to": m.recipient, "title": m.subject, "text": m.body}
+            for m in messages
+        ]}
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        try:
+            response = requests.post(self.url, json=payload, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.error(f"Stock alert webhook failed for {len(messages)} messages: {e}")
+            return [DeliveryResult(False, '', str(e)) for _ in messages]
+        return [DeliveryResult(True, '', '') for _ in messages]
+
+
+def get_backend(path=None, **kwargs):
+    backend = path or _setting('STOCK_ALERT_BACKEND', 'shop.stock_alerts.ConsoleStockAlertBackend')
+    return import_string(backend)(**kwargs)
+
+
+# ----------------------------------------------------------
+# Detection (called by shop.inventory.apply_movements)
+# ----------------------------------------------------------
+def detect_crossings(deltas):
+    """
+    Open or resolve alerts for products whose stock just moved by `deltas`
+    ({product_id: net delta}, already applied). Runs in the caller's transaction.
+    """
+    if not deltas:
+        return
+    default_threshold = _setting('LOW_STOCK_THRESHOLD', 10)
+    rows = Product.objects.filter(id__in=deltas).values_list(
+        'id', 'shop_id', 'stock_quantity', 'reorder_level__reorder_point'
+    )
+
+    fell, recovered = {}, []
+    for product_id, shop_id, stock, reorder_point in rows:
+        threshold = default_threshold if reorder_point is None else reorder_point
+        before = stock - deltas[product_id]
+        if stock <= threshold < before:
+            fell[product_id] = (shop_id, stock, threshold)
+        elif before <= threshold < stock:
+            recovered.append(product_id)
+
+    now = timezone.now()
+    if recovered:
+        StockAlert.objects.filter(product_id__in=recovered, resolved_at__isnull=True).update(resolved_at=now)
+    if not fell:
+        return
+
+    # An alert still active for the product (its threshold moved) already covers it
+    active = set(
+        StockAlert.objects.filter(product_id__in=fell, resolved_at__isnull=True)
+        .values_list('product_id', flat=True)
+    )
+    # Debounce: reopen the alert resolved within the cooldown (still SENT if it went out)
+    cooldown = timedelta(minutes=_setting('STOCK_ALERT_COOLDOWN_MINUTES', 360))
+    reopened = {}
+    recent = StockAlert.objects.filter(
+        product_id__in=[product_id for product_id in fell if product_id not in active],
+        resolved_at__gte=now - cooldown,
+    ).order_by('product_id', '-resolved_at')
+    for alert in recent:
+        if alert.product_id not in reopened:
+            _, alert.stock_quantity, alert.threshold = fell[alert.product_id]
+            alert.resolved_at = None
+            reopened[alert.product_id] = alert
+    StockAlert.objects.bulk_update(reopened.values(), ['resolved_at', 'stock_quantity', 'threshold'])
+
+    StockAlert.objects.bulk_create([
+        StockAlert(shop_id=shop_id, product_id=product_id, stock_quantity=stock, threshold=threshold)
+        for product_id, (shop_id, stock, threshold) in fell.items()
+        if product_id not in active and product_id not in reopened
+    ], ignore_conflicts=True)  # a concurrent writer may have opened it first
+
+
+# ----------------------------------------------------------
+# Delivery
+# ----------------------------------------------------------
+def _claim(batch_size, after_id, ready_before):
+    """Move up to `batch_size` due, still-active PENDING alerts to SENDING and return them."""
+    with transaction.atomic():
+        batch = list(
+            StockAlert.objects.filter(
+                status=StockAlert.PENDING, resolved_at__isnull=True,
+                created_at__lte=ready_before, id__gt=after_id,
+            )
+            .select_for_update(skip_locked=True, of=('self',))
+            .select_related('shop__owner', 'product')
+            .order_by('id')[:batch_size]
+        )
+        if batch:
+            StockAlert.objects.filter(id__in=[alert.id for alert in batch]).update(
+                status=StockAlert.SENDING, claimed_at=timezone.now()
+            )
+    return batch
+
+
+def requeue_stale(timeout=None, max_attempts=None):
+    """
+    Put alerts stuck in SENDING (their run died before recording the
+    outcome) back to PENDING, counting an attempt; FAILED once attempts run
+    out. Returns the number of alerts released.
+    """
+    if timeout is None:
+        timeout = timedelta(minutes=_setting('STOCK_ALERT_CLAIM_TIMEOUT_MINUTES', 15))
+    if max_attempts is None:
+        max_attempts = _setting('STOCK_ALERT_MAX_ATTEMPTS', 3)
+    stale = StockAlert.objects.filter(status=StockAlert.SENDING).filter(
+        Q(claimed_at__lt=timezone.now() - timeout) | Q(claimed_at__isnull=True)
+    )
+    error = 'Delivery not confirmed (dispatch interrupted)'
+    failed = stale.filter(attempts__gte=max_attempts - 1).update(
+        status=StockAlert.FAILED, attempts=F('attempts') + 1, claimed_at=None, error=error,
+    )
+    pending = stale.update(
+        status=StockAlert.PENDING, attempts=F('attempts') + 1, claimed_at=None, error=error,
+    )
+    if failed or pending:
+        logger.warning(f"Stock alerts stuck in SENDING: {pending} re-queued, {failed} failed")
+    return failed + pending
+
+
+def render_message(shop, alerts):
+    lines = [
+        f"- {alert.product.name}: {alert.product.stock_quantity} left (reorder at {alert.threshold})"
+        for alert in alerts
+    ]
+    subject = f"Low stock: {len(alerts)} product{'s' if len(alerts) > 1 else ''} at {shop.name}"
+    return AlertMessage(
+        shop_id=shop.id,
+        recipient=shop.owner.email,
+        subject=subject,
+        body="\n".join(lines),
+        alert_ids=[alert.id for alert in alerts],
+    )
+
+
+def dispatch_alerts(backend=None, batch_size=None):
+    """Deliver due alerts, one message per shop per batch. Returns {"sent": n, "failed": n}."""
+    backend = backend or get_backend()
+    batch_size = batch_size or _setting('STOCK_ALERT_BATCH_SIZE', 200)
+    max_attempts = _setting('STOCK_ALERT_MAX_ATTEMPTS', 3)
+    requeue_stale(max_attempts=max_attempts)
+    ready_before = timezone.now() - timedelta(seconds=_setting('STOCK_ALERT_DELAY_SECONDS', 300))
+
+    sent = failed = 0
+    last_id = 0
+    while True:
+        batch = _claim(batch_size, last_id, ready_before)
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        by_shop = defaultdict(list)
+        for alert in batch:
+            by_shop[alert.shop_id].append(alert)
+        messages = [render_message(alerts[0].shop, alerts) for alerts in by_shop.values()]
+        try:
+            results = backend.send_messages(messages)
+        except Exception as e:
+            logger.error(f"Stock alert backend error: {e}", exc_info=True)
+            results = [DeliveryResult(False, '', str(e))] * len(messages)
+
+        now = timezone.now()
+        for message, result in zip(messages, results):
+            for alert in by_shop[message.shop_id]:
+                alert.attempts += 1
+                alert.claimed_at = None
+                if result.ok:
+                    alert.status = StockAlert.SENT
+                    alert.sent_at = now
+                    alert.error = ''
+                    sent += 1
+                else:
+                    alert.status = StockAlert.FAILED if alert.attempts >= max_attempts else StockAlert.PENDING
+                    alert.error = result.error or 'Unknown error'
+                    failed += 1
+        StockAlert.objects.bulk_update(batch, ['status', 'attempts', 'sent_at', 'error', 'claimed_at'])
+
+        if len(batch) < batch_size:
+            break
+
+    if sent or failed:
+        logger.info(f"Stock alerts dispatched: {sent} sent, {failed} failed")
+    return {"sent": sent, "failed": failed}
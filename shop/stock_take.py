@@ -0,0 +1,196 @@
+# shop/stock_take.py
+"""
+Stock-take (physical count) sessions.
+
+- record_counts(): a device uploads a batch of scanned counts
+  ({barcode | product_id, quantity}). Codes resolve in two queries (a box
+  barcode counts its factor in pieces), lines for the same product add up,
+  and the batch is upserted with one INSERT .. ON CONFLICT on
+  (stock_take, product, device). A device re-sends its running totals
+  (mode "set") or only its new scans (mode "add"); devices add up. The
+  same transaction snapshots each product's system stock onto its rows:
+  a product is counted as of its last upload.
+- variance(): one query, the shop's products LEFT JOIN this session's
+  counts grouped per product: the snapshot, counted, difference and its
+  value at selling price.
+- post_stock_take(): in one transaction, turns the variance into
+  STOCK_TAKE movements through apply_movements() (bulk ledger insert and
+  one CASE UPDATE per chunk) and closes the session. The differences are
+  measured against the snapshot and applied as increments, so sales,
+  purchases and returns made after a product was counted are kept.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import FilteredRelation, Max, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from shop.catalog import resolve_codes
+from shop.inventory import apply_movements, movement
+from shop.models import Product, StockTake, StockTakeCount
+
+logger = logging.getLogger(__name__)
+
+COUNT_BATCH_LIMIT = 5000
+POST_CHUNK_SIZE = 1000
+
+
+def _open_take(stock_take):
+    """Lock the session row; raises ValueError unless it is still open."""
+    take = StockTake.objects.select_for_update().get(pk=stock_take.pk)
+    if take.status != StockTake.OPEN:
+        raise ValueError(f"Stock take is {take.get_status_display().lower()}")
+    return take
+
+
+def record_counts(stock_take, lines, device='', mode='set'):
+    """
+    Upsert a device's batch of counts. Returns (products written, errors);
+    errors are {"line": n, "error": ...} for the lines that were skipped.
+    """
+    errors = []
+    codes = {str(line['barcode']) for line in lines if line.get('barcode')}
+    resolved = resolve_codes(stock_take.shop_id, codes) if codes else {}
+
+    totals = defaultdict(int)
+    for index, line in enumerate(lines, start=1):
+        try:
+            quantity = int(line.get('quantity', 1))
+            if quantity < 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors.append({"line": index, "error": "Invalid quantity"})
+            continue
+
+        if line.get('barcode'):
+            match = resolved.get(str(line['barcode']))
+            if not match:
+                errors.append({"line": index, "error": f"Unknown barcode '{line['barcode']}'"})
+                continue
+            product_id, factor = match
+        else:
+            try:
+                product_id, factor = int(line.get('product_id')), 1
+            except (TypeError, ValueError):
+                errors.append({"line": index, "error": "barcode or product_id is required"})
+                continue
+        totals[product_id] += quantity * factor
+
+    # Only products of the shop (and of the session's category) count
+    in_scope = Product.objects.filter(shop_id=stock_take.shop_id, id__in=totals)
+    if stock_take.category_id:
+        in_scope = in_scope.filter(category_id=stock_take.category_id)
+    in_scope = set(in_scope.values_list('id', flat=True))
+    for product_id in set(totals) - in_scope:
+        errors.append({"product_id": product_id, "error": "Product is not part of this stock take"})
+        del totals[product_id]
+
+    with transaction.atomic():
+        _open_take(stock_take)
+        if mode == 'add' and totals:
+            for product_id, counted in StockTakeCount.objects.filter(
+                stock_take=stock_take, device=device, product_id__in=totals,
+            ).values_list('product_id', 'counted_quantity'):
+                totals[product_id] += counted
+        StockTakeCount.objects.bulk_create(
+            [
+                StockTakeCount(stock_take=stock_take, product_id=product_id, device=device, counted_quantity=units)
+                for product_id, units in totals.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['stock_take', 'product', 'device'],
+            update_fields=['counted_quantity', 'updated_at'],
+            batch_size=1000,
+        )
+        # Snapshot the stock the counts are measured against (all devices' rows)
+        StockTakeCount.objects.filter(stock_take=stock_take, product_id__in=totals).update(
+            system_quantity=Subquery(
+                Product.objects.filter(pk=OuterRef('product_id')).values('stock_quantity')[:1]
+            )
+        )
+    return len(totals), errors
+
+
+def variance_rows(stock_take, include_uncounted=False):
+    """
+    Per product: system stock when counted, counted units (all devices) and
+    the difference. Uncounted products are left out unless `include_uncounted`
+    (then they count as 0 against the current stock). One joined, grouped query.
+    """
+    products = Product.objects.filter(shop_id=stock_take.shop_id).annotate(
+        take_line=FilteredRelation(
+            'stock_take_counts', condition=Q(stock_take_counts__stock_take_id=stock_take.id),
+        ),
+    )
+    if stock_take.category_id:
+        products = products.filter(category_id=stock_take.category_id)
+    if not include_uncounted:
+        products = products.filter(take_line__isnull=False)
+    rows = (
+        products.values('id', 'name', 'barcode', 'price', 'stock_quantity')
+        .annotate(counted=Sum('take_line__counted_quantity'), snapshot=Max('take_line__system_quantity'))
+        .order_by('name', 'id')
+    )
+    for row in rows:
+        counted = row['counted'] or 0
+        system = row['stock_quantity'] if row['snapshot'] is None else row['snapshot']
+        yield {
+            "product_id": row['id'],
+            "name": row['name'],
+            "barcode": row['barcode'],
+            "system_quantity": system,
+            "current_quantity": row['stock_quantity'],
+            "counted_quantity": counted,
+            "difference": counted - system,
+            "value": (counted - system) * row['price'],
+        }
+
+
+def variance(stock_take, include_uncounted=False, only_differences=False):
+    """Variance report: {"summary": {...}, "lines": [...]}."""
+    lines = []
+    summary = {"products": 0, "matched": 0, "over": 0, "short": 0, "net_units": 0, "net_value": 0}
+    for row in variance_rows(stock_take, include_uncounted):
+        summary["products"] += 1
+        if row["difference"] > 0:
+            summary["over"] += 1
+        elif row["difference"] < 0:
+            summary["short"] += 1
+        else:
+            summary["matched"] += 1
+        summary["net_units"] += row["difference"]
+        summary["net_value"] += row["value"]
+        if row["difference"] or not only_differences:
+            lines.append(row)
+    return {"summary": summary, "lines": lines}
+
+
+def post_stock_take(stock_take, user=None, zero_uncounted=False):
+    """
+    Post the session's variance as STOCK_TAKE movements and close it.
+    zero_uncounted: products of the session's scope nobody counted are set to 0.
+    Returns the posted StockTake.
+    """
+    with transaction.atomic():
+        take = _open_take(stock_take)
+        movements = [
+            movement(
+                Product(id=row['product_id'], shop_id=take.shop_id),
+                row['difference'], 'STOCK_TAKE', take.id,
+                note=f"Counted {row['counted_quantity']}, system {row['system_quantity']}",
+            )
+            for row in variance_rows(take, include_uncounted=zero_uncounted)
+            if row['difference']
+        ]
+        for start in range(0, len(movements), POST_CHUNK_SIZE):
+            apply_movements(movements[start:start + POST_CHUNK_SIZE])
+
+        take.status = StockTake.POSTED
+        take.posted_at = timezone.now()
+        take.posted_by = user
+        take.adjusted_products = len(movements)
+        take.net_delta = sum(m.delta for m in movements)
+        take.save(update_fields=['status', 'posted_at', 'posted_by', 'adjusted_products', 'net_delta'])
+    logger.info(f"Stock take {take.id} posted: {take.adjusted_products} products adjusted, net {take.net_delta:+d}")
+    return take
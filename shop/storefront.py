@@ -0,0 +1,180 @@
+# shop/storefront.py
+"""
+Precomputed public catalog per shop slug.
+
+The catalog (shop header + visible products) is rendered to JSON once,
+gzip-compressed and kept in the cache together with its ETag. Products are
+listed compactly: variants and units nested under their product (see
+shop/catalog.py) and categories named once at the top. The entry also keeps
+the flat ProductSerializer list that /products/?slug= has always returned. Readers never
+touch the database while the entry is fresh. Product/Category/Shop writes mark
+the shop's entry stale; the next reader rebuilds it while concurrent readers
+keep getting the previous copy, so a traffic spike costs one rebuild. On a
+cold cache only the reader holding the lock builds; the others poll for its
+entry for up to COLD_WAIT seconds before building it themselves.
+"""
+import gzip
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.core_models import Shop
+from core.http_cache import make_etag
+from shop.catalog import catalog_tree
+from shop.models import Product, ProductUnit, Category
+
+logger = logging.getLogger(__name__)
+
+LOCK_TIMEOUT = 30
+MISSING_TTL = 60
+COLD_WAIT = 3
+COLD_POLL = 0.05
+
+
+def _catalog_key(slug):
+    return f"storefront:catalog:{slug}"
+
+
+def _fresh_key(shop_id):
+    return f"storefront:fresh:{shop_id}"
+
+
+def _lock_key(slug):
+    return f"storefront:lock:{slug}"
+
+
+def build_catalog(slug):
+    """Render the catalog for `slug` and store it; returns the cache entry."""
+    from shop.api.serializers import ProductSerializer
+    shop = Shop.objects.filter(slug=slug, is_live=True).first()
+    if not shop:
+        entry = {'missing': True}
+        cache.set(_catalog_key(slug), entry, MISSING_TTL)
+        return entry
+
+    products = Product.objects.filter(shop=shop, show_on_website=True).order_by('-created_at')
+    tree = catalog_tree(products, public=True)
+    categories = {
+        category.id: category.name
+        for category in Category.objects.filter(
+            id__in={
+                node['category_id']
+                for top in tree for node in [top, *top.get('variants', [])]
+                if 'category_id' in node
+            }
+        )
+    }
+    payload = {
+        'shop': {
+            'id': shop.id,
+            'name': shop.name,
+            'slug': shop.slug,
+            'address': shop.address,
+            'description': shop.description,
+            'logo': shop.logo,
+            'banner': shop.banner,
+        },
+        'categories': categories,
+        'products': tree,
+        'generated_at': timezone.now(),
+    }
+    body = JSONRenderer().render(payload)
+    products_body = JSONRenderer().render(
+        ProductSerializer(products.select_related('category'), many=True).data
+    )
+    entry = {
+        'shop_id': shop.id,
+        'etag': make_etag(body),
+        'gzip': gzip.compress(body),
+        'products_gzip': gzip.compress(products_body),
+    }
+    cache.set(_catalog_key(slug), entry, None)
+    cache.set(_fresh_key(shop.id), True, settings.STOREFRONT_CATALOG_TTL)
+    logger.info(f"Storefront catalog rebuilt for {slug}: {len(payload['products'])} products")
+    return entry
+
+
+def get_catalog(slug):
+    """
+    Cache entry for `slug`: {'etag', 'gzip', 'shop_id'} or {'missing': True}.
+    Only the request that takes the lock rebuilds; the others get the stale
+    copy, or on a cold cache wait for the new one.
+    """
+    entry = cache.get(_catalog_key(slug))
+    if entry is not None:
+        if entry.get('missing') or cache.get(_fresh_key(entry['shop_id'])):
+            return entry
+
+    if cache.add(_lock_key(slug), True, LOCK_TIMEOUT):
+        try:
+            return build_catalog(slug)
+        finally:
+            cache.delete(_lock_key(slug))
+    if entry is not None:
+        return entry
+
+    deadline = time.monotonic() + COLD_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(COLD_POLL)
+        entry = cache.get(_catalog_key(slug))
+        if entry is not None:
+            return entry
+    # The lock holder is slow or gone: build once without touching its lock
+    return build_catalog(slug)
+
+
+def get_catalog_data(slug):
+    """Decoded catalog payload, or None if the shop isn't live."""
+    entry = get_catalog(slug)
+    if entry.get('missing'):
+        return None
+    return json.loads(gzip.decompress(entry['gzip']))
+
+
+def get_catalog_products(slug):
+    """The shop's website products in the ProductSerializer shape, or None if it isn't live."""
+    entry = get_catalog(slug)
+    if entry.get('missing'):
+        return None
+    if 'products_gzip' not in entry:  # cached before the compact catalog
+        entry = build_catalog(slug)
+    return json.loads(gzip.decompress(entry['products_gzip']))
+
+
+def invalidate_catalog(shop_id):
+    """Mark a shop's catalog stale once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(_fresh_key(shop_id)))
+
+
+# ===================== INVALIDATION RECEIVERS =====================
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+def product_changed(sender, instance, **kwargs):
+    invalidate_catalog(instance.shop_id)
+
+
+@receiver([post_save, post_delete], sender=ProductUnit)
+def unit_changed(sender, instance, **kwargs):
+    invalidate_catalog(instance.product.shop_id)
+
+
+@receiver([post_save, post_delete], sender=Shop)
+def shop_changed(sender, instance, **kwargs):
+    invalidate_catalog(instance.id)
+    if instance.slug:
+        transaction.on_commit(lambda: _drop_missing(instance.slug))
+
+
+def _drop_missing(slug):
+    # A cached "not live" answer must not outlive publishing the shop
+    entry = cache.get(_catalog_key(slug))
+    if entry is not None and entry.get('missing'):
+        cache.delete(_catalog_key(slug))
@@ -1,6 +1,12 @@
+from datetime import timedelta
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 from shop.models import PendingSale
+from shop.day_close import auto_close, verify_closed_days
+from shop.expenses import materialize_due_expenses
+from shop.reorder import compute_reorder_levels
+from shop.stock_alerts import dispatch_alerts
 from django.core.mail import send_mail
 import logging
 
@@ -23,4 +29,43 @@ def notify_due_sales():
             )
             logger.info(f"Notification sent for pending sale {sale.id}")
         except Exception as e:
-            logger.error(f"Failed to send notification for pending sale {sale.id}: {str(e)}")
\ No newline at end of file
+            logger.error(f"Failed to send notification for pending sale {sale.id}: {str(e)}")
+
+
+@shared_task
+def close_and_verify_days():
+    """
+    Auto-close the unclosed days with activity up to yesterday (days a missed
+    run left behind included), then re-verify the recent closed days and
+    record corrections for late edits. Older history: the close_days command.
+    """
+    today = timezone.localdate()
+    yesterday = today - timedelta(days=1)
+    catch_up = getattr(settings, 'DAY_CLOSE_CATCHUP_DAYS', 31)
+    closed = auto_close(today - timedelta(days=catch_up), yesterday)
+    lookback = getattr(settings, 'DAY_CLOSE_VERIFY_DAYS', 7)
+    corrected = verify_closed_days(today - timedelta(days=lookback), today)
+    logger.info(f"Day close job: {closed} days auto-closed, {corrected} corrections")
+    return {"closed": closed, "corrections": corrected}
+
+
+@shared_task
+def materialize_recurring_expenses():
+    """Create the due expenses of every shop's recurring templates in one pass."""
+    created = materialize_due_expenses()
+    logger.info(f"Recurring expenses: {created} expenses created")
+    return created
+
+
+@shared_task
+def refresh_reorder_levels():
+    """Recompute every product's reorder point from the last weeks of sales."""
+    written = compute_reorder_levels()
+    logger.info(f"Reorder levels: {written} products updated")
+    return written
+
+
+@shared_task
+def dispatch_stock_alerts():
+    """Deliver the low-stock alerts that outlived the debounce delay, batched per shop."""
+    return dispatch_alerts()
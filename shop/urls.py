@@ -1,21 +1,32 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import InvoiceViewSet, ExpenseViewSet, CashbookViewSet, OrderRecordViewSet, my_current_shop
+from .views import (
+    InvoiceViewSet, ExpenseViewSet, ExpenseBudgetViewSet, RecurringExpenseViewSet,
+    OrderRecordViewSet, my_current_shop,
+)
 from .category_views import CategoryViewSet
 from shop.api.urls import sale_urls  # ✅ import here instead of include()
 from shop.api.views.sale_bill_views import SaleBillViewSet
 from shop.api.views import ProductViewSet
+from shop.api.views.views import CashbookViewSet
 from shop.api.views.return_views import PurchaseReturnViewSet, SaleReturnViewSet
+from shop.api.views.storefront_views import storefront_catalog
+from shop.api.views.day_close_views import DayCloseViewSet
+from shop.api.views.stock_take_views import StockTakeViewSet
 
 router = DefaultRouter()
 
 router.register(r'invoices', InvoiceViewSet, basename='invoice')
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'expenses', ExpenseViewSet, basename='expense')
+router.register(r'expense-budgets', ExpenseBudgetViewSet, basename='expense-budget')
+router.register(r'recurring-expenses', RecurringExpenseViewSet, basename='recurring-expense')
 router.register(r'cashbook', CashbookViewSet, basename='cashbook')
 router.register(r'sales/bills', SaleBillViewSet, basename='sale-bill')
 router.register(r'orders', OrderRecordViewSet, basename='order-record')
 router.register(r'products', ProductViewSet, basename='product')
+router.register(r'day-closes', DayCloseViewSet, basename='day-close')
+router.register(r'stock-takes', StockTakeViewSet, basename='stock-take')
 
 # ===================== RETURN ROUTES =====================
 router.register(r'purchases/returns', PurchaseReturnViewSet, basename='purchase-return')
@@ -27,4 +38,7 @@ urlpatterns = [
 
     # ✅ यहाँ नया endpoint add करो
     path('shops/my-shop/', my_current_shop, name='my-shop'),
+
+    # Public cached catalog (shared shop links)
+    path('storefront/<slug:slug>/', storefront_catalog, name='storefront-catalog'),
 ]
@@ -1,5 +1,6 @@
 import logging
 import random
+from datetime import datetime
 
 from django.db import transaction
 from django.utils import timezone
@@ -10,16 +11,20 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 
 from .models import (
-    Product, Invoice, Category, Expense, InvoiceItem,
-    CashbookEntry, OrderRecord
+    Product, Invoice, Category, Expense, ExpenseBudget, RecurringExpense, InvoiceItem,
+    CashbookEntry, OrderRecord,
 )
 from .serializers import (
     ProductSerializer, InvoiceSerializer, CategorySerializer,
-    ExpenseSerializer, InvoiceItemSerializer,
-    CashbookEntrySerializer, OrderRecordSerializer
+    ExpenseSerializer, ExpenseBudgetSerializer, RecurringExpenseSerializer,
+    InvoiceItemSerializer, OrderRecordSerializer,
 )
 from core.core_models import Shop
 from shop.models.sale import Sale
+from shop.cashbook import post_entries, sale_entry, expense_entry
+from shop.catalog import billing_line, resolve_scan
+from shop.inventory import apply_movements, movement
+from shop.expenses import get_expense_summary, materialize_due_expenses
 
 logger = logging.getLogger(__name__)
 
@@ -150,13 +155,14 @@ class InvoiceViewSet(viewsets.ModelViewSet):
                 )
 
                 # 3. Create Sale Record
-                Sale.objects.create(
+                sale = Sale.objects.create(
                     shop=shop,
                     product=product,
                     quantity=quantity,
                     unit_price=product.price,
                     total_amount=total_amount,
                     is_online=False,
+                    is_cod=True,
                     sale_date=timezone.now()
                 )
 
@@ -165,6 +171,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
                     shop=shop,
                     invoice=invoice,
                     product=product,
+                    sale=sale,
                     customer_name=name,
                     customer_phone=phone,
                     quantity=quantity,
@@ -173,8 +180,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
                 )
 
                 # 5. Update Stock
-                product.stock_quantity -= quantity
-                product.save(update_fields=['stock_quantity'])
+                apply_movements([movement(product, -quantity, 'SALE', sale.id)])
 
             return Response({
                 "invoice_number": invoice_number,
@@ -197,19 +203,18 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             return Response({"error": "Invalid quantity"}, status=400)
 
         user_shop = Shop.objects.filter(owner=request.user).first()
-        product_qs = Product.objects.all()
-        if user_shop:
-            product_qs = product_qs.filter(shop=user_shop)
-
-        product = product_qs.filter(barcode=barcode).first()
-        if not product:
+        match = user_shop and resolve_scan(user_shop.id, barcode)
+        if not match:
             return Response({"error": "Product not found"}, status=404)
 
-        if product.stock_quantity < quantity:
+        # Quantity is in the scanned unit (box, pack); stock moves in base units
+        product = match.product
+        line = billing_line(product, quantity, match.unit)
+        if product.stock_quantity < line.base_quantity:
             return Response({"error": "Not enough stock"}, status=400)
 
         shop = product.shop
-        total_amount = product.price * quantity
+        total_amount = line.total
         invoice_number = f"INV-{random.randint(10000, 99999)}"
 
         try:
@@ -224,27 +229,30 @@ class InvoiceViewSet(viewsets.ModelViewSet):
                 InvoiceItem.objects.create(
                     invoice=invoice,
                     product=product,
-                    quantity=quantity,
-                    unit_price=product.price
+                    quantity=line.base_quantity,
+                    unit_price=line.base_price
                 )
 
-                Sale.objects.create(
+                sale = Sale(
                     shop=shop,
                     product=product,
-                    quantity=quantity,
-                    unit_price=product.price,
+                    quantity=line.base_quantity,
+                    unit_price=line.base_price,
                     total_amount=total_amount,
                     is_online=False,
                     sale_date=timezone.now()
                 )
-
-                product.stock_quantity -= quantity
-                product.save(update_fields=['stock_quantity'])
+                sale.save(exact_total=True)
+                post_entries([sale_entry(sale)])
+                apply_movements([movement(product, -line.base_quantity, 'SALE', sale.id)])
 
             return Response({
                 "status": "success",
                 "invoice_number": invoice_number,
                 "product": product.name,
+                "unit": match.unit.name if match.unit else None,
+                "quantity": quantity,
+                "base_quantity": line.base_quantity,
                 "total_amount": float(total_amount)
             }, status=201)
 
@@ -294,31 +302,136 @@ class ExpenseViewSet(viewsets.ModelViewSet):
             return Expense.objects.none()
         return Expense.objects.filter(shop=shop).order_by('-date')
 
+    @transaction.atomic
     def perform_create(self, serializer):
         shop = Shop.objects.filter(owner=self.request.user).first()
+        if not shop:
+            raise ValueError("No shop found")
+        expense = serializer.save(shop=shop)
+        post_entries([expense_entry(expense)])
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        expense = serializer.save()
+        entry = CashbookEntry.objects.filter(
+            shop=expense.shop, source_type='EXPENSE', source_id=expense.id
+        ).first()
+        if entry is None:
+            post_entries([expense_entry(expense)])
+        elif (entry.amount, entry.date) != (expense.amount, expense.date):
+            entry.amount = expense.amount
+            entry.date = expense.date
+            entry.save()  # CashbookDay follows through the save receivers
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        for entry in CashbookEntry.objects.filter(
+            shop=instance.shop, source_type='EXPENSE', source_id=instance.id
+        ):
+            entry.delete()
+        instance.delete()
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Spend per category and month vs the previous period, with budget alerts.
+        ?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD (default: this month to date)
+        """
+        shop = Shop.objects.filter(owner=request.user).first()
+        if not shop:
+            return Response({"error": "Shop not found"}, status=404)
+
+        today = timezone.localdate()
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else today.replace(day=1)
+        except ValueError:
+            return Response({"error": "Invalid start_date format. Use YYYY-MM-DD."}, status=400)
+        try:
+            end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else today
+        except ValueError:
+            return Response({"error": "Invalid end_date format. Use YYYY-MM-DD."}, status=400)
+        if start > end:
+            return Response({"error": "start_date must be before end_date."}, status=400)
+
+        return Response(get_expense_summary(shop.id, start, end))
+
+
+# ===================== EXPENSE BUDGET VIEWSET =====================
+class ExpenseBudgetViewSet(viewsets.ModelViewSet):
+    """Monthly limit per expense category; alerts show up in /api/expenses/summary/."""
+    serializer_class = ExpenseBudgetSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_shop(self):
+        if not hasattr(self, '_shop'):
+            self._shop = Shop.objects.filter(owner=self.request.user).first()
+        return self._shop
+
+    def get_queryset(self):
+        shop = self.get_shop()
+        if not shop:
+            return ExpenseBudget.objects.none()
+        return ExpenseBudget.objects.filter(shop=shop).order_by('category_key')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['shop'] = self.get_shop()
+        return context
+
+    def perform_create(self, serializer):
+        shop = self.get_shop()
         if not shop:
             raise ValueError("No shop found")
         serializer.save(shop=shop)
 
 
-# ===================== CASHBOOK VIEWSET =====================
-class CashbookViewSet(viewsets.ModelViewSet):
-    serializer_class = CashbookEntrySerializer
+# ===================== RECURRING EXPENSE VIEWSET =====================
+class RecurringExpenseViewSet(viewsets.ModelViewSet):
+    """
+    Templates for repeating expenses. The nightly beat job creates the due
+    expenses for every shop; a template that is already due when created is
+    materialized right away.
+    """
+    serializer_class = RecurringExpenseSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         shop = Shop.objects.filter(owner=self.request.user).first()
         if not shop:
-            return CashbookEntry.objects.none()
-        return CashbookEntry.objects.filter(shop=shop).order_by('-created_at')
+            return RecurringExpense.objects.none()
+        return RecurringExpense.objects.filter(shop=shop).order_by('next_run_date', 'id')
 
+    @transaction.atomic
     def perform_create(self, serializer):
         shop = Shop.objects.filter(owner=self.request.user).first()
-        if shop:
-            serializer.save(shop=shop)
+        if not shop:
+            raise ValueError("No shop found")
+        template = serializer.save(shop=shop)
+        if template.next_run_date <= timezone.localdate():
+            materialize_due_expenses(template_ids=[template.id])
+            template.refresh_from_db()
 
 
 # ===================== ORDER RECORD VIEWSET =====================
+def complete_order(order):
+    """
+    Mark a website order COMPLETED and book the COD cash it brought in
+    (once: the order row is locked and only a PENDING order moves).
+    Returns False when it was already completed.
+    """
+    with transaction.atomic():
+        order = OrderRecord.objects.select_for_update().get(pk=order.pk)
+        if order.status == 'COMPLETED':
+            return False
+        order.status = 'COMPLETED'
+        order.save(update_fields=['status', 'updated_at'])
+        if order.sale_id:
+            post_entries([sale_entry(order.sale, collected_on=timezone.localdate())])
+    return True
+
+
 class OrderRecordViewSet(viewsets.ModelViewSet):
     serializer_class = OrderRecordSerializer
     permission_classes = [IsAuthenticated]
@@ -329,6 +442,15 @@ class OrderRecordViewSet(viewsets.ModelViewSet):
             return OrderRecord.objects.none()
         return OrderRecord.objects.filter(shop=shop).order_by('-created_at')
 
+    def perform_update(self, serializer):
+        # Completing through PUT/PATCH books the COD cash like mark_complete
+        completing = serializer.validated_data.get('status') == 'COMPLETED'
+        if completing:
+            del serializer.validated_data['status']
+        order = serializer.save()
+        if completing:
+            complete_order(order)
+
     @action(detail=False, methods=['get'])
     def summary(self, request):
         shop = Shop.objects.filter(owner=request.user).first()
@@ -364,8 +486,7 @@ class OrderRecordViewSet(viewsets.ModelViewSet):
     def mark_complete(self, request, pk=None):
         try:
             order = self.get_queryset().get(pk=pk)
-            order.status = 'COMPLETED'
-            order.save(update_fields=['status'])
+            complete_order(order)
             return Response({"status": "Order marked as completed"})
         except OrderRecord.DoesNotExist:
             return Response({"error": "Order not found"}, status=404)
\ No newline at end of file
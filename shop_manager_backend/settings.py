@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
+from celery.schedules import crontab
 
 load_dotenv()
 
@@ -114,6 +115,34 @@ else:
         }
     }
 
+# =============================
+# CACHE (Redis when REDIS_URL is set | per-process memory locally)
+# =============================
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Public storefront catalog: browser/CDN max-age and how long a cached
+# catalog is trusted without a rebuild (changes invalidate it earlier).
+STOREFRONT_CACHE_MAX_AGE = 60
+STOREFRONT_CATALOG_TTL = 60 * 60
+
+# Public shop directory / shop pages (invalidated on publish & toggle_live)
+SHOP_DIRECTORY_CACHE_MAX_AGE = 60
+SHOP_DIRECTORY_CACHE_TTL = 60 * 60
+
 # =============================
 # Password Validators
 # =============================
@@ -172,9 +201,86 @@ CELERY_BEAT_SCHEDULE = {
     "check-due-sales-every-minute": {
         "task": "shop.tasks.notify_due_sales",
         "schedule": 60.0,
-    }
+    },
+    "queue-payment-reminders-daily": {
+        "task": "customers.tasks.queue_payment_reminders",
+        "schedule": 24 * 60 * 60.0,
+    },
+    "dispatch-payment-reminders-every-minute": {
+        "task": "customers.tasks.dispatch_payment_reminders",
+        "schedule": 60.0,
+    },
+    "refresh-customer-analytics-hourly": {
+        "task": "reports.tasks.refresh_all_customer_analytics",
+        "schedule": 60 * 60.0,
+    },
+    "close-and-verify-days-nightly": {
+        "task": "shop.tasks.close_and_verify_days",
+        "schedule": crontab(hour=0, minute=30),
+    },
+    "materialize-recurring-expenses-nightly": {
+        "task": "shop.tasks.materialize_recurring_expenses",
+        "schedule": crontab(hour=0, minute=5),
+    },
+    "refresh-reorder-levels-nightly": {
+        "task": "shop.tasks.refresh_reorder_levels",
+        "schedule": crontab(hour=1, minute=15),
+    },
+    "dispatch-stock-alerts-every-minute": {
+        "task": "shop.tasks.dispatch_stock_alerts",
+        "schedule": 60.0,
+    },
 }
 
+# Day close (shop/day_close.py): closed days re-checked for late edits
+DAY_CLOSE_VERIFY_DAYS = 7
+# Unclosed days the nightly job still auto-closes (older ones: close_days command)
+DAY_CLOSE_CATCHUP_DAYS = 31
+
+# =============================
+# Payment reminders (customers/reminders.py)
+# =============================
+# Dotted path like EMAIL_BACKEND; LocmemReminderBackend for tests,
+# WebhookReminderBackend for an SMS/WhatsApp gateway.
+REMINDER_BACKEND = os.getenv("REMINDER_BACKEND", "customers.reminders.ConsoleReminderBackend")
+REMINDER_WEBHOOK_URL = os.getenv("REMINDER_WEBHOOK_URL")
+REMINDER_WEBHOOK_TOKEN = os.getenv("REMINDER_WEBHOOK_TOKEN")
+REMINDER_CHANNEL = os.getenv("REMINDER_CHANNEL", "sms")
+REMINDER_MIN_DUE = os.getenv("REMINDER_MIN_DUE", "1")
+REMINDER_COOLDOWN_HOURS = int(os.getenv("REMINDER_COOLDOWN_HOURS", "24"))
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "100"))
+REMINDER_RATE_LIMIT = float(os.getenv("REMINDER_RATE_LIMIT", "10"))  # messages/second, 0 = off
+REMINDER_MAX_ATTEMPTS = 3
+REMINDER_CLAIM_TIMEOUT_MINUTES = 15  # SENDING rows older than this are re-queued
+
+# Customer RFM / CLV analytics (reports/analytics.py)
+CUSTOMER_ANALYTICS_TTL = 6 * 60 * 60  # outlives the hourly refresh job
+CUSTOMER_CLV_HORIZON_MONTHS = 12
+
+# Expense summary cache (shop/expenses.py); writes bump a per-shop version
+EXPENSE_SUMMARY_TTL = 60 * 60
+
+# Reorder points (shop/reorder.py): sales window, default lead time,
+# days of sales to order on top of the reorder point, service-level z
+REORDER_WINDOW_DAYS = int(os.getenv("REORDER_WINDOW_DAYS", "28"))
+REORDER_LEAD_TIME_DAYS = int(os.getenv("REORDER_LEAD_TIME_DAYS", "7"))
+REORDER_COVER_DAYS = int(os.getenv("REORDER_COVER_DAYS", "14"))
+REORDER_SERVICE_Z = float(os.getenv("REORDER_SERVICE_Z", "1.65"))  # ~95% of lead times without a stock-out
+LOW_STOCK_THRESHOLD = 10  # products not yet scored by the reorder job
+
+# Low-stock alerts (shop/stock_alerts.py). Backends: Console, Locmem, Email, Webhook
+STOCK_ALERT_BACKEND = os.getenv("STOCK_ALERT_BACKEND", "shop.stock_alerts.ConsoleStockAlertBackend")
+STOCK_ALERT_WEBHOOK_URL = os.getenv("STOCK_ALERT_WEBHOOK_URL")
+STOCK_ALERT_WEBHOOK_TOKEN = os.getenv("STOCK_ALERT_WEBHOOK_TOKEN")
+STOCK_ALERT_DELAY_SECONDS = int(os.getenv("STOCK_ALERT_DELAY_SECONDS", "300"))  # a dip fixed sooner is not sent
+STOCK_ALERT_COOLDOWN_MINUTES = int(os.getenv("STOCK_ALERT_COOLDOWN_MINUTES", "360"))  # re-dips reuse the alert
+STOCK_ALERT_BATCH_SIZE = 200
+STOCK_ALERT_MAX_ATTEMPTS = 3
+STOCK_ALERT_CLAIM_TIMEOUT_MINUTES = 15  # SENDING alerts older than this are re-queued
+
+# Supplier aging report cache (shop/payables.py); payable writes bump a per-shop version
+SUPPLIER_AGING_TTL = 60 * 60
+
 # =============================
 # Email
 # =============================
@@ -193,6 +299,12 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Country code added to local phone numbers when normalizing to E.164
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv("PHONE_DEFAULT_COUNTRY_CODE", "91")
+
+# Auto-generated product barcodes: EAN-13 (in-store "2" prefix) or PRD-<shop>-<seq>
+PRODUCT_BARCODE_EAN13 = os.getenv("PRODUCT_BARCODE_EAN13", "False") == "True"
+
 # =============================
 # Logging
 # =============================